@@ -0,0 +1,120 @@
+"""Controle de admissão por chave (ex.: list_id) para rajadas de check-in.
+
+No início de uma reunião centenas de leituras chegam à mesma lista em poucos
+segundos. No banco elas já se serializam no FOR UPDATE da linha da lista, mas
+cada uma segura uma conexão do pool enquanto espera. Aqui no máximo
+`concurrency` escritas por lista executam ao mesmo tempo, até `max_queue`
+esperam a vez em ordem de chegada e o excedente (ou quem esperar mais de
+`max_wait` segundos) é recusado com AdmissionRejected, que a rota converte em
+429 com Retry-After estimado pelo tempo médio de serviço.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Hashable
+
+
+class AdmissionRejected(Exception):
+    """Fila da chave cheia ou espera longa demais; `retry_after` em segundos"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Lane:
+    __slots__ = ('active', 'waiters')
+
+    def __init__(self):
+        self.active = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class AdmissionControl:
+    """Semáforo FIFO por chave com fila limitada"""
+
+    def __init__(self, concurrency: int = 2, max_queue: int = 50, max_wait: float = 10.0,
+                 initial_service_time: float = 0.05):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        # Média móvel exponencial do tempo de execução, usada no Retry-After
+        self.service_time = initial_service_time
+        self.admitted = 0
+        self.rejected = 0
+        self._lanes: Dict[Hashable, _Lane] = {}
+
+    def retry_after(self, key: Hashable) -> int:
+        lane = self._lanes.get(key)
+        backlog = (len(lane.waiters) + lane.active) if lane else 0
+        return max(1, math.ceil(backlog * self.service_time / self.concurrency))
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable):
+        """Espera a vez da chave (ou levanta AdmissionRejected) e executa o bloco"""
+        lane = self._lanes.get(key)
+        if lane is None:
+            lane = self._lanes[key] = _Lane()
+
+        if lane.active >= self.concurrency or lane.waiters:
+            if len(lane.waiters) >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(self.retry_after(key))
+            waiter = asyncio.get_running_loop().create_future()
+            lane.waiters.append(waiter)
+            try:
+                await asyncio.wait_for(asyncio.shield(waiter), self.max_wait)
+            except asyncio.TimeoutError:
+                self._abandon(key, lane, waiter)
+                self.rejected += 1
+                raise AdmissionRejected(self.retry_after(key))
+            except BaseException:
+                # Cliente desconectou (CancelledError) enquanto esperava
+                self._abandon(key, lane, waiter)
+                raise
+        else:
+            lane.active += 1
+
+        self.admitted += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.service_time += 0.2 * (time.perf_counter() - start - self.service_time)
+            self._release(key, lane)
+
+    def _release(self, key: Hashable, lane: _Lane):
+        # A vaga passa direto para o próximo da fila (active não muda)
+        while lane.waiters:
+            waiter = lane.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        lane.active -= 1
+        self._discard_if_idle(key, lane)
+
+    def _abandon(self, key: Hashable, lane: _Lane, waiter: asyncio.Future):
+        if waiter.done():
+            # A vaga já tinha sido passada para esta requisição: devolver
+            self._release(key, lane)
+        else:
+            waiter.cancel()
+            lane.waiters.remove(waiter)
+            self._discard_if_idle(key, lane)
+
+    def _discard_if_idle(self, key: Hashable, lane: _Lane):
+        if lane.active == 0 and not lane.waiters and self._lanes.get(key) is lane:
+            del self._lanes[key]
+
+    def stats(self) -> dict:
+        return {
+            'concurrency': self.concurrency,
+            'max_queue': self.max_queue,
+            'active': sum(lane.active for lane in self._lanes.values()),
+            'waiting': sum(len(lane.waiters) for lane in self._lanes.values()),
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'service_time': round(self.service_time, 4),
+        }
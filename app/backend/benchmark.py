@@ -0,0 +1,438 @@
+"""Benchmark de carga da API contra um banco local (SQLite por padrão).
+
+Roda o app FastAPI no próprio processo (httpx + ASGITransport, sem rede) e
+reproduz os cenários de uma troca de turno:
+
+- checkin:  500 check-ins chegando em 60 s, com telas de acompanhamento
+            consultando a lista e leitores repetindo alguns envios
+- registry: cadastro de 50 mil profissionais, paginação, buscas e novos cadastros
+- pdf:      downloads simultâneos de PDFs de listas ativas e uma exportação em ZIP
+- serialization: resposta de uma lista grande de registros pelo caminho antigo
+            (cópia campo a campo + jsonable_encoder), com validação pelo
+            response_model e pelo caminho rápido (flatten_record + FastJSONResponse)
+
+Para cada endpoint informa requisições, erros por status, vazão e latência
+p50/p95/p99. Cada execução é acrescentada a benchmark_results/history.jsonl;
+com --save-baseline o resultado vira a referência (benchmark_baseline.json) e
+com --compare a execução falha (código 1) se o p95 de algum endpoint piorar
+além da tolerância.
+
+Uso:
+    python benchmark.py checkin
+    python benchmark.py all --duration 10 --compare
+    DB_BACKEND=postgres DATABASE_URL=... python benchmark.py registry
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+
+ROOT_DIR = Path(__file__).parent
+RESULTS_DIR = ROOT_DIR / 'benchmark_results'
+BASELINE_PATH = ROOT_DIR / 'benchmark_baseline.json'
+
+SCENARIOS = ('checkin', 'registry', 'pdf', 'serialization')
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Percentil por interpolação linear (valores já ordenados)"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class Recorder:
+    """Latências e status por endpoint de um cenário"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.started = time.perf_counter()
+        self.finished = None
+
+    async def request(self, client, label: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        self.statuses[label][response.status_code] += 1
+        return response
+
+    def measure(self, label: str, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        return result
+
+    def summary(self) -> dict:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                'requests': len(values),
+                'statuses': {str(code): n for code, n in sorted(self.statuses[label].items())},
+                'throughput_rps': round(len(values) / elapsed, 2) if elapsed else 0.0,
+                'p50_ms': round(percentile(values, 50), 2),
+                'p95_ms': round(percentile(values, 95), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'max_ms': round(values[-1], 2),
+            }
+        return {'elapsed_s': round(elapsed, 2), 'endpoints': endpoints}
+
+
+# ===========================
+# DADOS DE CARGA
+# ===========================
+
+def professional_payload(i: int, prefix: str = 'bench') -> dict:
+    return {
+        'code': f"{prefix}-cred-{i:06d}",
+        'name': f"Profissional {random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{i:06d}",
+        'email': f"{prefix}.{i:06d}@empresa.com",
+        'profession': random.choice(['Técnico', 'Operador', 'Engenheiro', 'Mecânico', 'Eletricista']),
+        'company': random.choice(['Petrobras', 'Contratada A', 'Contratada B', 'Contratada C']),
+    }
+
+
+def list_payload(installation: str = 'P-74') -> dict:
+    return {
+        'installation_name': installation,
+        'meeting_date': datetime.now().strftime('%Y-%m-%d'),
+        'meeting_time': '07:00',
+        'course_title': 'DDS - Diálogo Diário de Segurança',
+        'course_content': 'Permissão de trabalho, isolamento de energias e trabalho em altura. ' * 3,
+        'instructor_name': 'Instrutor Benchmark',
+        'instructor_role': 'Técnico de Segurança',
+        'instructor_qualification': 'NR-35',
+        'location': 'Sala de reuniões do convés',
+    }
+
+
+async def seed_professionals(db, count: int, prefix: str = 'bench', batch_size: int = 1000) -> List[dict]:
+    """Cadastra `count` profissionais direto no repositório (códigos do contador do ano)"""
+    from registration import registration_code
+
+    year = datetime.now().year
+    seeded = []
+    for start in range(0, count, batch_size):
+        rows = [professional_payload(i, prefix) for i in range(start, min(start + batch_size, count))]
+        first = await db.allocate_registration_numbers(year, len(rows))
+        for n, row in enumerate(rows):
+            row['registration_code'] = registration_code(year, first + n)
+        seeded.extend(await db.insert_professionals(rows))
+    return seeded
+
+
+# ===========================
+# CENÁRIOS
+# ===========================
+
+async def scenario_checkin(client, server, args) -> dict:
+    """Troca de turno: `checkins` leituras espalhadas em `duration` segundos"""
+    professionals = await seed_professionals(server.db, args.checkins + 50, prefix='checkin')
+    attendance_list = (await client.post('/api/attendance-lists', json=list_payload())).json()
+    list_id = attendance_list['id']
+
+    recorder = Recorder()
+    # Chegadas de Poisson: n instantes uniformes na janela do cenário
+    offsets = sorted(random.uniform(0, args.duration) for _ in range(args.checkins))
+
+    async def check_in(offset: float, professional: dict):
+        await asyncio.sleep(offset)
+        if random.random() < 0.2:
+            payload = {'list_id': list_id, 'registration_code': professional['registration_code']}
+        else:
+            payload = {'list_id': list_id, 'code': professional['code']}
+        await recorder.request(client, 'POST /api/attendance-records', 'POST', '/api/attendance-records', json=payload)
+        # Leitor que não recebeu a resposta e reenvia
+        if random.random() < 0.05:
+            await recorder.request(client, 'POST /api/attendance-records', 'POST', '/api/attendance-records', json=payload)
+
+    done = asyncio.Event()
+
+    async def watch():
+        # Telão / supervisor atualizando a lista a cada 2 s
+        while not done.is_set():
+            await recorder.request(
+                client, 'GET /api/attendance-records/list/{list_id}', 'GET', f"/api/attendance-records/list/{list_id}"
+            )
+            await asyncio.sleep(2)
+
+    watchers = [asyncio.create_task(watch()) for _ in range(args.watchers)]
+    await asyncio.gather(*(check_in(offset, p) for offset, p in zip(offsets, professionals)))
+    done.set()
+    await asyncio.gather(*watchers)
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+async def scenario_registry(client, server, args) -> dict:
+    """Cadastro grande: paginação completa, buscas por digital/registro e novos cadastros"""
+    professionals = await seed_professionals(server.db, args.professionals, prefix='registry')
+    semaphore = asyncio.Semaphore(args.concurrency)
+    recorder = Recorder()
+
+    async def bounded(coro):
+        async with semaphore:
+            return await coro
+
+    async def walk_pages():
+        cursor = None
+        for _ in range(args.pages):
+            params = {'limit': 100, **({'cursor': cursor} if cursor else {})}
+            response = await recorder.request(client, 'GET /api/professionals', 'GET', '/api/professionals', params=params)
+            cursor = response.headers.get('x-next-cursor')
+            if not cursor:
+                break
+
+    async def lookup(professional: dict):
+        if random.random() < 0.5:
+            await recorder.request(
+                client, 'GET /api/professionals/by-code/{code}', 'GET', f"/api/professionals/by-code/{professional['code']}"
+            )
+        else:
+            await recorder.request(
+                client, 'GET /api/professionals/by-registration/{registration_code}', 'GET',
+                f"/api/professionals/by-registration/{professional['registration_code']}",
+            )
+
+    async def register(i: int):
+        await recorder.request(
+            client, 'POST /api/professionals', 'POST', '/api/professionals', json=professional_payload(i, prefix='new')
+        )
+
+    tasks = [bounded(walk_pages()) for _ in range(args.concurrency)]
+    tasks += [bounded(lookup(random.choice(professionals))) for _ in range(args.lookups)]
+    tasks += [bounded(register(i)) for i in range(args.registrations)]
+    random.shuffle(tasks)
+    recorder.started = time.perf_counter()
+    await asyncio.gather(*tasks)
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+async def scenario_pdf(client, server, args) -> dict:
+    """Vários supervisores baixando PDFs ao mesmo tempo e uma exportação em lote"""
+    professionals = await seed_professionals(server.db, args.records_per_list, prefix='pdf')
+    list_ids = []
+    for _ in range(args.lists):
+        attendance_list = (await client.post('/api/attendance-lists', json=list_payload('P-PDF'))).json()
+        list_ids.append(attendance_list['id'])
+        items = [{'code': p['code']} for p in professionals]
+        await client.post('/api/attendance-records/batch', json={'list_id': attendance_list['id'], 'items': items})
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    recorder = Recorder()
+
+    async def download(list_id: str):
+        async with semaphore:
+            response = await recorder.request(
+                client, 'GET /api/attendance-lists/{list_id}/pdf', 'GET', f"/api/attendance-lists/{list_id}/pdf"
+            )
+            if response.status_code == 429:
+                await asyncio.sleep(float(response.headers.get('retry-after', 1)))
+
+    async def export():
+        await recorder.request(
+            client, 'GET /api/exports/rosters', 'GET', '/api/exports/rosters',
+            params={'installation_name': 'P-PDF', 'format': 'zip'},
+        )
+
+    # Listas ativas não usam o cache de PDFs: cada download renderiza
+    tasks = [download(list_id) for _ in range(args.downloads_per_list) for list_id in list_ids]
+    random.shuffle(tasks)
+    await asyncio.gather(export(), *tasks)
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+async def scenario_serialization(client, server, args) -> dict:
+    """Serialização de `records` registros com o profissional embutido, sem banco nem HTTP"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[server.AttendanceRecordResponse])
+    now = datetime.now(timezone.utc).isoformat()
+
+    def rows():
+        return [
+            {
+                'id': f"00000000-0000-4000-8000-{i:012d}", 'list_id': '00000000-0000-4000-8000-000000000000',
+                'professional_id': f"00000000-0000-4000-9000-{i:012d}", 'entry_time': now,
+                'local': 'Sala de reuniões do convés', 'row_number': i + 1, 'created_at': now,
+                'professionals': {
+                    'name': f"Profissional {i:06d}", 'email': f"p{i:06d}@empresa.com",
+                    'profession': 'Técnico', 'company': 'Contratada A',
+                },
+            }
+            for i in range(args.records)
+        ]
+
+    def legacy(data):
+        # Caminho anterior do endpoint: dict novo por registro, jsonable_encoder e json
+        records = []
+        for record in data:
+            prof = record.get('professionals', {})
+            records.append({
+                'id': record['id'], 'list_id': record['list_id'], 'professional_id': record['professional_id'],
+                'professional_name': prof.get('name', ''), 'professional_email': prof.get('email', ''),
+                'professional_profession': prof.get('profession', ''), 'professional_company': prof.get('company', ''),
+                'entry_time': record['entry_time'], 'local': record['local'],
+                'row_number': record['row_number'], 'created_at': record['created_at'],
+            })
+        return JSONResponse(content=jsonable_encoder(records)).body
+
+    def validated(data):
+        # Endpoints com response_model: validação e serialização pelo modelo antes do json
+        for record in data:
+            server.flatten_record(record)
+        return JSONResponse(content=adapter.dump_python(adapter.validate_python(data), mode='json')).body
+
+    def fast(data):
+        return server.FastJSONResponse(content=[
+            server.project_row(server.flatten_record(record), server.AttendanceRecordResponse) for record in data
+        ]).body
+
+    recorder = Recorder()
+    for _ in range(args.repeat):
+        legacy_body = recorder.measure(f"records x{args.records} (cópia + jsonable_encoder)", legacy, rows())
+        recorder.measure(f"records x{args.records} (response_model + json)", validated, rows())
+        fast_body = recorder.measure(f"records x{args.records} (flatten + FastJSONResponse)", fast, rows())
+    if json.loads(legacy_body) != json.loads(fast_body):
+        raise AssertionError("Os dois caminhos de serialização produziram respostas diferentes")
+    recorder.finished = time.perf_counter()
+    return recorder.summary()
+
+
+# ===========================
+# EXECUÇÃO E RELATÓRIO
+# ===========================
+
+async def run(args) -> dict:
+    import httpx
+    import server
+
+    await server.startup_db_client()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark', timeout=None) as client:
+            results = {}
+            for name in (SCENARIOS if args.scenario == 'all' else (args.scenario,)):
+                print(f"Cenário {name}...", file=sys.stderr)
+                results[name] = await globals()[f"scenario_{name}"](client, server, args)
+            return results
+    finally:
+        await server.shutdown_db_client()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, text=True).strip()
+    except Exception:
+        return 'unknown'
+
+
+def print_report(results: dict):
+    header = f"{'endpoint':<62} {'req':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}  status"
+    for scenario, summary in results.items():
+        print(f"\n[{scenario}] {summary['elapsed_s']}s")
+        print(header)
+        for label, stats in summary['endpoints'].items():
+            statuses = ' '.join(f"{code}:{n}" for code, n in stats['statuses'].items())
+            print(
+                f"{label:<62} {stats['requests']:>6} {stats['throughput_rps']:>8} "
+                f"{stats['p50_ms']:>7}ms {stats['p95_ms']:>7}ms {stats['p99_ms']:>7}ms  {statuses}"
+            )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Endpoints cujo p95 piorou mais que `tolerance` (fração) em relação à referência"""
+    regressions = []
+    for scenario, summary in results.items():
+        reference = baseline.get('results', {}).get(scenario, {}).get('endpoints', {})
+        for label, stats in summary['endpoints'].items():
+            if label not in reference:
+                continue
+            before, after = reference[label]['p95_ms'], stats['p95_ms']
+            if before and after > before * (1 + tolerance):
+                regressions.append(f"[{scenario}] {label}: p95 {before}ms -> {after}ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('scenario', choices=SCENARIOS + ('all',))
+    parser.add_argument('--duration', type=float, default=60.0, help="janela do cenário checkin (s)")
+    parser.add_argument('--checkins', type=int, default=500)
+    parser.add_argument('--watchers', type=int, default=5, help="telas consultando a lista durante o checkin")
+    parser.add_argument('--professionals', type=int, default=50_000, help="tamanho do cadastro no cenário registry")
+    parser.add_argument('--pages', type=int, default=20, help="páginas percorridas por cliente no registry")
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--registrations', type=int, default=200)
+    parser.add_argument('--lists', type=int, default=10, help="listas no cenário pdf")
+    parser.add_argument('--records-per-list', type=int, default=40)
+    parser.add_argument('--downloads-per-list', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--records', type=int, default=5000, help="registros no cenário serialization")
+    parser.add_argument('--repeat', type=int, default=20, help="repetições no cenário serialization")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-baseline', action='store_true', help="gravar o resultado como referência")
+    parser.add_argument('--compare', action='store_true', help="falhar se o p95 piorar em relação à referência")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="piora aceita no p95 (fração)")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    # Banco e cache de PDFs descartáveis, a não ser que o ambiente indique outro backend
+    workdir = tempfile.mkdtemp(prefix='lista_digital_bench_')
+    os.environ.setdefault('DB_BACKEND', 'sqlite')
+    os.environ.setdefault('SQLITE_PATH', os.path.join(workdir, 'bench.db'))
+    os.environ.setdefault('PDF_CACHE_DIR', os.path.join(workdir, 'pdf_cache'))
+    sys.path.insert(0, str(ROOT_DIR))
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    run_record = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'revision': git_revision(),
+        'backend': os.environ['DB_BACKEND'],
+        'args': vars(args),
+        'results': results,
+    }
+    RESULTS_DIR.mkdir(exist_ok=True)
+    with open(RESULTS_DIR / 'history.jsonl', 'a') as f:
+        f.write(json.dumps(run_record) + '\n')
+
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(run_record, indent=2) + '\n')
+        print(f"\nReferência gravada em {BASELINE_PATH.name}")
+
+    if args.compare:
+        if not BASELINE_PATH.exists():
+            sys.exit("Sem referência: rode antes com --save-baseline")
+        regressions = compare(results, json.loads(BASELINE_PATH.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressões de latência:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nSem regressões em relação à referência")
+
+
+if __name__ == '__main__':
+    main()
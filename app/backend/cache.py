@@ -0,0 +1,227 @@
+"""Caches em memória do processo (LRU com TTL) e cache de PDFs."""
+import os
+import re
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Cache LRU limitado com expiração por TTL e contadores de acerto/erro"""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self.clock():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (self.clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class ProfessionalCache:
+    """Profissionais indexados por code (digital) e registration_code (em maiúsculas)"""
+
+    def __init__(self, maxsize: int = 5000, ttl: float = 600.0):
+        # Cada profissional ocupa duas entradas (uma por índice)
+        self._cache = TTLCache(maxsize * 2, ttl)
+
+    def get_by_code(self, code: str) -> Optional[dict]:
+        return self._cache.get(('code', code))
+
+    def get_by_registration(self, registration_code: str) -> Optional[dict]:
+        return self._cache.get(('registration_code', registration_code.upper()))
+
+    def put(self, professional: dict):
+        self._cache.set(('code', professional['code']), professional)
+        if professional.get('registration_code'):
+            self._cache.set(('registration_code', professional['registration_code'].upper()), professional)
+
+    def invalidate(self, professional: dict):
+        self._cache.pop(('code', professional.get('code')))
+        if professional.get('registration_code'):
+            self._cache.pop(('registration_code', professional['registration_code'].upper()))
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+class AttendanceListCache:
+    """Metadados das listas de presença usados no caminho quente do check-in"""
+
+    FIELDS = ('status', 'location', 'start_time')
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 300.0):
+        self._cache = TTLCache(maxsize, ttl)
+
+    def get(self, list_id: str) -> Optional[dict]:
+        return self._cache.get(list_id)
+
+    def put(self, attendance_list: dict):
+        self._cache.set(attendance_list['id'], {field: attendance_list.get(field) for field in self.FIELDS})
+
+    def invalidate(self, list_id: str):
+        self._cache.pop(list_id)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+CachedPdf = namedtuple('CachedPdf', ['etag', 'content', 'last_modified'])
+
+_SAFE_ID = re.compile(r'^[0-9A-Za-z-]+$')
+
+
+class PdfCache:
+    """PDFs de listas finalizadas, endereçados por list_id + hash do conteúdo.
+
+    Os arquivos são gravados em disco ({list_id}-v{versão}-{hash}.pdf, com mtime
+    igual ao fim da lista) e os mais usados ficam também em um LRU em memória
+    limitado por bytes. A busca exige o hash do conteúdo atual: um PDF guardado
+    para outro conteúdo da mesma lista nunca é servido, e gravar um PDF novo
+    apaga os arquivos anteriores da lista. Arquivos de outra versão do layout
+    são ignorados e removidos por purge_stale().
+    """
+
+    def __init__(self, directory: Path, version: int, max_memory_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.version = version
+        self.max_memory_bytes = max_memory_bytes
+        self.memory_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, CachedPdf]" = OrderedDict()
+
+    def get(self, list_id: str, etag: str) -> Optional[CachedPdf]:
+        entry = self._memory.get(list_id)
+        if entry is not None and entry.etag != etag:
+            entry = None
+        if entry is None and _SAFE_ID.match(list_id) and _SAFE_ID.match(etag):
+            entry = self._load(list_id, etag)
+            if entry is not None:
+                self._remember(list_id, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._memory.move_to_end(list_id)
+        self.hits += 1
+        return entry
+
+    def has(self, list_id: str) -> bool:
+        """Se existe algum PDF guardado para a lista (sem conferir o conteúdo)"""
+        if list_id in self._memory:
+            return True
+        return bool(_SAFE_ID.match(list_id)) and any(self._paths(list_id))
+
+    def put(self, list_id: str, etag: str, content: bytes, last_modified: datetime):
+        entry = CachedPdf(etag, content, last_modified)
+        if _SAFE_ID.match(list_id) and _SAFE_ID.match(etag):
+            self._store(list_id, entry)
+        self._remember(list_id, entry)
+
+    def _remember(self, list_id: str, entry: CachedPdf):
+        previous = self._memory.pop(list_id, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous.content)
+        if len(entry.content) > self.max_memory_bytes:
+            return
+        self._memory[list_id] = entry
+        self.memory_bytes += len(entry.content)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self.memory_bytes -= len(evicted.content)
+
+    def purge_stale(self) -> int:
+        """Remove do disco os PDFs de outras versões do layout; retorna quantos"""
+        if not self.directory.is_dir():
+            return 0
+        current = re.compile(rf'^[0-9A-Za-z-]+-v{self.version}-[0-9A-Za-z]+\.pdf$')
+        removed = 0
+        for path in self.directory.glob('*.pdf'):
+            if not current.match(path.name):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+    def _path(self, list_id: str, etag: str) -> Path:
+        return self.directory / f"{list_id}-v{self.version}-{etag}.pdf"
+
+    def _paths(self, list_id: str):
+        return self.directory.glob(f"{list_id}-v{self.version}-*.pdf")
+
+    def _load(self, list_id: str, etag: str) -> Optional[CachedPdf]:
+        path = self._path(list_id, etag)
+        try:
+            content = path.read_bytes()
+            last_modified = datetime.fromtimestamp(path.stat().st_mtime, tz=timezone.utc)
+        except FileNotFoundError:
+            return None
+        return CachedPdf(etag, content, last_modified)
+
+    def _store(self, list_id: str, entry: CachedPdf):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(list_id, entry.etag)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_bytes(entry.content)
+        timestamp = entry.last_modified.timestamp()
+        os.utime(tmp_path, (timestamp, timestamp))
+        os.replace(tmp_path, path)
+        # PDFs anteriores desta lista (de qualquer versão) não serão mais servidos
+        for sibling in self.directory.glob(f"{list_id}-*.pdf"):
+            if sibling != path:
+                sibling.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'memory_entries': len(self._memory),
+            'memory_bytes': self.memory_bytes,
+            'max_memory_bytes': self.max_memory_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,86 @@
+"""Coalescência de leituras idênticas simultâneas (single-flight).
+
+Chamadas com o mesmo método e os mesmos argumentos que chegam enquanto a
+primeira ainda está em andamento esperam por ela em vez de repetir a
+consulta. Não é um cache: quando a consulta termina a entrada sai do mapa e a
+próxima chamada vai ao banco.
+
+As rotas alteram no lugar as linhas devolvidas (flatten_record, etc.): cada
+chamador que compartilhou a consulta recebe uma cópia profunda e só o último a
+retomar fica com o objeto original.
+"""
+import asyncio
+import copy
+from typing import Dict, Hashable, Sequence
+
+
+class _Flight:
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn, *args, **kwargs):
+        flight = self._flights.get(key)
+        if flight is None or flight.task.done():
+            self.executed += 1
+            # Task própria: o cancelamento de um chamador não derruba a consulta dos demais
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn(*args, **kwargs)))
+            flight.task.add_done_callback(lambda task, key=key, flight=flight: self._forget(key, flight))
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+        try:
+            result = await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+        # Os demais chamadores já copiaram ao retomar: o último fica com o original
+        return result if flight.waiters == 0 else copy.deepcopy(result)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.task.cancelled():
+            # Marca a exceção como lida mesmo se todos os chamadores desistiram
+            flight.task.exception()
+
+    def stats(self) -> dict:
+        return {'in_flight': len(self._flights), 'executed': self.executed, 'shared': self.shared}
+
+
+class CoalescingProxy:
+    """Envolve um objeto e coalesce as chamadas assíncronas dos métodos em `methods`"""
+
+    def __init__(self, target, methods: Sequence[str], group: SingleFlight):
+        self.target = target
+        self._methods = set(methods)
+        self._group = group
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.target, name)
+        if name not in self._methods:
+            return attr
+
+        group = self._group
+
+        async def coalesced(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                hash(key)
+            except TypeError:
+                # Argumentos não hasheáveis (ex.: listas): chamada direta
+                return await attr(*args, **kwargs)
+            return await group.do(key, attr, *args, **kwargs)
+
+        # Próximas chamadas não passam mais por __getattr__
+        self.__dict__[name] = coalesced
+        return coalesced
@@ -0,0 +1,106 @@
+"""Camada de acesso a dados assíncrona sobre o PostgREST do Supabase.
+
+Todas as rotas de server.py passam por aqui. As consultas usam um único
+httpx.AsyncClient com pool de conexões HTTP/2 keep-alive, de modo que o
+event loop nunca fica bloqueado esperando o banco.
+"""
+import os
+import logging
+from typing import Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
+
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, str(default)).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+class Database:
+    """Cliente PostgREST assíncrono com pool de conexões configurável"""
+
+    def __init__(self, url: str, key: str, pool_size: int = 20, keepalive: int = 20,
+                 keepalive_expiry: float = 30.0, connect_timeout: float = 5.0,
+                 read_timeout: float = 15.0, http2: bool = True):
+        self.url = url.rstrip('/')
+        self.key = key
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.http2 = http2
+        self._http: Optional[httpx.AsyncClient] = None
+        self._postgrest: Optional[AsyncPostgrestClient] = None
+
+    @classmethod
+    def from_env(cls) -> 'Database':
+        pool_size = _env_int('DB_POOL_SIZE', 20)
+        return cls(
+            url=os.environ['SUPABASE_URL'],
+            key=os.environ['SUPABASE_KEY'],
+            pool_size=pool_size,
+            keepalive=_env_int('DB_POOL_KEEPALIVE', pool_size),
+            keepalive_expiry=_env_float('DB_KEEPALIVE_EXPIRY', 30.0),
+            connect_timeout=_env_float('DB_CONNECT_TIMEOUT', 5.0),
+            read_timeout=_env_float('DB_READ_TIMEOUT', 15.0),
+            http2=_env_bool('DB_HTTP2', True),
+        )
+
+    @property
+    def client(self) -> AsyncPostgrestClient:
+        """Cria o pool na primeira utilização (ou em connect())"""
+        if self._postgrest is None:
+            self._http = httpx.AsyncClient(
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            )
+            self._postgrest = AsyncPostgrestClient(
+                f"{self.url}/rest/v1",
+                headers={
+                    'apikey': self.key,
+                    'Authorization': f"Bearer {self.key}",
+                    'Accept': 'application/json',
+                    'Content-Type': 'application/json',
+                },
+                http_client=self._http,
+            )
+        return self._postgrest
+
+    async def connect(self):
+        """Abre o pool de conexões"""
+        _ = self.client
+        logger.info(
+            f"Pool PostgREST pronto (conexões={self.pool_size}, keep-alive={self.keepalive}, http2={self.http2})"
+        )
+
+    async def close(self):
+        """Fecha o pool de conexões"""
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._postgrest = None
+
+    def table(self, name: str):
+        """Mesmo construtor fluente do cliente supabase: await db.table(...).select(...).execute()"""
+        return self.client.table(name)
+
+    def rpc(self, fn: str, params: Optional[dict] = None):
+        """Chamada de função Postgres (POST /rpc/<fn>)"""
+        return self.client.rpc(fn, params or {})
@@ -0,0 +1,52 @@
+"""Difusão de eventos em memória (fan-out) para os feeds ao vivo (SSE)."""
+import asyncio
+from typing import Any, Dict, Optional, Set, Tuple
+
+
+class Subscription:
+    """Fila de eventos de um ouvinte"""
+
+    def __init__(self, max_queue: int):
+        self.queue: "asyncio.Queue[Tuple[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        # Ouvinte lento demais: a fila encheu e eventos foram perdidos. O feed deve
+        # ser encerrado para o cliente reconectar e recuperar a partir do último id
+        self.overflowed = False
+
+
+class Broadcaster:
+    """Um publicador, muitos ouvintes por chave (ex.: list_id).
+
+    publish() nunca bloqueia: cada ouvinte tem uma fila limitada e, se ela
+    encher, o ouvinte é marcado como `overflowed` em vez de atrasar os demais.
+    """
+
+    def __init__(self, max_queue: int = 1000):
+        self.max_queue = max_queue
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, key: str) -> Subscription:
+        subscription = Subscription(self.max_queue)
+        self._subscribers.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, key: str, subscription: Subscription):
+        subscribers = self._subscribers.get(key)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[key]
+
+    def publish(self, key: str, event: str, data: Any):
+        for subscription in self._subscribers.get(key, ()):
+            if subscription.overflowed:
+                continue
+            try:
+                subscription.queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    def subscriber_count(self, key: Optional[str] = None) -> int:
+        if key is not None:
+            return len(self._subscribers.get(key, ()))
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
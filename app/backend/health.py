@@ -0,0 +1,52 @@
+"""Verificação de prontidão (readiness) com resultado em cache.
+
+Orquestradores consultam a sonda a cada poucos segundos em cada réplica. O
+resultado da ida ao banco vale por `ttl` segundos e sondas simultâneas
+esperam a mesma verificação em vez de disparar uma consulta cada.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Optional
+
+
+class ReadinessProbe:
+    """Executa `check()` no máximo uma vez a cada `ttl` segundos (com `timeout`)"""
+
+    def __init__(self, check: Callable[[], Awaitable[None]], ttl: float = 5.0, timeout: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.check = check
+        self.ttl = ttl
+        self.timeout = timeout
+        self.clock = clock
+        self.checks = 0
+        self._lock = asyncio.Lock()
+        self._expires_at = 0.0
+        self._result: Optional[dict] = None
+
+    async def status(self) -> dict:
+        """{'ready': bool, 'error': str | None, 'checked_at': ISO 8601, 'cached': bool}"""
+        if self._result is not None and self._expires_at > self.clock():
+            return {**self._result, 'cached': True}
+
+        async with self._lock:
+            # Outra sonda pode ter renovado o resultado enquanto esta esperava
+            if self._result is not None and self._expires_at > self.clock():
+                return {**self._result, 'cached': True}
+
+            self.checks += 1
+            try:
+                await asyncio.wait_for(self.check(), self.timeout)
+                error = None
+            except asyncio.TimeoutError:
+                error = f"Banco não respondeu em {self.timeout}s"
+            except Exception as e:
+                error = str(e)
+
+            self._result = {
+                'ready': error is None,
+                'error': error,
+                'checked_at': datetime.now(timezone.utc).isoformat(),
+            }
+            self._expires_at = self.clock() + self.ttl
+            return {**self._result, 'cached': False}
@@ -0,0 +1,97 @@
+"""Manutenção periódica do histórico de presença (partições mensais e arquivo).
+
+A cada `interval` segundos:
+
+- cria as partições mensais de attendance_records que faltam até
+  `months_ahead` meses à frente (sem elas os registros caem na partição
+  padrão, que toda consulta precisa ler)
+- com `archive_after_months` > 0, move para o arquivo os meses inteiros
+  anteriores a esse número de meses atrás cujas listas já foram finalizadas
+
+As duas operações são funções do banco protegidas por um advisory lock: com
+várias réplicas, só uma faz o trabalho e as demais saem sem esperar.
+"""
+import asyncio
+import logging
+import time
+from datetime import date
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def months_before(day: date, months: int) -> date:
+    """Primeiro dia do mês `months` meses antes do mês de `day`"""
+    index = day.year * 12 + day.month - 1 - months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class HistoryMaintenance:
+    """Chama ensure_attendance_partitions e archive_attendance_history em um laço"""
+
+    def __init__(self, repository, months_ahead: int = 3, archive_after_months: int = 0,
+                 interval: float = 21600.0):
+        self.repository = repository
+        self.months_ahead = months_ahead
+        self.archive_after_months = archive_after_months
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.partitions_created = 0
+        self.last_archive: Optional[dict] = None
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def run_once(self):
+        created = await self.repository.ensure_attendance_partitions(self.months_ahead)
+        self.partitions_created += created or 0
+        if created:
+            logger.info(f"Partições de attendance_records criadas: {created}")
+
+        if self.archive_after_months > 0:
+            before = months_before(date.today(), self.archive_after_months)
+            result = await self.repository.archive_attendance_history(before.isoformat())
+            self.last_archive = {'before': before.isoformat(), **result}
+            if result.get('months'):
+                logger.info(
+                    f"Histórico arquivado antes de {before}: meses {', '.join(result['months'])} "
+                    f"({result['lists']} listas, {result['records']} registros)"
+                )
+
+        self.runs += 1
+        self.last_run_at = time.monotonic()
+        self.last_error = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Erro na manutenção do histórico: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            'runs': self.runs,
+            'partitions_created': self.partitions_created,
+            'months_ahead': self.months_ahead,
+            'archive_after_months': self.archive_after_months,
+            'last_archive': self.last_archive,
+            'last_error': self.last_error,
+            'age_seconds': round(time.monotonic() - self.last_run_at, 1) if self.last_run_at else None,
+        }
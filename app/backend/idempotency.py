@@ -0,0 +1,158 @@
+"""Chaves de idempotência (cabeçalho Idempotency-Key) para as escritas da API.
+
+O quiosque repete o POST quando o link cai antes da resposta chegar. Com o
+cabeçalho, a primeira resposta é guardada e cada repetição recebe a mesma
+resposta (com Idempotent-Replayed: true) sem executar a rota nem ir ao banco.
+
+- a chave vale por rota e é ligada ao corpo da requisição: a mesma chave com
+  outro corpo responde 422
+- repetições que chegam enquanto a primeira ainda executa esperam por ela
+- respostas 5xx e 429 (carga recusada) não são guardadas: a repetição
+  executa de novo
+"""
+import asyncio
+import hashlib
+import json
+from typing import Dict, Optional, Sequence, Tuple
+
+from cache import TTLCache
+
+
+# (método, rota, chave) -> StoredResponse
+StoreKey = Tuple[str, str, str]
+
+MAX_KEY_LENGTH = 255
+
+
+class StoredResponse:
+    __slots__ = ('fingerprint', 'status', 'headers', 'body')
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+class IdempotencyStore:
+    """Respostas por chave em um TTLCache limitado e as execuções em andamento"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 86400.0):
+        self._cache = TTLCache(maxsize, ttl)
+        self._in_flight: Dict[StoreKey, asyncio.Future] = {}
+        self.replays = 0
+
+    def get(self, key: StoreKey) -> Optional[StoredResponse]:
+        return self._cache.get(key)
+
+    def in_flight(self, key: StoreKey) -> Optional[asyncio.Future]:
+        return self._in_flight.get(key)
+
+    def begin(self, key: StoreKey) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        return future
+
+    def finish(self, key: StoreKey, response: Optional[StoredResponse]):
+        if response is not None:
+            self._cache.set(key, response)
+        future = self._in_flight.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), 'in_flight': len(self._in_flight), 'replays': self.replays}
+
+
+def _json_response(status: int, detail: str):
+    body = json.dumps({'detail': detail}).encode()
+    headers = [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())]
+    return status, headers, body
+
+
+class IdempotencyMiddleware:
+    """Middleware ASGI aplicado aos POSTs de `paths` que trazem Idempotency-Key"""
+
+    def __init__(self, app, store: IdempotencyStore, paths: Sequence[str], header: str = 'idempotency-key'):
+        self.app = app
+        self.store = store
+        self.paths = set(paths)
+        self.header = header.lower().encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        raw_key = dict(scope['headers']).get(self.header)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = raw_key.decode('latin-1').strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._send(send, *_json_response(400, f"Idempotency-Key inválida (1 a {MAX_KEY_LENGTH} caracteres)"))
+            return
+
+        # Corpo inteiro: entra na impressão digital e é repassado à rota
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        body = b''.join(chunks)
+        fingerprint = hashlib.sha256(body).hexdigest()
+        store_key = (scope['method'], scope['path'], key)
+
+        stored = self.store.get(store_key)
+        while stored is None:
+            pending = self.store.in_flight(store_key)
+            if pending is None:
+                break
+            # Mesma chave ainda em execução: espera e devolve o mesmo resultado
+            # (se a resposta dela não for guardada, uma das repetições executa de novo)
+            stored = await asyncio.shield(pending)
+        if stored is not None:
+            if stored.fingerprint != fingerprint:
+                await self._send(send, *_json_response(
+                    422, "Idempotency-Key já usada com outro corpo de requisição"
+                ))
+                return
+            self.store.replays += 1
+            await self._send(send, stored.status, stored.headers + [(b'idempotent-replayed', b'true')], stored.body)
+            return
+
+        self.store.begin(store_key)
+        response = {'status': 500, 'headers': [], 'body': []}
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {'type': 'http.request', 'body': body, 'more_body': False}
+            return await receive()
+
+        async def capture_send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = list(message.get('headers') or [])
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+            await send(message)
+
+        stored = None
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if response['status'] < 500 and response['status'] != 429:
+                stored = StoredResponse(fingerprint, response['status'], response['headers'], b''.join(response['body']))
+        finally:
+            self.store.finish(store_key, stored)
+
+    @staticmethod
+    async def _send(send, status: int, headers: list, body: bytes):
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
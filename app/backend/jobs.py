@@ -0,0 +1,128 @@
+"""Fila de tarefas em segundo plano dentro do processo (asyncio)."""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class Job:
+    id: str
+    name: str
+    fn: Callable[..., Awaitable[Any]] = field(repr=False)
+    args: tuple = field(default=(), repr=False)
+    key: Optional[str] = None
+    max_attempts: int = 3
+    status: str = 'queued'  # queued | running | retrying | done | failed
+    attempts: int = 0
+    error: Optional[str] = None
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id,
+            'name': self.name,
+            'key': self.key,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """Fila com `workers` consumidores, nova tentativa com espera exponencial
+    e histórico limitado dos últimos `max_history` jobs. Jobs enviados antes de
+    start() esperam na fila até os consumidores subirem"""
+
+    def __init__(self, workers: int = 1, max_history: int = 1000, retry_delay: float = 2.0):
+        self.workers = workers
+        self.max_history = max_history
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._by_key = {}
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, name: str, fn: Callable[..., Awaitable[Any]], *args,
+               key: Optional[str] = None, max_attempts: int = 3) -> Job:
+        """Enfileira fn(*args); `key` permite consultar depois o último job de um recurso"""
+        job = Job(id=str(uuid.uuid4()), name=name, key=key, fn=fn, args=args, max_attempts=max_attempts)
+        self._jobs[job.id] = job
+        if key is not None:
+            self._by_key[key] = job.id
+        while len(self._jobs) > self.max_history:
+            _, purged = self._jobs.popitem(last=False)
+            if purged.key is not None and self._by_key.get(purged.key) == purged.id:
+                del self._by_key[purged.key]
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def get_by_key(self, key: str) -> Optional[Job]:
+        job_id = self._by_key.get(key)
+        return self._jobs.get(job_id) if job_id else None
+
+    def stats(self) -> dict:
+        counts = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {'queued': self._queue.qsize(), 'jobs': counts}
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.started_at = _now()
+        while True:
+            job.attempts += 1
+            job.status = 'running'
+            try:
+                await job.fn(*job.args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.error = str(e)
+                if job.attempts >= job.max_attempts:
+                    job.status = 'failed'
+                    job.finished_at = _now()
+                    logger.error(f"Job {job.name} ({job.id}) falhou após {job.attempts} tentativas: {job.error}")
+                    return
+                job.status = 'retrying'
+                await asyncio.sleep(self.retry_delay * 2 ** (job.attempts - 1))
+            else:
+                job.status = 'done'
+                job.error = None
+                job.finished_at = _now()
+                return
@@ -0,0 +1,203 @@
+"""Métricas no formato texto do Prometheus, sem dependências externas.
+
+- Counter / Histogram com rótulos, registrados em um Registry
+- coletores por callback para valores que já existem em outros objetos
+  (estatísticas dos caches, fila de jobs, pool de PDFs)
+- MetricsMiddleware (ASGI): latência por rota e idas ao banco por requisição
+- TimedProxy: mede cada chamada assíncrona do repositório
+"""
+import asyncio
+import contextvars
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# Limites em segundos (padrão do cliente oficial do Prometheus)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+# Contador de idas ao banco da requisição em andamento (None fora de requisições)
+_db_calls: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar('db_calls', default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # rótulos -> [contagem por faixa (não cumulativa), soma, total]
+        self._values: Dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# Amostra de um coletor: (sufixo do nome, rótulos, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Registry:
+    def __init__(self, prefix: str = ''):
+        self.prefix = prefix
+        self._metrics = []
+        self._collectors: List[Tuple[str, str, str, Callable[[], Iterable[Sample]]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(self.prefix + name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(self.prefix + name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, name: str, documentation: str, kind: str, fn: Callable[[], Iterable[Sample]]):
+        """Métrica lida de fn() no momento da coleta (kind: gauge ou counter)"""
+        self._collectors.append((self.prefix + name, documentation, kind, fn))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for name, documentation, kind, fn in self._collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for suffix, labels, value in fn():
+                lines.append(f"{name}{suffix}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def count_db_call():
+    calls = _db_calls.get()
+    if calls is not None:
+        calls[0] += 1
+
+
+class TimedProxy:
+    """Envolve um objeto e mede cada método assíncrono público em `histogram`
+    (rótulo operation), contando a chamada como uma ida ao banco da requisição"""
+
+    def __init__(self, target, histogram: Histogram, exclude: Sequence[str] = ()):
+        self.target = target
+        self._histogram = histogram
+        self._exclude = set(exclude)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.target, name)
+        if name.startswith('_') or name in self._exclude or not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        histogram = self._histogram
+
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await attr(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, operation=name)
+                count_db_call()
+
+        # Próximas chamadas não passam mais por __getattr__
+        self.__dict__[name] = timed
+        return timed
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: duração por método/rota/status e idas ao banco por requisição.
+
+    A rota é o template (ex.: /api/attendance-lists/{list_id}) para manter a
+    cardinalidade baixa. Respostas text/event-stream não entram no histograma
+    de latência: a duração delas é o tempo de conexão do ouvinte.
+    """
+
+    def __init__(self, app, request_seconds: Histogram, db_calls_per_request: Histogram):
+        self.app = app
+        self.request_seconds = request_seconds
+        self.db_calls_per_request = db_calls_per_request
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        calls = [0]
+        token = _db_calls.set(calls)
+        response = {'status': 500, 'streaming': False}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                content_type = dict(message.get('headers') or []).get(b'content-type', b'')
+                response['streaming'] = content_type.startswith(b'text/event-stream')
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _db_calls.reset(token)
+            route = scope.get('route')
+            path = getattr(route, 'path', 'unmatched')
+            if not response['streaming']:
+                self.request_seconds.observe(
+                    time.perf_counter() - start,
+                    method=scope['method'], route=path, status=str(response['status']),
+                )
+            self.db_calls_per_request.observe(calls[0], route=path)
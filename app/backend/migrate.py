@@ -0,0 +1,144 @@
+"""Aplica as migrações versionadas de migrations/ a um banco Postgres existente.
+
+Cada arquivo NNNN_nome.sql é uma migração; a versão é o prefixo numérico e a
+ordem de aplicação é a dos nomes. As aplicadas ficam em schema_migrations
+(versão, nome, checksum do arquivo, data). Um banco criado pelo database.sql
+atual já nasce com todas as migrações existentes marcadas como aplicadas.
+
+Cada migração roda em uma transação própria: se falhar, nada dela fica no
+banco e as seguintes não são aplicadas. As migrações de índice usam
+IF [NOT] EXISTS, então reaplicar em um banco que já tem o índice não faz nada.
+Um arquivo alterado depois de aplicado é só avisado (migrações aplicadas não
+são reexecutadas: a mudança vai em uma migração nova).
+
+Criar índice bloqueia escritas na tabela enquanto ele é montado, e recriar
+attendance_records particionada (0008) copia todos os registros: em bancos
+grandes, aplicar fora do horário das reuniões.
+
+Uso:
+    DATABASE_URL=... python migrate.py            # aplica as pendentes
+    DATABASE_URL=... python migrate.py --status   # lista aplicadas e pendentes
+    DATABASE_URL=... python migrate.py --dry-run  # mostra o que seria aplicado
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List, NamedTuple
+
+import asyncpg
+from dotenv import load_dotenv
+
+
+ROOT_DIR = Path(__file__).parent
+MIGRATIONS_DIR = ROOT_DIR.parent.parent / 'migrations'
+
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+_CREATE_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    checksum TEXT,
+    applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+)
+"""
+
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    path: Path
+    checksum: str
+
+
+def load_migrations(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in sorted(directory.glob('*.sql')):
+        match = _FILENAME.match(path.name)
+        if not match:
+            raise ValueError(f"Nome de migração inválido: {path.name} (esperado NNNN_nome.sql)")
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations.append(Migration(match.group(1), match.group(2), path, checksum))
+    versions = [m.version for m in migrations]
+    duplicated = sorted({v for v in versions if versions.count(v) > 1})
+    if duplicated:
+        raise ValueError(f"Versões repetidas em migrations/: {', '.join(duplicated)}")
+    return migrations
+
+
+async def applied_migrations(conn: asyncpg.Connection) -> dict:
+    await conn.execute(_CREATE_TABLE)
+    rows = await conn.fetch("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row['version']: row for row in rows}
+
+
+async def migrate(dsn: str, status_only: bool = False, dry_run: bool = False) -> int:
+    migrations = load_migrations()
+    conn = await asyncpg.connect(dsn)
+    try:
+        applied = await applied_migrations(conn)
+
+        for migration in migrations:
+            row = applied.get(migration.version)
+            if row is not None and row['checksum'] and row['checksum'] != migration.checksum:
+                print(f"AVISO: {migration.path.name} foi alterado depois de aplicado "
+                      f"(mudanças devem ir em uma migração nova)")
+
+        pending = [m for m in migrations if m.version not in applied]
+
+        if status_only:
+            for migration in migrations:
+                row = applied.get(migration.version)
+                state = f"aplicada em {row['applied_at']:%Y-%m-%d %H:%M}" if row else "pendente"
+                print(f"{migration.version}  {migration.name:<40} {state}")
+            unknown = sorted(set(applied) - {m.version for m in migrations})
+            for version in unknown:
+                print(f"{version}  {applied[version]['name']:<40} aplicada, arquivo ausente")
+            return 0
+
+        if not pending:
+            print("Banco em dia: nenhuma migração pendente")
+            return 0
+
+        for migration in pending:
+            if dry_run:
+                print(f"-- {migration.path.name}\n{migration.path.read_text()}")
+                continue
+            print(f"Aplicando {migration.path.name}...", end=' ', flush=True)
+            async with conn.transaction():
+                await conn.execute(migration.path.read_text())
+                await conn.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES ($1, $2, $3)",
+                    migration.version, migration.name, migration.checksum,
+                )
+            print("ok")
+        if dry_run:
+            print(f"{len(pending)} migração(ões) pendente(s); nada foi aplicado (--dry-run)")
+        return 0
+    finally:
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--status', action='store_true', help="listar migrações aplicadas e pendentes")
+    parser.add_argument('--dry-run', action='store_true', help="mostrar o SQL pendente sem aplicar")
+    args = parser.parse_args()
+
+    load_dotenv(ROOT_DIR / '.env')
+    dsn = os.environ.get('DATABASE_URL')
+    if not dsn:
+        sys.exit("Defina DATABASE_URL (conexão direta ao Postgres)")
+
+    try:
+        sys.exit(asyncio.run(migrate(dsn, status_only=args.status, dry_run=args.dry_run)))
+    except (asyncpg.PostgresError, ValueError) as e:
+        sys.exit(f"Erro na migração: {e}")
+
+
+if __name__ == '__main__':
+    main()
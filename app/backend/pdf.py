@@ -0,0 +1,173 @@
+"""Geração do PDF da lista de presença (formulário de treinamento).
+
+A renderização é CPU-bound e roda fora do event loop, em um pool de
+processos (RenderPool). O layout com ReportLab fica em pdf_layout e só é
+importado na primeira renderização (nos workers), o que mantém rápida a
+subida da API.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Deque, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# Versão do layout do PDF: incrementar invalida os PDFs já guardados em cache
+TEMPLATE_VERSION = 2
+
+# Participantes por página: cada página repete o cabeçalho e o rodapé do formulário.
+# Muda o documento gerado, por isso também entra no hash de conteúdo (pdf_content_hash)
+ROWS_PER_PAGE = int(os.environ.get('PDF_ROWS_PER_PAGE', 14))
+
+
+def build_attendance_pdf(attendance_list: dict, records: list) -> bytes:
+    """Monta o PDF da lista de presença no formato do modelo"""
+    import pdf_layout
+    return pdf_layout.build_attendance_pdf(attendance_list, records)
+
+
+def build_combined_pdf(path: str, rosters: list):
+    """Grava em `path` um único PDF com várias listas [(attendance_list, records), ...]"""
+    import pdf_layout
+    pdf_layout.build_combined_pdf(path, rosters)
+
+
+# ===========================
+# POOL DE RENDERIZAÇÃO
+# ===========================
+
+class RenderPoolSaturated(Exception):
+    """Todos os workers ocupados e a fila de espera cheia"""
+
+
+def _init_worker():
+    # Carrega o ReportLab e monta os estilos ao subir o processo, antes do primeiro documento
+    import pdf_layout
+    pdf_layout.get_styles()
+
+
+def _timed_call(fn, *args):
+    """Roda no worker: devolve (resultado, segundos de renderização sem a espera na fila)"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class RenderPool:
+    """Pool de processos para renderizar PDFs fora do event loop.
+
+    No máximo `workers` documentos são renderizados ao mesmo tempo e até
+    `max_queue` aguardam na fila; além disso render() levanta
+    RenderPoolSaturated para que a rota responda 429.
+
+    `on_render(nome_da_função, segundos)` é chamado após cada renderização
+    com o tempo gasto no worker (usado pelas métricas).
+
+    Se um worker morre (falta de memória, crash do ReportLab), o executor
+    fica inutilizável: as renderizações em andamento falham e a próxima
+    chamada cria um pool novo.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 8,
+                 on_render: Optional[Callable[[str, float], None]] = None):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.on_render = on_render
+        self.pending = 0
+        self.rejected = 0
+        self.restarts = 0
+        self._executor = None
+        # Exportações esperando vaga (run_when_available), em ordem de chegada
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: o processo pai tem threads (event loop, pool HTTP); fork não é seguro
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        return self._executor
+
+    def _saturated(self) -> bool:
+        return self.pending >= self.workers + self.max_queue
+
+    async def run_when_available(self, fn, *args):
+        """Como run(), mas espera uma vaga em vez de falhar (usado por exportações em lote)"""
+        while self._saturated() or self._waiters:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                if not waiter.done():
+                    waiter.cancel()
+                    self._waiters.remove(waiter)
+                else:
+                    # A vaga já era desta chamada: passá-la adiante
+                    self._wake_next()
+                raise
+            if not self._saturated():
+                break
+        return await self.run(fn, *args)
+
+    def _wake_next(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    async def run(self, fn, *args):
+        """Executa fn(*args) em um worker respeitando o limite da fila"""
+        if self._saturated():
+            self.rejected += 1
+            raise RenderPoolSaturated()
+        self.pending += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            result, seconds = await loop.run_in_executor(executor, _timed_call, fn, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+        finally:
+            self.pending -= 1
+            self._wake_next()
+        if self.on_render is not None:
+            self.on_render(fn.__name__, seconds)
+        return result
+
+    def _discard(self, executor: ProcessPoolExecutor):
+        """Descarta um executor com worker morto (uma vez, mesmo com várias falhas simultâneas)"""
+        if self._executor is executor:
+            logger.error("Worker de renderização terminou inesperadamente; recriando o pool de PDFs")
+            self._executor = None
+            self.restarts += 1
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def render(self, attendance_list: dict, records: list) -> bytes:
+        return await self.run(build_attendance_pdf, attendance_list, records)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> dict:
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'pending': self.pending,
+            'rejected': self.rejected,
+            'waiting': len(self._waiters),
+            'restarts': self.restarts,
+        }
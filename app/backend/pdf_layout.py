@@ -0,0 +1,274 @@
+"""Layout ReportLab do PDF da lista de presença (formulário de treinamento).
+
+Importado só dentro dos workers do RenderPool (ou na primeira renderização):
+o processo da API não carrega o ReportLab ao subir. Estilos de parágrafo e de
+tabela são montados uma única vez por processo e reaproveitados em todos os
+documentos.
+"""
+import io
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from types import SimpleNamespace
+from typing import Iterable
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+from pdf import ROWS_PER_PAGE
+
+PARTICIPANTS_HEADER = [
+    'Nº', 'NOME COMPLETO\nFULL NAME', 'MODEC E-MAIL\nE-MAIL MODEC',
+    'FUNÇÃO\nROLE', '*LOCATION\nLOCALIZAÇÃO', 'EMPRESA\nCOMPANY', 'ASSINATURA\nSIGNATURE'
+]
+
+
+@lru_cache(maxsize=1)
+def get_styles() -> SimpleNamespace:
+    """Estilos do documento, criados uma vez por processo"""
+    sample = getSampleStyleSheet()
+    return SimpleNamespace(
+        title=ParagraphStyle(
+            'CustomTitle',
+            parent=sample['Heading1'],
+            fontSize=12,
+            textColor=colors.black,
+            alignment=TA_CENTER,
+            spaceAfter=20
+        ),
+        content=ParagraphStyle('ContentStyle', parent=sample['Normal'], fontSize=7),
+        note=ParagraphStyle('NoteStyle', parent=sample['Normal'], fontSize=6, textColor=colors.grey),
+        info_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 7),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]),
+        course_table=TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]),
+        content_table=TableStyle([
+            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (0, 0), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ]),
+        instructor_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('SPAN', (1, 1), (5, 1)),
+        ]),
+        participants_table=TableStyle([
+            # Header style
+            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 7),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
+            # Data style
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 7),
+            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # Nº centralizado
+            ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            # Grid
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)]),
+        ]),
+        footer_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 6),
+            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.grey),
+        ]),
+    )
+
+
+def _new_document(target) -> SimpleDocTemplate:
+    return SimpleDocTemplate(target, pagesize=A4,
+                             rightMargin=0.5*inch, leftMargin=0.5*inch,
+                             topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+
+def build_attendance_pdf(attendance_list: dict, records: list) -> bytes:
+    """Monta o PDF da lista de presença no formato do modelo"""
+    buffer = io.BytesIO()
+    _new_document(buffer).build(roster_elements(attendance_list, records))
+    return buffer.getvalue()
+
+
+def build_combined_pdf(path: str, rosters: list):
+    """Grava em `path` um único PDF com várias listas [(attendance_list, records), ...],
+    cada uma começando em uma nova página"""
+    elements = []
+    for attendance_list, records in rosters:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(roster_elements(attendance_list, records))
+    _new_document(path).build(elements)
+
+
+def roster_elements(attendance_list: dict, records: Iterable[dict]) -> list:
+    """Flowables de uma lista de presença.
+
+    Os registros são consumidos do iterador em blocos de ROWS_PER_PAGE; cada
+    página repete o cabeçalho do formulário, o cabeçalho da tabela, a nota e o
+    rodapé. A última página é completada com linhas em branco.
+    """
+    styles = get_styles()
+    records = iter(records)
+    elements = []
+    rows_written = 0
+
+    while True:
+        page_records = list(islice(records, ROWS_PER_PAGE))
+        if rows_written and not page_records:
+            break
+        if rows_written:
+            elements.append(PageBreak())
+
+        elements.extend(_form_header(attendance_list, styles))
+        elements.append(_participants_table(attendance_list, page_records, rows_written, styles))
+        elements.extend(_form_footer(styles))
+
+        rows_written += ROWS_PER_PAGE
+        if len(page_records) < ROWS_PER_PAGE:
+            break
+
+    return elements
+
+
+def _form_header(attendance_list: dict, styles: SimpleNamespace) -> list:
+    """Título, dados da instalação, curso e instrutor (topo de cada página)"""
+    elements = []
+
+    # Título
+    title = Paragraph(
+        "FORMULÁRIO DE TREINAMENTO / LISTA DE PRESENÇA<br/>"
+        "TRAINING ROSTER FORM / ATTENDANCE LIST",
+        styles.title
+    )
+    elements.append(title)
+    elements.append(Spacer(1, 0.2*inch))
+
+    # Informações da instalação, data, duração e hora
+    info_data = [
+        ['INSTALAÇÃO / FACILITY:', attendance_list['installation_name'], '', '',
+         'DATA / DATE:', attendance_list['meeting_date'],
+         'DURAÇÃO / DURATION:', attendance_list.get('duration', ''),
+         'HORA / TIME:', attendance_list['meeting_time']]
+    ]
+
+    info_table = Table(info_data, colWidths=[1.1*inch, 1.9*inch, 0.2*inch, 0.2*inch,
+                                               0.7*inch, 0.8*inch, 1.1*inch, 0.6*inch,
+                                               0.7*inch, 0.6*inch])
+    info_table.setStyle(styles.info_table)
+    elements.append(info_table)
+    elements.append(Spacer(1, 0.15*inch))
+
+    # Título do curso
+    course_data = [
+        ['TÍTULO DO CURSO / COURSE TITLE:', attendance_list['course_title']]
+    ]
+    course_table = Table(course_data, colWidths=[2*inch, 5.5*inch])
+    course_table.setStyle(styles.course_table)
+    elements.append(course_table)
+    elements.append(Spacer(1, 0.1*inch))
+
+    # Conteúdo do curso
+    content_para = Paragraph(attendance_list['course_content'], styles.content)
+
+    content_data = [
+        ['CONTEÚDO / CONTENT:', content_para]
+    ]
+    content_table = Table(content_data, colWidths=[2*inch, 5.5*inch])
+    content_table.setStyle(styles.content_table)
+    elements.append(content_table)
+    elements.append(Spacer(1, 0.15*inch))
+
+    # Dados do instrutor
+    instructor_data = [
+        ['NOME DO INSTRUTOR / INSTRUCTOR NAME:', attendance_list['instructor_name'],
+         'FUNÇÃO / ROLE:', attendance_list['instructor_role'],
+         'ASSINATURA / SIGNATURE:', ''],
+        ['QUALIFICAÇÃO / QUALIFICATION:', attendance_list['instructor_qualification'], '', '', '', '']
+    ]
+
+    instructor_table = Table(instructor_data, colWidths=[1.8*inch, 1.8*inch, 0.8*inch, 1*inch, 1.2*inch, 0.9*inch])
+    instructor_table.setStyle(styles.instructor_table)
+    elements.append(instructor_table)
+    elements.append(Spacer(1, 0.2*inch))
+
+    return elements
+
+
+def _participants_table(attendance_list: dict, page_records: list, first_row: int,
+                        styles: SimpleNamespace) -> Table:
+    """Tabela de participantes de uma página, com linhas em branco até ROWS_PER_PAGE"""
+    # Cabeçalho da tabela de participantes (seguindo modelo Excel)
+    attendance_data = [PARTICIPANTS_HEADER]
+
+    for record in page_records:
+        prof = record.get('professionals') or {}
+        entry_time_str = datetime.fromisoformat(record['entry_time'].replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M')
+
+        # Formato: "assinado digitalmente\n22/11/2025 14:30"
+        signature_text = f"assinado digitalmente\n{entry_time_str}"
+
+        attendance_data.append([
+            str(record['row_number']),
+            prof.get('name', ''),
+            prof.get('email', 'N/A'),
+            prof.get('profession', ''),
+            record['local'],
+            prof.get('company', ''),
+            signature_text  # ASSINATURA: "assinado digitalmente" + data/hora
+        ])
+
+    # Adicionar linhas vazias até completar a página
+    for i in range(first_row + len(page_records) + 1, first_row + ROWS_PER_PAGE + 1):
+        attendance_data.append([str(i), '', 'N/A', '', attendance_list['location'], '', ''])
+
+    # Criar tabela de participantes (com 7 colunas incluindo ASSINATURA); repeatRows
+    # mantém o cabeçalho caso um conteúdo muito longo force a quebra da tabela
+    participants_table = Table(attendance_data, repeatRows=1,
+                              colWidths=[0.3*inch, 1.7*inch, 1.2*inch, 1.1*inch, 1.1*inch, 0.9*inch, 1.1*inch])
+    participants_table.setStyle(styles.participants_table)
+    return participants_table
+
+
+def _form_footer(styles: SimpleNamespace) -> list:
+    """Nota e rodapé do formulário (base de cada página)"""
+    elements = [Spacer(1, 0.2*inch)]
+
+    # Nota
+    note = Paragraph(
+        "Note: When the training is carried out on board, it will not be necessary to fill in the location and email for employees that are fixed of the unit.<br/>"
+        "Nota: Quando o treinamento for realizado a bordo não será preciso preencher a localização e e-mail para os empregados que são fixo da unidade.",
+        styles.note
+    )
+    elements.append(note)
+    elements.append(Spacer(1, 0.15*inch))
+
+    # Rodapé com código do documento e revisão
+    footer_data = [
+        ['Guia de Treinamento e Desenvolvimento / Training and Development Guide\n3500-MSB60-HRSTD-0006-04',
+         'Rev.4, 16 Fev/Feb 2024']
+    ]
+    footer_table = Table(footer_data, colWidths=[5.5*inch, 2*inch])
+    footer_table.setStyle(styles.footer_table)
+    elements.append(footer_table)
+
+    return elements
@@ -0,0 +1,461 @@
+"""Verificação dos planos de execução das consultas da API em um Postgres grande.
+
+Recria o schema do database.sql em um banco descartável, popula com volume de
+produção (por padrão 50 mil profissionais, 5 mil listas e 40 presenças por
+lista), roda ANALYZE e então:
+
+- chama cada método de leitura do PostgresRepository usado pelo server.py
+  com o pool envolvido por um gravador, que guarda o SQL e os parâmetros
+  exatamente como a rota os envia
+- roda EXPLAIN (FORMAT JSON) em cada consulta gravada e nas consultas de dentro
+  das funções de check-in (register_attendance / register_attendance_batch),
+  que o EXPLAIN da chamada da função não mostra
+- confere que cada consulta usa o índice esperado e que nenhuma faz Seq Scan em
+  tabela grande
+- nas consultas ao histórico particionado, roda EXPLAIN ANALYZE e confere
+  quantas partições mensais de attendance_records (e do arquivo) foram de fato
+  lidas: a poda de partições tem de deixar de fora os meses fora do intervalo
+
+Um ano das listas populadas (as mais antigas) vai para o arquivo
+(archive_attendance_history), então as consultas por período passam pelas duas
+camadas. Índices e tabelas das partições aparecem com o nome do índice ou da
+tabela-mãe.
+
+Sai com código 1 se algum plano regredir (índice removido ou trocado, consulta
+reescrita de um jeito que o índice não atende).
+
+O banco de PLANCHECK_DATABASE_URL é APAGADO e recriado: nunca apontar para o
+banco da aplicação.
+
+Uso:
+    PLANCHECK_DATABASE_URL=postgresql://.../plancheck python plancheck.py
+    python plancheck.py --professionals 100000 --lists 10000 --verbose
+
+As mesmas verificações rodam no pytest (tests/test_plancheck.py, um teste por
+consulta), puladas quando PLANCHECK_DATABASE_URL não está definida.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+from datetime import timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import asyncpg
+
+
+ROOT_DIR = Path(__file__).parent
+SCHEMA_PATH = ROOT_DIR.parent.parent / 'database.sql'
+
+# Tabelas que crescem com o uso: Seq Scan nelas é regressão
+LARGE_TABLES = {
+    'professionals', 'attendance_lists', 'attendance_records', 'professional_stats',
+    'attendance_lists_archive', 'attendance_records_archive',
+}
+
+# Tabelas particionadas por mês cujas partições lidas são contadas
+PARTITIONED_TABLES = {'attendance_records', 'attendance_records_archive'}
+
+# Volume padrão: (profissionais, listas, presenças por lista)
+DEFAULT_SEED = (50_000, 5_000, 40)
+
+
+class Check(NamedTuple):
+    name: str
+    # Cada conjunto é uma alternativa: ao menos um dos índices dele tem de aparecer
+    expected: Sequence[Set[str]]
+    # Máximo de partições mensais lidas (None: não conferir); conferido com EXPLAIN ANALYZE
+    max_partitions: Optional[int] = None
+
+
+class Relations(NamedTuple):
+    """Partições (tabelas e índices) -> nome da tabela ou índice mãe"""
+    parents: Dict[str, str]
+    # Partições vazias (a padrão e as dos meses à frente): o Seq Scan nelas não lê
+    # nada e não conta como partição lida
+    empty: Set[str]
+
+    def root(self, name: str) -> str:
+        return self.parents.get(name, name)
+
+
+async def load_relations(conn: asyncpg.Connection) -> Relations:
+    rows = await conn.fetch("""
+        SELECT c.relname AS child, p.relname AS parent
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_class p ON p.oid = i.inhparent
+    """)
+    empty = await conn.fetch("SELECT relname FROM pg_class WHERE relispartition AND relkind = 'r' AND reltuples <= 0")
+    return Relations({row['child']: row['parent'] for row in rows}, {row[0] for row in empty})
+
+
+class RecordingPool:
+    """Repassa as chamadas ao pool asyncpg e guarda (sql, parâmetros) de cada uma"""
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+        self.statements: List[Tuple[str, tuple]] = []
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._pool, name)
+        if name not in ('fetch', 'fetchrow', 'fetchval', 'execute'):
+            return attr
+
+        async def recorded(sql, *args, **kwargs):
+            self.statements.append((sql, args))
+            return await attr(sql, *args, **kwargs)
+
+        return recorded
+
+
+def plan_nodes(plan: dict) -> Iterable[dict]:
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+async def explain(conn: asyncpg.Connection, sql: str, args: Sequence = (), analyze: bool = False) -> dict:
+    """Plano da consulta; com `analyze` ela é executada (só para leituras)"""
+    options = 'ANALYZE, FORMAT JSON' if analyze else 'FORMAT JSON'
+    value = await conn.fetchval(f"EXPLAIN ({options}) {sql}", *args)
+    return json.loads(value)[0]['Plan']
+
+
+async def function_query(conn: asyncpg.Connection, name: str, params: Sequence[str]) -> str:
+    """Corpo de uma função LANGUAGE sql com os parâmetros trocados por $1, $2, ..."""
+    body = await conn.fetchval("SELECT prosrc FROM pg_proc WHERE proname = $1", name)
+    for position, param in enumerate(params, 1):
+        body = re.sub(rf'\b{param}\b', f'${position}', body)
+    return body
+
+
+def verify(check: Check, plans: List[dict], relations: Relations) -> List[str]:
+    """Problemas encontrados nos planos das consultas de uma verificação"""
+    indexes, partitions, problems = set(), set(), []
+    for plan in plans:
+        for node in plan_nodes(plan):
+            if 'Index Name' in node:
+                indexes.add(relations.root(node['Index Name']))
+            relation = node.get('Relation Name')
+            if relation is None or relation in relations.empty:
+                continue
+            if node['Node Type'] == 'Seq Scan' and relations.root(relation) in LARGE_TABLES:
+                problems.append(f"Seq Scan em {relation}")
+            # Partição podada na execução: aparece no plano com 0 execuções
+            if relations.root(relation) in PARTITIONED_TABLES and node.get('Actual Loops', 1) > 0:
+                partitions.add(relation)
+    for alternatives in check.expected:
+        if not alternatives & indexes:
+            problems.append(f"esperava {' ou '.join(sorted(alternatives))}; usou {', '.join(sorted(indexes)) or 'nenhum índice'}")
+    if check.max_partitions is not None and len(partitions) > check.max_partitions:
+        problems.append(f"leu {len(partitions)} partições (máximo {check.max_partitions}): {', '.join(sorted(partitions))}")
+    return list(dict.fromkeys(problems))
+
+
+def describe(plan: dict, depth: int = 0) -> List[str]:
+    target = plan.get('Index Name') or plan.get('Relation Name') or ''
+    lines = [f"{'  ' * depth}-> {plan['Node Type']} {target}".rstrip()]
+    for child in plan.get('Plans', ()):
+        lines.extend(describe(child, depth + 1))
+    return lines
+
+
+async def seed(conn: asyncpg.Connection, professionals: int, lists: int, records_per_list: int):
+    print(f"Recriando o schema de {SCHEMA_PATH.name}...")
+    await conn.execute(SCHEMA_PATH.read_text())
+
+    print(f"Populando: {professionals} profissionais, {lists} listas, {records_per_list} presenças por lista...")
+    await conn.execute("""
+        INSERT INTO professionals (code, registration_code, name, email, profession, company)
+        SELECT 'cred-' || i, 'REG-' || LPAD(i::TEXT, 6, '0'), 'Profissional ' || md5(i::TEXT),
+               'p' || i || '@exemplo.com', 'Função ' || (i % 40), 'Empresa ' || (i % 300)
+        FROM generate_series(1, $1) AS i
+    """, professionals)
+    # Listas espalhadas por ~2 anos em 20 instalações; só as últimas seguem abertas
+    await conn.execute("""
+        INSERT INTO attendance_lists (
+            installation_name, meeting_date, meeting_time, duration, course_title, course_content,
+            instructor_name, instructor_role, instructor_qualification, location,
+            start_time, end_time, status, created_at
+        )
+        SELECT 'P-' || (50 + i % 20), CURRENT_DATE - (($1 - i) * 730 / $1), '07:00', '1h',
+               'DDS ' || i, 'Conteúdo', 'Instrutor', 'Técnico', 'NR', 'Sala ' || (i % 5),
+               NOW() - (($1 - i) || ' hours')::INTERVAL,
+               CASE WHEN i > $1 - 20 THEN NULL ELSE NOW() - (($1 - i) || ' hours')::INTERVAL + INTERVAL '1 hour' END,
+               CASE WHEN i > $1 - 20 THEN 'active' ELSE 'completed' END,
+               NOW() - (($1 - i) || ' hours')::INTERVAL
+        FROM generate_series(1, $1) AS i
+    """, lists)
+    # Uma partição por mês antes de inserir (nada na partição padrão)
+    await conn.execute("SELECT ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists))")
+    await conn.execute("""
+        INSERT INTO attendance_records (list_id, professional_id, meeting_date, entry_time, local, row_number)
+        SELECT l.id, p.id, l.meeting_date, l.start_time + (n || ' seconds')::INTERVAL, l.location, n
+        FROM (SELECT id, meeting_date, start_time, location, ROW_NUMBER() OVER (ORDER BY created_at) AS list_index
+              FROM attendance_lists) l
+        CROSS JOIN generate_series(1, $1) AS n
+        JOIN (SELECT id, ROW_NUMBER() OVER (ORDER BY id) AS p_index FROM professionals) p
+          ON p.p_index = 1 + (l.list_index * 37 + n * 101) % $2
+    """, records_per_list, professionals)
+    await conn.execute("SELECT rebuild_attendance_stats()")
+    # O primeiro ano vai para o arquivo
+    archived = json.loads(await conn.fetchval("SELECT archive_attendance_history(CURRENT_DATE - 365)"))
+    print(f"Arquivados: {len(archived['months'])} meses, {archived['lists']} listas, {archived['records']} presenças")
+    await conn.execute("ANALYZE")
+
+
+class PlanSession:
+    """Banco populado aberto para as verificações: conexão para o EXPLAIN, o
+    PostgresRepository com o pool gravado e as amostras usadas nas consultas"""
+
+    def __init__(self, conn: asyncpg.Connection, repository, recorder: RecordingPool,
+                 sample: dict, relations: Relations, records_sql: str):
+        self.conn = conn
+        self.repository = repository
+        self.recorder = recorder
+        self.sample = sample
+        self.relations = relations
+        self.records_sql = records_sql
+
+    @classmethod
+    async def open(cls, dsn: str, seed_args: Optional[Tuple[int, int, int]] = None) -> 'PlanSession':
+        """Conecta (e, com `seed_args` = (profissionais, listas, presenças por lista), recria e popula)"""
+        sys.path.insert(0, str(ROOT_DIR))
+        from repository_postgres import PostgresRepository
+
+        conn = await asyncpg.connect(dsn)
+        repository = PostgresRepository(dsn, min_size=1, max_size=2)
+        try:
+            if seed_args:
+                await seed(conn, *seed_args)
+            sample = await load_sample(conn)
+            relations = await load_relations(conn)
+            # Registros das listas: a consulta de dentro de list_attendance_records (a
+            # chamada da função aparece no plano só como Result)
+            records_sql = await function_query(conn, 'list_attendance_records', ('p_list_ids', 'p_after_row'))
+            await repository.connect()
+        except BaseException:
+            await repository.close()
+            await conn.close()
+            raise
+        recorder = RecordingPool(repository._pool)
+        repository._pool = recorder
+        return cls(conn, repository, recorder, sample, relations, records_sql)
+
+    async def close(self):
+        await self.repository.close()
+        await self.conn.close()
+
+
+async def load_sample(conn: asyncpg.Connection) -> dict:
+    """Ids, códigos e períodos reais do banco populado, usados como parâmetros"""
+    sample = dict(await conn.fetchrow("""
+        SELECT p.id::TEXT AS professional_id, p.code, p.email, p.registration_code, p.name,
+               l.id::TEXT AS list_id, l.installation_name, l.meeting_date
+        FROM attendance_records a
+        JOIN professionals p ON p.id = a.professional_id
+        JOIN attendance_lists l ON l.id = a.list_id
+        WHERE l.status = 'active'
+        LIMIT 1
+    """))
+    sample['other_lists'] = [row['id'] for row in await conn.fetch(
+        "SELECT id::TEXT FROM attendance_lists ORDER BY created_at DESC LIMIT 5"
+    )]
+    sample['newest'] = tuple(await conn.fetchrow(
+        "SELECT created_at::TEXT, id::TEXT FROM attendance_lists ORDER BY created_at DESC, id DESC LIMIT 1"
+    ))
+    archived = await conn.fetchrow("""
+        SELECT l.id::TEXT AS list_id, l.meeting_date, a.professional_id::TEXT
+        FROM attendance_lists_archive l
+        JOIN attendance_records_archive a ON a.list_id = l.id AND a.meeting_date = l.meeting_date
+        ORDER BY l.meeting_date DESC
+        LIMIT 1
+    """)
+    sample['archived_list_id'] = archived['list_id']
+    sample['archived_professional_id'] = archived['professional_id']
+    sample['ranking'] = tuple(await conn.fetchrow(
+        "SELECT training_seconds, professional_id::TEXT FROM professional_stats "
+        "ORDER BY training_seconds DESC, professional_id DESC OFFSET 50 LIMIT 1"
+    ))
+    # Uma semana de reuniões (exportação / PDF combinado de um período)
+    sample['date_to'] = sample['meeting_date'].isoformat()
+    sample['date_from'] = (sample['meeting_date'] - timedelta(days=7)).isoformat()
+    sample['month_from'] = (sample['meeting_date'] - timedelta(days=30)).isoformat()
+    # Um mês no arquivo e um ano pegando as duas camadas (consultas de histórico)
+    sample['archived_to'] = archived['meeting_date'].isoformat()
+    sample['archived_from'] = (archived['meeting_date'] - timedelta(days=30)).isoformat()
+    sample['year_to'] = (archived['meeting_date'] + timedelta(days=335)).isoformat()
+    return sample
+
+
+# Cada verificação devolve os planos das suas consultas em uma PlanSession
+PlanSource = Callable[[PlanSession, Check], Awaitable[List[dict]]]
+
+
+def repository_call(call: Callable[..., Awaitable]) -> PlanSource:
+    """Leitura do repositório: plano de cada consulta que a chamada fez (EXPLAIN
+    ANALYZE quando a verificação conta partições)"""
+    async def plans(session: PlanSession, check: Check) -> List[dict]:
+        session.recorder.statements.clear()
+        await call(session.repository, session.sample)
+        analyze = check.max_partitions is not None
+        return [await explain(session.conn, sql, params, analyze) for sql, params in session.recorder.statements]
+    return plans
+
+
+def records_query(params: Callable[[dict], tuple]) -> PlanSource:
+    """Consulta de list_attendance_records com os parâmetros da amostra (leitura: EXPLAIN ANALYZE)"""
+    async def plans(session: PlanSession, check: Check) -> List[dict]:
+        return [await explain(session.conn, session.records_sql, params(session.sample), analyze=True)]
+    return plans
+
+
+def function_statement(sql: str, params: Callable[[dict], tuple]) -> PlanSource:
+    """Consulta de dentro das funções de check-in (mesmos predicados); só EXPLAIN"""
+    async def plans(session: PlanSession, check: Check) -> List[dict]:
+        return [await explain(session.conn, sql, params(session.sample))]
+    return plans
+
+
+CHECKS: List[Tuple[Check, PlanSource]] = [
+    # Leituras do repositório, na forma em que as rotas do server.py as fazem
+    (Check('get_professional(code)', [{'professionals_code_key'}]),
+     repository_call(lambda r, s: r.get_professional('code', s['code']))),
+    (Check('get_professional(email)', [{'professionals_email_key'}]),
+     repository_call(lambda r, s: r.get_professional('email', s['email']))),
+    (Check('get_professional(registration_code)', [{'professionals_registration_code_key'}]),
+     repository_call(lambda r, s: r.get_professional('registration_code', s['registration_code']))),
+    (Check('find_professional_values(email)', [{'professionals_email_key'}]),
+     repository_call(lambda r, s: r.find_professional_values('email', [s['email'], 'novo@exemplo.com']))),
+    (Check('list_professionals (1ª página)', [{'idx_professionals_name'}]),
+     repository_call(lambda r, s: r.list_professionals(None, 51))),
+    (Check('list_professionals (cursor)', [{'idx_professionals_name'}]),
+     repository_call(lambda r, s: r.list_professionals(None, 51, (s['name'], s['professional_id'])))),
+    (Check('get_attendance_list', [
+        {'attendance_lists_pkey', 'attendance_lists_id_meeting_date_key'},
+        {'attendance_lists_archive_pkey', 'attendance_lists_archive_id_meeting_date_key'},
+    ]), repository_call(lambda r, s: r.get_attendance_list(s['list_id']))),
+    (Check('list_attendance_lists (1ª página)', [{'idx_attendance_lists_created_at'}]),
+     repository_call(lambda r, s: r.list_attendance_lists(None, 51))),
+    (Check('list_attendance_lists (cursor)', [{'idx_attendance_lists_created_at'}]),
+     repository_call(lambda r, s: r.list_attendance_lists(None, 51, s['newest']))),
+    (Check('list_attendance_lists (status=active)', [{'idx_attendance_lists_active'}]),
+     repository_call(lambda r, s: r.list_attendance_lists(
+         ['id', 'installation_name', 'meeting_date', 'meeting_time', 'course_title', 'created_at'],
+         51, None, 'exact', 'active'))),
+    (Check('find_attendance_lists (período)', [
+        {'idx_attendance_lists_meeting_date'}, {'idx_attendance_lists_archive_meeting_date'},
+    ]), repository_call(lambda r, s: r.find_attendance_lists(s['date_from'], s['date_to']))),
+    (Check('find_attendance_lists (instalação e período)', [
+        {'idx_attendance_lists_installation'}, {'idx_attendance_lists_archive_installation'},
+    ]), repository_call(lambda r, s: r.find_attendance_lists(s['date_from'], s['date_to'], s['installation_name']))),
+    (Check('find_attendance_lists (histórico arquivado, cursor)', [
+        {'idx_attendance_lists_archive_meeting_date'},
+    ]), repository_call(lambda r, s: r.find_attendance_lists(
+        s['archived_from'], s['archived_to'], None, 51, (s['archived_from'], '00:00:00', s['archived_list_id'])))),
+    (Check('get_professional_history (mês)', [
+        {'idx_attendance_records_professional_history'},
+    ], max_partitions=2), repository_call(lambda r, s: r.get_professional_history(
+        s['professional_id'], s['month_from'], s['date_to'], 51))),
+    (Check('get_professional_history (ano, duas camadas)', [
+        {'idx_attendance_records_professional_history'},
+        {'idx_attendance_records_archive_professional_history'},
+    ], max_partitions=14), repository_call(lambda r, s: r.get_professional_history(
+        s['archived_professional_id'], s['archived_from'], s['year_to'], 51))),
+    (Check('get_professional_history (arquivo, cursor)', [
+        {'idx_attendance_records_archive_professional_history'},
+    ], max_partitions=2), repository_call(lambda r, s: r.get_professional_history(
+        s['archived_professional_id'], s['archived_from'], s['archived_to'], 51,
+        (s['archived_from'], f"{s['archived_from']}T00:00:00+00:00", s['archived_list_id'])))),
+    (Check('get_professional_stats', [{'professional_stats_pkey'}, {'professionals_pkey'}]),
+     repository_call(lambda r, s: r.get_professional_stats(s['professional_id']))),
+    (Check('list_professional_stats (1ª página)', [{'idx_professional_stats_ranking'}]),
+     repository_call(lambda r, s: r.list_professional_stats(51))),
+    (Check('list_professional_stats (cursor)', [{'idx_professional_stats_ranking'}]),
+     repository_call(lambda r, s: r.list_professional_stats(51, s['ranking']))),
+
+    # Registros das listas
+    (Check('list_attendance_records (uma lista)', [
+        {'attendance_records_list_id_row_number_key', 'attendance_records_list_id_professional_id_key'},
+        {'professionals_pkey'},
+    ], max_partitions=1), records_query(lambda s: ([s['list_id']], 0))),
+    (Check('list_attendance_records (after_row)', [
+        {'attendance_records_list_id_row_number_key'},
+    ], max_partitions=1), records_query(lambda s: ([s['list_id']], 30))),
+    (Check('list_attendance_records (várias listas)', [
+        {'attendance_records_list_id_row_number_key', 'attendance_records_list_id_professional_id_key'},
+    ], max_partitions=2), records_query(lambda s: (s['other_lists'], 0))),
+    (Check('list_attendance_records (lista arquivada)', [
+        {'attendance_records_archive_list_id_row_number_key',
+         'attendance_records_archive_list_id_professional_id_key'},
+    ], max_partitions=1), records_query(lambda s: ([s['archived_list_id']], 0))),
+
+    # Consultas de dentro das funções de check-in
+    (Check('check-in: profissional por registration_code', [{'professionals_registration_code_key'}]),
+     function_statement("SELECT * FROM professionals WHERE registration_code = UPPER($1)",
+                        lambda s: (s['registration_code'],))),
+    (Check('check-in: profissional por code', [{'professionals_code_key'}]),
+     function_statement("SELECT * FROM professionals WHERE code = $1", lambda s: (s['code'],))),
+    (Check('check-in: lista FOR UPDATE', [{'attendance_lists_pkey', 'attendance_lists_id_meeting_date_key'}]),
+     function_statement("SELECT status, location, meeting_date FROM attendance_lists WHERE id = $1::UUID FOR UPDATE",
+                        lambda s: (s['list_id'],))),
+    (Check('check-in: duplicidade', [
+        {'attendance_records_list_id_professional_id_key', 'idx_attendance_records_professional_history'},
+    ], max_partitions=1),
+     function_statement("SELECT EXISTS (SELECT 1 FROM attendance_records "
+                        "WHERE list_id = $1::UUID AND meeting_date = $2 AND professional_id = $3::UUID)",
+                        lambda s: (s['list_id'], s['meeting_date'], s['professional_id']))),
+    (Check('check-in: próximo row_number', [{'attendance_records_list_id_row_number_key'}], max_partitions=1),
+     function_statement("SELECT COALESCE(MAX(row_number), 0) + 1 FROM attendance_records "
+                        "WHERE list_id = $1::UUID AND meeting_date = $2",
+                        lambda s: (s['list_id'], s['meeting_date']))),
+    (Check('finalizar lista (UPDATE por id)', [{'attendance_lists_pkey', 'attendance_lists_id_meeting_date_key'}]),
+     function_statement("UPDATE attendance_lists SET status = 'completed' WHERE id = $1::UUID",
+                        lambda s: (s['list_id'],))),
+]
+
+
+async def run(args) -> int:
+    dsn = os.environ.get('PLANCHECK_DATABASE_URL')
+    if not dsn:
+        sys.exit("Defina PLANCHECK_DATABASE_URL (banco descartável: o schema é recriado)")
+
+    seed_args = None if args.skip_seed else (args.professionals, args.lists, args.records_per_list)
+    session = await PlanSession.open(dsn, seed_args)
+    try:
+        failures = 0
+        for check, source in CHECKS:
+            plans = await source(session, check)
+            problems = verify(check, plans, session.relations)
+            failures += bool(problems)
+            print(f"{'FALHOU' if problems else 'ok':<7} {check.name}")
+            for problem in problems:
+                print(f"        {problem}")
+            if problems or args.verbose:
+                for plan in plans:
+                    for line in describe(plan):
+                        print(f"          {line}")
+
+        print(f"\n{len(CHECKS) - failures}/{len(CHECKS)} consultas com o plano esperado")
+        return 1 if failures else 0
+    finally:
+        await session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--professionals', type=int, default=DEFAULT_SEED[0])
+    parser.add_argument('--lists', type=int, default=DEFAULT_SEED[1])
+    parser.add_argument('--records-per-list', type=int, default=DEFAULT_SEED[2])
+    parser.add_argument('--skip-seed', action='store_true', help="reusar os dados já carregados")
+    parser.add_argument('--verbose', action='store_true', help="mostrar o plano de todas as consultas")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""Códigos de registro PRF-YYYY-XXXX sem colisão.
+
+Cada ano tem um contador sequencial no banco (função
+allocate_registration_numbers em database.sql). O número n do contador é
+embaralhado por uma permutação afim reversível sobre os 36^4 valores de
+4 caracteres [0-9A-Z], de forma que números distintos geram sempre códigos
+distintos e consecutivos não parecem sequenciais.
+"""
+import string
+from typing import Tuple
+
+
+ALPHABET = string.digits + string.ascii_uppercase
+CODE_LENGTH = 4
+CAPACITY = len(ALPHABET) ** CODE_LENGTH  # 1.679.616 códigos por ano
+
+# Multiplicador coprimo com 36^4 (ímpar e não divisível por 3) => permutação
+_MULTIPLIER = 1_000_003
+_INVERSE = pow(_MULTIPLIER, -1, CAPACITY)
+
+
+def _offset(year: int) -> int:
+    return (year * 7_919) % CAPACITY
+
+
+def registration_code(year: int, number: int) -> str:
+    """Código do n-ésimo registro do ano (n a partir de 0)"""
+    if not 0 <= number < CAPACITY:
+        raise ValueError(f"Número de registro fora da capacidade anual ({CAPACITY})")
+    value = (number * _MULTIPLIER + _offset(year)) % CAPACITY
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return f"PRF-{year}-{''.join(reversed(chars))}"
+
+
+def registration_number(code: str) -> Tuple[int, int]:
+    """Inverso de registration_code: devolve (ano, n)"""
+    prefix, year, suffix = code.upper().split('-')
+    if prefix != 'PRF' or len(suffix) != CODE_LENGTH:
+        raise ValueError(f"Código de registro inválido: {code}")
+    value = 0
+    for char in suffix:
+        value = value * len(ALPHABET) + ALPHABET.index(char)
+    year = int(year)
+    return year, ((value - _offset(year)) * _INVERSE) % CAPACITY
@@ -0,0 +1,391 @@
+"""Interface de persistência das rotas de server.py e backend Supabase (PostgREST).
+
+Um Repository expõe as operações que a API faz sobre as tabelas de
+database.sql (professionals, attendance_lists, attendance_records e
+registration_counters). Há três implementações, escolhidas por DB_BACKEND:
+
+- supabase (padrão): PostgREST via db.Database (HTTP/2 com pool)
+- postgres: conexão direta com pool asyncpg (repository_postgres.py)
+- sqlite: banco embutido via aiosqlite, para testes e carga offline
+  (repository_sqlite.py)
+
+Todas devolvem linhas como dicts no formato JSON do PostgREST (UUIDs e datas
+como texto) e registros de presença com o profissional embutido em
+`professionals` ({name, email, profession, company}).
+
+Listas finalizadas de meses antigos podem estar no arquivo
+(attendance_lists_archive, com `archived_at`): as leituras por id, por
+período e de registros veem as duas camadas; a listagem paginada e as
+escritas, só as listas do dia a dia.
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from postgrest.exceptions import APIError
+
+from db import Database
+
+
+# Colunas que identificam um profissional (buscas e verificação de duplicidade)
+PROFESSIONAL_LOOKUP_COLUMNS = ('code', 'email', 'registration_code')
+
+# Projeção dos dados do profissional embutidos nos registros de presença
+RECORD_PROFESSIONAL_FIELDS = ('name', 'email', 'profession', 'company')
+
+# Projeção do profissional embutida nos agregados de relatório
+STATS_PROFESSIONAL_FIELDS = ('name', 'company', 'registration_code')
+
+
+class ConflictError(Exception):
+    """Violação de unicidade (email, digital ou código de registro já existentes)"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class Repository(ABC):
+    """Operações de persistência usadas pela API"""
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    @abstractmethod
+    async def ping(self):
+        """Levanta exceção se o banco não responder"""
+
+    # Profissionais
+
+    @abstractmethod
+    async def get_professional(self, column: str, value: str) -> Optional[dict]:
+        """Profissional por code, email ou registration_code"""
+
+    @abstractmethod
+    async def find_professional_values(self, column: str, values: Sequence[str]) -> set:
+        """Quais dos valores já existem na coluna (code, email ou registration_code)"""
+
+    @abstractmethod
+    async def insert_professionals(self, rows: List[dict]) -> List[dict]:
+        """Insere todas as linhas ou nenhuma (ConflictError em violação de unicidade)"""
+
+    @abstractmethod
+    async def list_professionals(self, columns: Optional[List[str]], limit: int,
+                                 after: Optional[Tuple[str, str]] = None,
+                                 count: Optional[str] = None) -> Tuple[List[dict], Optional[int]]:
+        """Página em ordem de (name, id) a partir do cursor `after`; devolve (linhas, total)"""
+
+    @abstractmethod
+    async def get_registration_counter(self, year: int) -> int:
+        ...
+
+    @abstractmethod
+    async def allocate_registration_numbers(self, year: int, count: int) -> int:
+        """Reserva `count` números do contador do ano e devolve o primeiro"""
+
+    # Listas de presença
+
+    @abstractmethod
+    async def insert_attendance_list(self, data: dict) -> dict:
+        ...
+
+    @abstractmethod
+    async def get_attendance_list(self, list_id: str) -> Optional[dict]:
+        """Lista ativa ou arquivada (`archived_at` preenchido nas arquivadas)"""
+
+    @abstractmethod
+    async def update_attendance_list(self, list_id: str, data: dict) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def list_attendance_lists(self, columns: Optional[List[str]], limit: int,
+                                    after: Optional[Tuple[str, str]] = None,
+                                    count: Optional[str] = None,
+                                    status: Optional[str] = None) -> Tuple[List[dict], Optional[int]]:
+        """Página em ordem decrescente de (created_at, id), opcionalmente só com um status;
+        devolve (linhas, total)"""
+
+    @abstractmethod
+    async def find_attendance_lists(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                                    installation_name: Optional[str] = None,
+                                    limit: Optional[int] = None,
+                                    after: Optional[Tuple[str, str, str]] = None) -> List[dict]:
+        """Listas ativas e arquivadas por período/instalação em ordem de (meeting_date,
+        meeting_time, id), a partir do cursor `after`"""
+
+    # Registros de presença
+
+    @abstractmethod
+    async def register_attendance(self, list_id: str, code: Optional[str],
+                                  registration_code: Optional[str]) -> dict:
+        """Check-in atômico; mesmo contrato da função register_attendance de database.sql"""
+
+    @abstractmethod
+    async def register_attendance_batch(self, list_id: str, items: List[dict]) -> dict:
+        """Check-in em lote; mesmo contrato da função register_attendance_batch"""
+
+    @abstractmethod
+    async def get_list_records(self, list_id: str, after_row: Optional[int] = None) -> List[dict]:
+        """Registros de uma lista em ordem de row_number (opcionalmente após `after_row`)"""
+
+    @abstractmethod
+    async def get_records_for_lists(self, list_ids: List[str]) -> Dict[str, List[dict]]:
+        """Registros de várias listas agrupados por list_id"""
+
+    @abstractmethod
+    async def get_professional_history(self, professional_id: str, date_from: str, date_to: str, limit: int,
+                                       after: Optional[Tuple[str, str, str]] = None) -> List[dict]:
+        """Presenças de um profissional no período (ativas e arquivadas), com os dados da
+        lista, em ordem de (meeting_date, entry_time, id) a partir do cursor `after`"""
+
+    # Manutenção do histórico (partições mensais e arquivo)
+
+    @abstractmethod
+    async def ensure_attendance_partitions(self, months_ahead: int) -> int:
+        """Cria as partições mensais que faltam até `months_ahead` meses à frente; devolve quantas"""
+
+    @abstractmethod
+    async def archive_attendance_history(self, before: str) -> dict:
+        """Move para o arquivo os meses inteiros anteriores a `before` (YYYY-MM-DD) sem
+        listas ativas; mesmo contrato da função archive_attendance_history"""
+
+    # Agregados de relatório (mantidos por gatilhos no banco; empresa e instalação
+    # só depois de rollup_attendance_stats)
+
+    @abstractmethod
+    async def get_professional_stats(self, professional_id: str) -> Optional[dict]:
+        """Agregado de um profissional, com `professionals` ({name, company, registration_code}) embutido"""
+
+    @abstractmethod
+    async def list_professional_stats(self, limit: int, after: Optional[Tuple[int, str]] = None) -> List[dict]:
+        """Ranking por (training_seconds, professional_id) decrescente a partir do cursor `after`"""
+
+    @abstractmethod
+    async def list_company_stats(self) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def list_installation_stats(self) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def rollup_attendance_stats(self) -> int:
+        """Soma as presenças pendentes a company_stats e installation_stats; devolve
+        quantas linhas pendentes foram consolidadas"""
+
+
+def _quote_filter_value(value) -> str:
+    """Escapa um valor para uso dentro de um filtro or=(...) do PostgREST"""
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _keyset_after(columns: Sequence[str], values: Sequence) -> str:
+    """Filtro or=(...) para linhas depois de `values` na ordem crescente de `columns`"""
+    quoted = [_quote_filter_value(v) for v in values]
+    branches = []
+    for i, column in enumerate(columns):
+        equal = [f"{c}.eq.{v}" for c, v in zip(columns[:i], quoted[:i])]
+        condition = f"{column}.gt.{quoted[i]}"
+        branches.append(f"and({','.join(equal + [condition])})" if equal else condition)
+    return ','.join(branches)
+
+
+def _conflict(error: APIError) -> Exception:
+    if error.code == '23505':
+        return ConflictError(error.message or str(error))
+    return error
+
+
+class SupabaseRepository(Repository):
+    """Backend PostgREST do Supabase"""
+
+    LOOKUP_CHUNK = 100  # valores por filtro in.(...) (mantém a URL curta)
+    STATS_SELECT = f"*, professionals({', '.join(STATS_PROFESSIONAL_FIELDS)})"
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    async def connect(self):
+        await self.database.connect()
+
+    async def close(self):
+        await self.database.close()
+
+    async def ping(self):
+        await self.database.table('professionals').select('id').limit(1).execute()
+
+    async def get_professional(self, column: str, value: str) -> Optional[dict]:
+        result = await self.database.table('professionals').select('*').eq(column, value).execute()
+        return result.data[0] if result.data else None
+
+    async def find_professional_values(self, column: str, values: Sequence[str]) -> set:
+        existing = set()
+        for start in range(0, len(values), self.LOOKUP_CHUNK):
+            chunk = list(values[start:start + self.LOOKUP_CHUNK])
+            result = await self.database.table('professionals').select(column).in_(column, chunk).execute()
+            existing.update(row[column] for row in result.data)
+        return existing
+
+    async def insert_professionals(self, rows: List[dict]) -> List[dict]:
+        try:
+            result = await self.database.table('professionals').insert(rows).execute()
+        except APIError as e:
+            raise _conflict(e)
+        return result.data
+
+    async def list_professionals(self, columns, limit, after=None, count=None):
+        query = self.database.table('professionals').select(','.join(columns) if columns else '*', count=count)
+        if after:
+            name, last_id = after
+            query = query.or_(
+                f"name.gt.{_quote_filter_value(name)},"
+                f"and(name.eq.{_quote_filter_value(name)},id.gt.{_quote_filter_value(last_id)})"
+            )
+        result = await query.order('name').order('id').limit(limit).execute()
+        return result.data, result.count
+
+    async def get_registration_counter(self, year: int) -> int:
+        result = await self.database.table('registration_counters').select('value').eq('year', year).execute()
+        return result.data[0]['value'] if result.data else 0
+
+    async def allocate_registration_numbers(self, year: int, count: int) -> int:
+        result = await self.database.rpc('allocate_registration_numbers', {'p_year': year, 'p_count': count}).execute()
+        return result.data
+
+    async def insert_attendance_list(self, data: dict) -> dict:
+        result = await self.database.table('attendance_lists').insert(data).execute()
+        return result.data[0] if result.data else None
+
+    async def get_attendance_list(self, list_id: str) -> Optional[dict]:
+        result = await self.database.table('attendance_lists_all').select('*').eq('id', list_id).execute()
+        return result.data[0] if result.data else None
+
+    async def update_attendance_list(self, list_id: str, data: dict) -> Optional[dict]:
+        result = await self.database.table('attendance_lists').update(data).eq('id', list_id).execute()
+        return result.data[0] if result.data else None
+
+    async def list_attendance_lists(self, columns, limit, after=None, count=None, status=None):
+        query = self.database.table('attendance_lists').select(','.join(columns) if columns else '*', count=count)
+        if status:
+            query = query.eq('status', status)
+        if after:
+            created_at, last_id = after
+            query = query.or_(
+                f"created_at.lt.{_quote_filter_value(created_at)},"
+                f"and(created_at.eq.{_quote_filter_value(created_at)},id.lt.{_quote_filter_value(last_id)})"
+            )
+        result = await query.order('created_at', desc=True).order('id', desc=True).limit(limit).execute()
+        return result.data, result.count
+
+    async def find_attendance_lists(self, date_from=None, date_to=None, installation_name=None, limit=None,
+                                    after=None):
+        query = self.database.table('attendance_lists_all').select('*')
+        if date_from:
+            query = query.gte('meeting_date', date_from)
+        if date_to:
+            query = query.lte('meeting_date', date_to)
+        if installation_name:
+            query = query.eq('installation_name', installation_name)
+        if after:
+            query = query.or_(_keyset_after(('meeting_date', 'meeting_time', 'id'), after))
+        query = query.order('meeting_date').order('meeting_time').order('id')
+        if limit is not None:
+            query = query.limit(limit)
+        result = await query.execute()
+        return result.data
+
+    async def register_attendance(self, list_id, code, registration_code) -> dict:
+        result = await self.database.rpc('register_attendance', {
+            'p_list_id': list_id,
+            'p_code': code,
+            'p_registration_code': registration_code,
+        }).execute()
+        return result.data or {}
+
+    async def register_attendance_batch(self, list_id: str, items: List[dict]) -> dict:
+        result = await self.database.rpc('register_attendance_batch', {
+            'p_list_id': list_id,
+            'p_items': items,
+        }).execute()
+        return result.data or {}
+
+    # Registros pela função list_attendance_records: lê cada lista só na partição
+    # do seu meeting_date, nas duas camadas (um filtro list_id=in.(...) em
+    # attendance_records passaria por todas as partições)
+
+    async def get_list_records(self, list_id: str, after_row: Optional[int] = None) -> List[dict]:
+        result = await self.database.rpc('list_attendance_records', {
+            'p_list_ids': [list_id],
+            'p_after_row': after_row or 0,
+        }).execute()
+        return result.data or []
+
+    async def get_records_for_lists(self, list_ids: List[str]) -> Dict[str, List[dict]]:
+        records_by_list = {list_id: [] for list_id in list_ids}
+        result = await self.database.rpc('list_attendance_records', {'p_list_ids': list_ids}).execute()
+        for record in result.data or []:
+            records_by_list[record['list_id']].append(record)
+        return records_by_list
+
+    async def get_professional_history(self, professional_id, date_from, date_to, limit, after=None):
+        query = self.database.table('attendance_history').select('*').eq(
+            'professional_id', professional_id
+        ).gte('meeting_date', date_from).lte('meeting_date', date_to)
+        if after:
+            query = query.or_(_keyset_after(('meeting_date', 'entry_time', 'id'), after))
+        result = await query.order('meeting_date').order('entry_time').order('id').limit(limit).execute()
+        return result.data
+
+    async def ensure_attendance_partitions(self, months_ahead: int) -> int:
+        result = await self.database.rpc('ensure_attendance_partitions', {'p_months_ahead': months_ahead}).execute()
+        return result.data or 0
+
+    async def archive_attendance_history(self, before: str) -> dict:
+        result = await self.database.rpc('archive_attendance_history', {'p_before': before}).execute()
+        return result.data or {}
+
+    async def get_professional_stats(self, professional_id: str) -> Optional[dict]:
+        result = await self.database.table('professional_stats').select(
+            self.STATS_SELECT
+        ).eq('professional_id', professional_id).execute()
+        return result.data[0] if result.data else None
+
+    async def list_professional_stats(self, limit: int, after: Optional[Tuple[int, str]] = None) -> List[dict]:
+        query = self.database.table('professional_stats').select(self.STATS_SELECT)
+        if after:
+            seconds, last_id = after
+            query = query.or_(
+                f"training_seconds.lt.{int(seconds)},"
+                f"and(training_seconds.eq.{int(seconds)},professional_id.lt.{_quote_filter_value(last_id)})"
+            )
+        result = await query.order('training_seconds', desc=True).order('professional_id', desc=True).limit(limit).execute()
+        return result.data
+
+    async def list_company_stats(self) -> List[dict]:
+        result = await self.database.table('company_stats').select('*').order('training_seconds', desc=True).order('company').execute()
+        return result.data
+
+    async def list_installation_stats(self) -> List[dict]:
+        result = await self.database.table('installation_stats').select('*').order('training_seconds', desc=True).order('installation_name').execute()
+        return result.data
+
+    async def rollup_attendance_stats(self) -> int:
+        result = await self.database.rpc('rollup_attendance_stats').execute()
+        return result.data or 0
+
+
+def repository_from_env() -> Repository:
+    """Backend escolhido por DB_BACKEND (supabase | postgres | sqlite)"""
+    backend = os.environ.get('DB_BACKEND', 'supabase').strip().lower()
+    if backend == 'supabase':
+        return SupabaseRepository(Database.from_env())
+    if backend == 'postgres':
+        from repository_postgres import PostgresRepository
+        return PostgresRepository.from_env()
+    if backend == 'sqlite':
+        from repository_sqlite import SqliteRepository
+        return SqliteRepository.from_env()
+    raise ValueError(f"DB_BACKEND inválido: {backend} (use supabase, postgres ou sqlite)")
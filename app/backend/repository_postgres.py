@@ -0,0 +1,339 @@
+"""Backend Postgres direto (asyncpg) sem a ida HTTP ao PostgREST.
+
+Usa o mesmo schema e as mesmas funções de database.sql. As linhas são
+serializadas pelo próprio Postgres (row_to_json / json_agg), de modo que o
+formato devolvido é idêntico ao do PostgREST e cada consulta decodifica um
+único valor JSON.
+"""
+import json
+import os
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from repository import (
+    ConflictError, Repository, PROFESSIONAL_LOOKUP_COLUMNS, STATS_PROFESSIONAL_FIELDS,
+)
+
+
+logger = logging.getLogger(__name__)
+
+LIST_STATUSES = ('active', 'completed')
+
+# Colunas aceitas em projeções e escritas (os nomes entram no SQL)
+TABLE_COLUMNS = {
+    'professionals': (
+        'id', 'code', 'registration_code', 'name', 'email', 'profession', 'company', 'created_at',
+    ),
+    'attendance_lists': (
+        'id', 'installation_name', 'meeting_date', 'meeting_time', 'duration', 'course_title',
+        'course_content', 'instructor_name', 'instructor_role', 'instructor_qualification',
+        'location', 'start_time', 'end_time', 'status', 'created_at',
+    ),
+}
+
+_STATS_PROFESSIONAL = ', '.join(f"'{f}', p.{f}" for f in STATS_PROFESSIONAL_FIELDS)
+
+_PROFESSIONAL_STATS_SQL = f"""
+    SELECT s.*, json_build_object({_STATS_PROFESSIONAL}) AS professionals
+    FROM professional_stats s
+    JOIN professionals p ON p.id = s.professional_id
+"""
+
+
+def _columns(table: str, columns: Optional[Sequence[str]]) -> str:
+    allowed = TABLE_COLUMNS[table]
+    unknown = [c for c in columns or () if c not in allowed]
+    if unknown:
+        raise ValueError(f"Colunas inválidas para {table}: {', '.join(unknown)}")
+    return ', '.join(columns) if columns else '*'
+
+
+class PostgresRepository(Repository):
+    """Backend Postgres com pool de conexões asyncpg"""
+
+    def __init__(self, dsn: str, min_size: int = 2, max_size: int = 20,
+                 command_timeout: float = 15.0, statement_cache_size: int = 100):
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.command_timeout = command_timeout
+        # pgbouncer em modo transaction não suporta prepared statements: usar 0
+        self.statement_cache_size = statement_cache_size
+        self._pool: Optional[asyncpg.Pool] = None
+
+    @classmethod
+    def from_env(cls) -> 'PostgresRepository':
+        return cls(
+            dsn=os.environ['DATABASE_URL'],
+            min_size=int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            max_size=int(os.environ.get('DB_POOL_SIZE', 20)),
+            command_timeout=float(os.environ.get('DB_READ_TIMEOUT', 15.0)),
+            statement_cache_size=int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100)),
+        )
+
+    async def connect(self):
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self.dsn,
+                min_size=self.min_size,
+                max_size=self.max_size,
+                command_timeout=self.command_timeout,
+                statement_cache_size=self.statement_cache_size,
+            )
+            logger.info(f"Pool Postgres pronto (conexões={self.min_size}..{self.max_size})")
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+        self._pool = None
+
+    async def _pool_ready(self) -> asyncpg.Pool:
+        if self._pool is None:
+            await self.connect()
+        return self._pool
+
+    async def _json(self, sql: str, *args):
+        """Executa uma consulta que devolve um único valor JSON"""
+        pool = await self._pool_ready()
+        value = await pool.fetchval(sql, *args)
+        return json.loads(value) if value is not None else None
+
+    async def _rows(self, sql: str, *args) -> List[dict]:
+        """Linhas de um SELECT serializadas como array JSON"""
+        return await self._json(f"SELECT COALESCE(json_agg(t), '[]') FROM ({sql}) t", *args)
+
+    async def _write(self, sql: str, *args):
+        try:
+            return await self._json(sql, *args)
+        except asyncpg.UniqueViolationError as e:
+            raise ConflictError(f"{e} ({e.constraint_name})")
+
+    async def _count(self, table: str, count: Optional[str], where: str = '', *args) -> Optional[int]:
+        if count is None:
+            return None
+        pool = await self._pool_ready()
+        if count != 'exact' and not where:
+            # Estimativa das estatísticas do planner (sem varrer a tabela)
+            estimate = await pool.fetchval(
+                "SELECT reltuples::BIGINT FROM pg_class WHERE oid = $1::TEXT::REGCLASS", table
+            )
+            if estimate is not None and estimate >= 0:
+                return estimate
+        return await pool.fetchval(f"SELECT COUNT(*) FROM {table} {where}", *args)
+
+    async def ping(self):
+        pool = await self._pool_ready()
+        await pool.fetchval("SELECT 1")
+
+    # Profissionais
+
+    async def get_professional(self, column: str, value: str) -> Optional[dict]:
+        if column not in PROFESSIONAL_LOOKUP_COLUMNS:
+            raise ValueError(f"Coluna de busca inválida: {column}")
+        return await self._json(
+            f"SELECT row_to_json(p) FROM professionals p WHERE {column} = $1", value
+        )
+
+    async def find_professional_values(self, column: str, values: Sequence[str]) -> set:
+        if column not in PROFESSIONAL_LOOKUP_COLUMNS:
+            raise ValueError(f"Coluna de busca inválida: {column}")
+        if not values:
+            return set()
+        pool = await self._pool_ready()
+        rows = await pool.fetch(f"SELECT {column} FROM professionals WHERE {column} = ANY($1::TEXT[])", list(values))
+        return {row[0] for row in rows}
+
+    async def insert_professionals(self, rows: List[dict]) -> List[dict]:
+        if not rows:
+            return []
+        columns = _columns('professionals', list(rows[0]))
+        return await self._write(
+            f"""
+            WITH inserted AS (
+                INSERT INTO professionals ({columns})
+                SELECT {columns} FROM json_populate_recordset(NULL::professionals, $1::JSON)
+                RETURNING *
+            )
+            SELECT COALESCE(json_agg(inserted), '[]') FROM inserted
+            """,
+            json.dumps(rows, default=str),
+        )
+
+    async def list_professionals(self, columns, limit, after=None, count=None):
+        where, args = '', [limit]
+        if after:
+            where = "WHERE (name, id) > ($2, $3::UUID)"
+            args += list(after)
+        rows = await self._rows(
+            f"SELECT {_columns('professionals', columns)} FROM professionals {where} "
+            f"ORDER BY name, id LIMIT $1",
+            *args,
+        )
+        return rows, await self._count('professionals', count)
+
+    async def get_registration_counter(self, year: int) -> int:
+        pool = await self._pool_ready()
+        value = await pool.fetchval("SELECT value FROM registration_counters WHERE year = $1", year)
+        return value or 0
+
+    async def allocate_registration_numbers(self, year: int, count: int) -> int:
+        pool = await self._pool_ready()
+        return await pool.fetchval("SELECT allocate_registration_numbers($1, $2)", year, count)
+
+    # Listas de presença
+
+    async def insert_attendance_list(self, data: dict) -> dict:
+        columns = _columns('attendance_lists', list(data))
+        return await self._write(
+            f"""
+            INSERT INTO attendance_lists AS l ({columns})
+            SELECT {columns} FROM json_populate_record(NULL::attendance_lists, $1::JSON)
+            RETURNING row_to_json(l)
+            """,
+            json.dumps(data, default=str),
+        )
+
+    async def get_attendance_list(self, list_id: str) -> Optional[dict]:
+        return await self._json("SELECT row_to_json(l) FROM attendance_lists_all l WHERE id = $1::UUID", list_id)
+
+    async def update_attendance_list(self, list_id: str, data: dict) -> Optional[dict]:
+        columns = _columns('attendance_lists', list(data))
+        return await self._write(
+            f"""
+            UPDATE attendance_lists AS l SET ({columns}) = (
+                SELECT {columns} FROM json_populate_record(NULL::attendance_lists, $2::JSON)
+            )
+            WHERE id = $1::UUID
+            RETURNING row_to_json(l)
+            """,
+            list_id, json.dumps(data, default=str),
+        )
+
+    async def list_attendance_lists(self, columns, limit, after=None, count=None, status=None):
+        conditions, args = [], [limit]
+        if status:
+            if status not in LIST_STATUSES:
+                raise ValueError(f"Status inválido: {status}")
+            # Literal e não parâmetro: o plano genérico de uma consulta preparada
+            # só usa o índice parcial de listas ativas se o valor estiver no SQL
+            conditions.append(f"status = '{status}'")
+        if after:
+            args += [after[0], after[1]]
+            conditions.append(f"(created_at, id) < (${len(args) - 1}::TEXT::TIMESTAMPTZ, ${len(args)}::UUID)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = await self._rows(
+            f"SELECT {_columns('attendance_lists', columns)} FROM attendance_lists {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT $1",
+            *args,
+        )
+        if status:
+            # Contagem filtrada: exata (as estatísticas do planner são da tabela inteira)
+            return rows, await self._count('attendance_lists', count, f"WHERE status = '{status}'")
+        return rows, await self._count('attendance_lists', count)
+
+    async def find_attendance_lists(self, date_from=None, date_to=None, installation_name=None, limit=None,
+                                    after=None):
+        conditions, args = [], []
+        for condition, value in (
+            ('meeting_date >= ${}::TEXT::DATE', date_from),
+            ('meeting_date <= ${}::TEXT::DATE', date_to),
+            ('installation_name = ${}', installation_name),
+        ):
+            if value:
+                args.append(value)
+                conditions.append(condition.format(len(args)))
+        if after:
+            args += list(after)
+            conditions.append(
+                f"(meeting_date, meeting_time, id) > "
+                f"(${len(args) - 2}::TEXT::DATE, ${len(args) - 1}::TEXT::TIME, ${len(args)}::UUID)"
+            )
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        limit_sql = ''
+        if limit is not None:
+            args.append(limit)
+            limit_sql = f"LIMIT ${len(args)}"
+        return await self._rows(
+            f"SELECT * FROM attendance_lists_all {where} ORDER BY meeting_date, meeting_time, id {limit_sql}",
+            *args,
+        )
+
+    # Registros de presença
+
+    async def register_attendance(self, list_id, code, registration_code) -> dict:
+        return await self._json(
+            "SELECT register_attendance($1::UUID, $2, $3)", list_id, code, registration_code
+        ) or {}
+
+    async def register_attendance_batch(self, list_id: str, items: List[dict]) -> dict:
+        return await self._json(
+            "SELECT register_attendance_batch($1::UUID, $2::JSON)", list_id, json.dumps(items)
+        ) or {}
+
+    # Pela função list_attendance_records: cada lista é lida só na partição do seu
+    # meeting_date (um list_id = ANY(...) direto passaria por todas as partições)
+
+    async def get_list_records(self, list_id: str, after_row: Optional[int] = None) -> List[dict]:
+        return await self._json(
+            "SELECT list_attendance_records($1::UUID[], $2)", [list_id], after_row or 0
+        )
+
+    async def get_records_for_lists(self, list_ids: List[str]) -> Dict[str, List[dict]]:
+        records_by_list = {list_id: [] for list_id in list_ids}
+        records = await self._json("SELECT list_attendance_records($1::UUID[])", list_ids)
+        for record in records:
+            records_by_list[record['list_id']].append(record)
+        return records_by_list
+
+    async def get_professional_history(self, professional_id, date_from, date_to, limit, after=None):
+        conditions = [
+            "professional_id = $2::UUID",
+            "meeting_date BETWEEN $3::TEXT::DATE AND $4::TEXT::DATE",
+        ]
+        args = [limit, professional_id, date_from, date_to]
+        if after:
+            args += list(after)
+            conditions.append("(meeting_date, entry_time, id) > ($5::TEXT::DATE, $6::TEXT::TIMESTAMPTZ, $7::UUID)")
+        return await self._rows(
+            f"SELECT * FROM attendance_history WHERE {' AND '.join(conditions)} "
+            f"ORDER BY meeting_date, entry_time, id LIMIT $1",
+            *args,
+        )
+
+    # Manutenção do histórico
+
+    async def ensure_attendance_partitions(self, months_ahead: int) -> int:
+        pool = await self._pool_ready()
+        return await pool.fetchval("SELECT ensure_attendance_partitions(NULL, $1)", months_ahead)
+
+    async def archive_attendance_history(self, before: str) -> dict:
+        return await self._json("SELECT archive_attendance_history($1::TEXT::DATE)", before)
+
+    # Agregados de relatório
+
+    async def get_professional_stats(self, professional_id: str) -> Optional[dict]:
+        rows = await self._rows(f"{_PROFESSIONAL_STATS_SQL} WHERE s.professional_id = $1::UUID", professional_id)
+        return rows[0] if rows else None
+
+    async def list_professional_stats(self, limit: int, after: Optional[Tuple[int, str]] = None) -> List[dict]:
+        if after:
+            return await self._rows(
+                f"{_PROFESSIONAL_STATS_SQL} WHERE (s.training_seconds, s.professional_id) < ($2, $3::UUID) "
+                f"ORDER BY s.training_seconds DESC, s.professional_id DESC LIMIT $1",
+                limit, int(after[0]), after[1],
+            )
+        return await self._rows(
+            f"{_PROFESSIONAL_STATS_SQL} ORDER BY s.training_seconds DESC, s.professional_id DESC LIMIT $1", limit
+        )
+
+    async def list_company_stats(self) -> List[dict]:
+        return await self._rows("SELECT * FROM company_stats ORDER BY training_seconds DESC, company")
+
+    async def list_installation_stats(self) -> List[dict]:
+        return await self._rows("SELECT * FROM installation_stats ORDER BY training_seconds DESC, installation_name")
+
+    async def rollup_attendance_stats(self) -> int:
+        pool = await self._pool_ready()
+        return await pool.fetchval("SELECT rollup_attendance_stats()")
@@ -0,0 +1,791 @@
+"""Backend SQLite embutido (aiosqlite) para desenvolvimento, testes e carga offline.
+
+Cria sozinho o mesmo schema de database.sql (tipos como TEXT, UUIDs e datas
+ISO 8601 gerados aqui) e reproduz em Python, dentro de uma transação
+BEGIN IMMEDIATE, as funções register_attendance, register_attendance_batch,
+allocate_registration_numbers e archive_attendance_history. Escritas são
+serializadas por um lock: o SQLite tem um único escritor por vez. Leituras
+nunca veem uma transação ainda aberta: em arquivo (WAL) usam uma segunda
+conexão, somente leitura; em memória, com uma conexão só, esperam o lock.
+
+O SQLite não tem partições: os registros ficam em uma tabela só, com o índice
+por (professional_id, meeting_date), e o arquivo é feito copiando e apagando
+as listas e registros do mês.
+"""
+import asyncio
+import os
+import sqlite3
+import uuid
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import aiosqlite
+
+from repository import (
+    ConflictError, Repository, PROFESSIONAL_LOOKUP_COLUMNS, RECORD_PROFESSIONAL_FIELDS,
+    STATS_PROFESSIONAL_FIELDS,
+)
+from registration import CAPACITY as REGISTRATION_CAPACITY
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS professionals (
+    id TEXT PRIMARY KEY,
+    code TEXT UNIQUE NOT NULL,
+    registration_code TEXT UNIQUE,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    profession TEXT NOT NULL,
+    company TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance_lists (
+    id TEXT PRIMARY KEY,
+    installation_name TEXT NOT NULL,
+    meeting_date TEXT NOT NULL,
+    meeting_time TEXT NOT NULL,
+    duration TEXT,
+    course_title TEXT NOT NULL,
+    course_content TEXT NOT NULL,
+    instructor_name TEXT NOT NULL,
+    instructor_role TEXT NOT NULL,
+    instructor_qualification TEXT NOT NULL,
+    location TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    status TEXT NOT NULL DEFAULT 'active' CHECK (status IN ('active', 'completed')),
+    created_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance_records (
+    id TEXT PRIMARY KEY,
+    list_id TEXT REFERENCES attendance_lists(id) ON DELETE CASCADE,
+    professional_id TEXT REFERENCES professionals(id) ON DELETE CASCADE,
+    meeting_date TEXT NOT NULL,
+    entry_time TEXT NOT NULL,
+    local TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (list_id, professional_id),
+    UNIQUE (list_id, row_number)
+);
+
+CREATE TABLE IF NOT EXISTS registration_counters (
+    year INTEGER PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_professionals_name ON professionals(name, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_created_at ON attendance_lists(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_meeting_date ON attendance_lists(meeting_date, meeting_time, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_installation
+    ON attendance_lists(installation_name, meeting_date, meeting_time, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_active ON attendance_lists(created_at, id) WHERE status = 'active';
+CREATE INDEX IF NOT EXISTS idx_attendance_records_professional_history
+    ON attendance_records(professional_id, meeting_date, entry_time, id);
+
+-- Arquivo de listas finalizadas de meses antigos (archive_attendance_history)
+
+CREATE TABLE IF NOT EXISTS attendance_lists_archive (
+    id TEXT PRIMARY KEY,
+    installation_name TEXT NOT NULL,
+    meeting_date TEXT NOT NULL,
+    meeting_time TEXT NOT NULL,
+    duration TEXT,
+    course_title TEXT NOT NULL,
+    course_content TEXT NOT NULL,
+    instructor_name TEXT NOT NULL,
+    instructor_role TEXT NOT NULL,
+    instructor_qualification TEXT NOT NULL,
+    location TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS attendance_records_archive (
+    id TEXT PRIMARY KEY,
+    list_id TEXT REFERENCES attendance_lists_archive(id) ON DELETE CASCADE,
+    professional_id TEXT REFERENCES professionals(id) ON DELETE CASCADE,
+    meeting_date TEXT NOT NULL,
+    entry_time TEXT NOT NULL,
+    local TEXT NOT NULL,
+    row_number INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    UNIQUE (list_id, professional_id),
+    UNIQUE (list_id, row_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_archive_meeting_date
+    ON attendance_lists_archive(meeting_date, meeting_time, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_archive_installation
+    ON attendance_lists_archive(installation_name, meeting_date, meeting_time, id);
+CREATE INDEX IF NOT EXISTS idx_attendance_records_archive_professional_history
+    ON attendance_records_archive(professional_id, meeting_date, entry_time, id);
+
+-- As duas camadas, como as visões de database.sql
+
+CREATE VIEW IF NOT EXISTS attendance_lists_all AS
+SELECT {list_columns}, NULL AS archived_at FROM attendance_lists
+UNION ALL
+SELECT {list_columns}, archived_at FROM attendance_lists_archive;
+
+CREATE VIEW IF NOT EXISTS attendance_records_all AS
+SELECT {record_columns} FROM attendance_records
+UNION ALL
+SELECT {record_columns} FROM attendance_records_archive;
+
+CREATE VIEW IF NOT EXISTS attendance_history AS
+SELECT {history_columns}, NULL AS archived_at
+FROM attendance_records a
+JOIN attendance_lists l ON l.id = a.list_id
+UNION ALL
+SELECT {history_columns}, l.archived_at
+FROM attendance_records_archive a
+JOIN attendance_lists_archive l ON l.id = a.list_id;
+
+CREATE TABLE IF NOT EXISTS professional_stats (
+    professional_id TEXT PRIMARY KEY REFERENCES professionals(id) ON DELETE CASCADE,
+    attendances INTEGER NOT NULL DEFAULT 0,
+    training_seconds INTEGER NOT NULL DEFAULT 0,
+    last_attendance_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS company_stats (
+    company TEXT PRIMARY KEY,
+    attendances INTEGER NOT NULL DEFAULT 0,
+    training_seconds INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS installation_stats (
+    installation_name TEXT PRIMARY KEY,
+    lists INTEGER NOT NULL DEFAULT 0,
+    completed_lists INTEGER NOT NULL DEFAULT 0,
+    attendances INTEGER NOT NULL DEFAULT 0,
+    session_seconds INTEGER NOT NULL DEFAULT 0,
+    training_seconds INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS attendance_stats_pending (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    company TEXT NOT NULL,
+    installation_name TEXT NOT NULL,
+    attendances INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_professional_stats_ranking ON professional_stats(training_seconds DESC, professional_id DESC);
+
+-- Mesmos agregados dos gatilhos de database.sql (o SQLite só tem gatilhos por
+-- linha). Empresa e instalação ficam pendentes até rollup_attendance_stats; o
+-- DROP substitui o gatilho antigo, que somava direto, em arquivos existentes.
+
+DROP TRIGGER IF EXISTS attendance_records_stats;
+
+CREATE TRIGGER attendance_records_stats
+AFTER INSERT ON attendance_records
+BEGIN
+    INSERT INTO professional_stats (professional_id, attendances, last_attendance_at)
+    VALUES (NEW.professional_id, 1, NEW.entry_time)
+    ON CONFLICT (professional_id) DO UPDATE SET
+        attendances = attendances + 1,
+        last_attendance_at = MAX(COALESCE(last_attendance_at, ''), excluded.last_attendance_at);
+
+    INSERT INTO attendance_stats_pending (company, installation_name, attendances)
+    SELECT p.company, l.installation_name, 1
+    FROM professionals p, attendance_lists l
+    WHERE p.id = NEW.professional_id AND l.id = NEW.list_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS attendance_lists_stats_insert
+AFTER INSERT ON attendance_lists
+BEGIN
+    INSERT INTO installation_stats (installation_name, lists) VALUES (NEW.installation_name, 1)
+    ON CONFLICT (installation_name) DO UPDATE SET lists = lists + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS attendance_lists_stats_completed
+AFTER UPDATE OF status ON attendance_lists
+WHEN OLD.status = 'active' AND NEW.status = 'completed'
+BEGIN
+    UPDATE professional_stats
+    SET training_seconds = training_seconds + (
+        SELECT MAX(CAST(ROUND((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER), 0)
+    )
+    WHERE professional_id IN (SELECT professional_id FROM attendance_records WHERE list_id = NEW.id);
+
+    INSERT INTO company_stats (company, training_seconds)
+    SELECT p.company,
+           COUNT(*) * MAX(CAST(ROUND((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER), 0)
+    FROM attendance_records a
+    JOIN professionals p ON p.id = a.professional_id
+    WHERE a.list_id = NEW.id
+    GROUP BY p.company
+    ON CONFLICT (company) DO UPDATE SET training_seconds = training_seconds + excluded.training_seconds;
+
+    UPDATE installation_stats
+    SET completed_lists = completed_lists + 1,
+        session_seconds = session_seconds
+            + MAX(CAST(ROUND((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER), 0),
+        training_seconds = training_seconds
+            + (SELECT COUNT(*) FROM attendance_records WHERE list_id = NEW.id)
+            * MAX(CAST(ROUND((julianday(NEW.end_time) - julianday(NEW.start_time)) * 86400) AS INTEGER), 0)
+    WHERE installation_name = NEW.installation_name;
+END;
+"""
+
+TABLE_COLUMNS = {
+    'professionals': (
+        'id', 'code', 'registration_code', 'name', 'email', 'profession', 'company', 'created_at',
+    ),
+    'attendance_lists': (
+        'id', 'installation_name', 'meeting_date', 'meeting_time', 'duration', 'course_title',
+        'course_content', 'instructor_name', 'instructor_role', 'instructor_qualification',
+        'location', 'start_time', 'end_time', 'status', 'created_at',
+    ),
+    'attendance_records': (
+        'id', 'list_id', 'professional_id', 'meeting_date', 'entry_time', 'local', 'row_number', 'created_at',
+    ),
+}
+
+# Colunas explícitas: em bancos antigos meeting_date foi acrescentada no fim da tabela
+SCHEMA = SCHEMA.format(
+    list_columns=', '.join(TABLE_COLUMNS['attendance_lists']),
+    record_columns=', '.join(TABLE_COLUMNS['attendance_records']),
+    history_columns=', '.join(
+        [f'a.{c}' for c in TABLE_COLUMNS['attendance_records']]
+        + [f'l.{c}' for c in ('installation_name', 'meeting_time', 'course_title', 'instructor_name',
+                              'location', 'status')]
+    ),
+)
+
+_RECORDS_SELECT = f"""
+    SELECT a.*, {', '.join(f'p.{f} AS professional_{f}' for f in RECORD_PROFESSIONAL_FIELDS)}
+    FROM attendance_records_all a
+    LEFT JOIN professionals p ON p.id = a.professional_id
+"""
+
+_PROFESSIONAL_STATS_SELECT = f"""
+    SELECT s.*, {', '.join(f'p.{f} AS professional_{f}' for f in STATS_PROFESSIONAL_FIELDS)}
+    FROM professional_stats s
+    JOIN professionals p ON p.id = s.professional_id
+"""
+
+
+def _now() -> str:
+    # Sempre com microssegundos: a ordenação por texto precisa de largura fixa
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _timestamp(value) -> str:
+    if value is None:
+        return _now()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+
+def _columns(table: str, columns: Optional[Sequence[str]]) -> str:
+    allowed = TABLE_COLUMNS[table]
+    unknown = [c for c in columns or () if c not in allowed]
+    if unknown:
+        raise ValueError(f"Colunas inválidas para {table}: {', '.join(unknown)}")
+    return ', '.join(columns) if columns else '*'
+
+
+def _nest_professional(row: dict, fields: Sequence[str] = RECORD_PROFESSIONAL_FIELDS) -> dict:
+    """Converte as colunas professional_* do JOIN no objeto `professionals` do PostgREST"""
+    row['professionals'] = {f: row.pop(f"professional_{f}") for f in fields}
+    return row
+
+
+def _record_response(record: dict, professional: dict) -> dict:
+    """Mesmo objeto `record` montado pelas funções de check-in de database.sql"""
+    return {
+        'id': record['id'],
+        'list_id': record['list_id'],
+        'professional_id': record['professional_id'],
+        'professional_name': professional['name'],
+        'professional_email': professional['email'],
+        'professional_profession': professional['profession'],
+        'professional_company': professional['company'],
+        'entry_time': record['entry_time'],
+        'local': record['local'],
+        'row_number': record['row_number'],
+        'created_at': record['created_at'],
+    }
+
+
+class SqliteRepository(Repository):
+    """Backend SQLite com uma conexão compartilhada"""
+
+    def __init__(self, path: str = ':memory:'):
+        self.path = path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._read_conn: Optional[aiosqlite.Connection] = None
+        self._write_lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'SqliteRepository':
+        return cls(path=os.environ.get('SQLITE_PATH', ':memory:'))
+
+    async def connect(self):
+        if self._conn is None:
+            self._conn = await aiosqlite.connect(self.path, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            await self._conn.execute("PRAGMA foreign_keys = ON")
+            if self.path != ':memory:':
+                await self._conn.execute("PRAGMA journal_mode = WAL")
+                await self._conn.execute("PRAGMA synchronous = NORMAL")
+            await self._upgrade(self._conn)
+            await self._conn.executescript(SCHEMA)
+            if self.path != ':memory:':
+                self._read_conn = await aiosqlite.connect(
+                    f"{Path(self.path).resolve().as_uri()}?mode=ro", uri=True, isolation_level=None
+                )
+                self._read_conn.row_factory = sqlite3.Row
+            logger.info(f"Banco SQLite pronto ({self.path})")
+
+    @staticmethod
+    async def _upgrade(conn: aiosqlite.Connection):
+        """Acrescenta meeting_date aos registros de bancos criados antes dela"""
+        async with conn.execute("PRAGMA table_info(attendance_records)") as cursor:
+            columns = [row['name'] for row in await cursor.fetchall()]
+        if not columns or 'meeting_date' in columns:
+            return
+        await conn.executescript("""
+            BEGIN;
+            ALTER TABLE attendance_records ADD COLUMN meeting_date TEXT;
+            UPDATE attendance_records
+            SET meeting_date = (SELECT meeting_date FROM attendance_lists WHERE id = attendance_records.list_id);
+            DROP INDEX IF EXISTS idx_attendance_records_professional_id;
+            COMMIT;
+        """)
+        logger.info("Banco SQLite atualizado: attendance_records.meeting_date")
+
+    async def close(self):
+        if self._read_conn is not None:
+            await self._read_conn.close()
+        if self._conn is not None:
+            await self._conn.close()
+        self._read_conn = None
+        self._conn = None
+
+    async def _connection(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            await self.connect()
+        return self._conn
+
+    async def _fetchall(self, sql: str, args: Sequence = ()) -> List[dict]:
+        conn = await self._connection()
+        if self._read_conn is not None:
+            return await self._query(self._read_conn, sql, args)
+        # Banco em memória: a conexão é a mesma da escrita, que pode estar no meio
+        # de um BEGIN IMMEDIATE
+        async with self._write_lock:
+            return await self._query(conn, sql, args)
+
+    @staticmethod
+    async def _query(conn: aiosqlite.Connection, sql: str, args: Sequence) -> List[dict]:
+        async with conn.execute(sql, args) as cursor:
+            return [dict(row) for row in await cursor.fetchall()]
+
+    async def _fetchone(self, sql: str, args: Sequence = ()) -> Optional[dict]:
+        rows = await self._fetchall(sql, args)
+        return rows[0] if rows else None
+
+    async def _transaction(self, fn, *args):
+        """Executa fn(conn, *args) em BEGIN IMMEDIATE ... COMMIT"""
+        async with self._write_lock:
+            conn = await self._connection()
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = await fn(conn, *args)
+            except sqlite3.IntegrityError as e:
+                await conn.execute("ROLLBACK")
+                if 'UNIQUE' in str(e):
+                    raise ConflictError(str(e))
+                raise
+            except BaseException:
+                await conn.execute("ROLLBACK")
+                raise
+            await conn.execute("COMMIT")
+            return result
+
+    async def _count(self, table: str, count: Optional[str], where: str = '', args: Sequence = ()) -> Optional[int]:
+        if count is None:
+            return None
+        row = await self._fetchone(f"SELECT COUNT(*) AS total FROM {table} {where}", args)
+        return row['total']
+
+    async def ping(self):
+        await self._fetchone("SELECT 1")
+
+    # Profissionais
+
+    async def get_professional(self, column: str, value: str) -> Optional[dict]:
+        if column not in PROFESSIONAL_LOOKUP_COLUMNS:
+            raise ValueError(f"Coluna de busca inválida: {column}")
+        return await self._fetchone(f"SELECT * FROM professionals WHERE {column} = ?", (value,))
+
+    async def find_professional_values(self, column: str, values: Sequence[str]) -> set:
+        if column not in PROFESSIONAL_LOOKUP_COLUMNS:
+            raise ValueError(f"Coluna de busca inválida: {column}")
+        existing = set()
+        # Limite de parâmetros por instrução do SQLite
+        for start in range(0, len(values), 500):
+            chunk = list(values[start:start + 500])
+            placeholders = ', '.join('?' * len(chunk))
+            rows = await self._fetchall(f"SELECT {column} FROM professionals WHERE {column} IN ({placeholders})", chunk)
+            existing.update(row[column] for row in rows)
+        return existing
+
+    async def insert_professionals(self, rows: List[dict]) -> List[dict]:
+        async def insert(conn):
+            inserted = []
+            for row in rows:
+                row = {**row, 'id': str(uuid.uuid4()), 'created_at': _now()}
+                columns = _columns('professionals', list(row))
+                await conn.execute(
+                    f"INSERT INTO professionals ({columns}) VALUES ({', '.join('?' * len(row))})",
+                    list(row.values()),
+                )
+                inserted.append(row)
+            return inserted
+        return await self._transaction(insert)
+
+    async def list_professionals(self, columns, limit, after=None, count=None):
+        where, args = '', []
+        if after:
+            where = "WHERE name > ? OR (name = ? AND id > ?)"
+            args = [after[0], after[0], after[1]]
+        rows = await self._fetchall(
+            f"SELECT {_columns('professionals', columns)} FROM professionals {where} ORDER BY name, id LIMIT ?",
+            args + [limit],
+        )
+        return rows, await self._count('professionals', count)
+
+    async def get_registration_counter(self, year: int) -> int:
+        row = await self._fetchone("SELECT value FROM registration_counters WHERE year = ?", (year,))
+        return row['value'] if row else 0
+
+    async def allocate_registration_numbers(self, year: int, count: int) -> int:
+        async def allocate(conn):
+            await conn.execute(
+                "INSERT INTO registration_counters (year, value) VALUES (?, ?) "
+                "ON CONFLICT (year) DO UPDATE SET value = value + excluded.value",
+                (year, count),
+            )
+            async with conn.execute("SELECT value FROM registration_counters WHERE year = ?", (year,)) as cursor:
+                last = (await cursor.fetchone())[0]
+            if last > REGISTRATION_CAPACITY:
+                raise ValueError(f"Códigos de registro esgotados para o ano {year}")
+            return last - count
+        return await self._transaction(allocate)
+
+    # Listas de presença
+
+    async def insert_attendance_list(self, data: dict) -> dict:
+        now = _now()
+        row = {'id': str(uuid.uuid4()), 'start_time': now, 'created_at': now, 'status': 'active', **data}
+        columns = _columns('attendance_lists', list(row))
+
+        async def insert(conn):
+            await conn.execute(
+                f"INSERT INTO attendance_lists ({columns}) VALUES ({', '.join('?' * len(row))})",
+                list(row.values()),
+            )
+        await self._transaction(insert)
+        return await self.get_attendance_list(row['id'])
+
+    async def get_attendance_list(self, list_id: str) -> Optional[dict]:
+        return await self._fetchone("SELECT * FROM attendance_lists_all WHERE id = ?", (list_id,))
+
+    async def update_attendance_list(self, list_id: str, data: dict) -> Optional[dict]:
+        assignments = ', '.join(f"{column} = ?" for column in _columns('attendance_lists', list(data)).split(', '))
+
+        async def update(conn):
+            await conn.execute(f"UPDATE attendance_lists SET {assignments} WHERE id = ?", [*data.values(), list_id])
+        await self._transaction(update)
+        # Só a tabela ativa: lista arquivada não é alterada (None, como nos outros backends)
+        return await self._fetchone("SELECT * FROM attendance_lists WHERE id = ?", (list_id,))
+
+    async def list_attendance_lists(self, columns, limit, after=None, count=None, status=None):
+        conditions, args = [], []
+        if status:
+            conditions.append("status = ?")
+            args.append(status)
+        if after:
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            args += [after[0], after[0], after[1]]
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        rows = await self._fetchall(
+            f"SELECT {_columns('attendance_lists', columns)} FROM attendance_lists {where} "
+            f"ORDER BY created_at DESC, id DESC LIMIT ?",
+            args + [limit],
+        )
+        if status:
+            return rows, await self._count('attendance_lists', count, "WHERE status = ?", (status,))
+        return rows, await self._count('attendance_lists', count)
+
+    async def find_attendance_lists(self, date_from=None, date_to=None, installation_name=None, limit=None,
+                                    after=None):
+        conditions, args = [], []
+        for condition, value in (
+            ('meeting_date >= ?', date_from),
+            ('meeting_date <= ?', date_to),
+            ('installation_name = ?', installation_name),
+        ):
+            if value:
+                conditions.append(condition)
+                args.append(value)
+        if after:
+            conditions.append("(meeting_date, meeting_time, id) > (?, ?, ?)")
+            args += list(after)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        return await self._fetchall(
+            f"SELECT * FROM attendance_lists_all {where} ORDER BY meeting_date, meeting_time, id LIMIT ?",
+            args + [limit if limit is not None else -1],
+        )
+
+    # Registros de presença
+
+    async def register_attendance(self, list_id, code, registration_code) -> dict:
+        async def register(conn):
+            if registration_code is not None:
+                sql, value = "SELECT * FROM professionals WHERE registration_code = ?", registration_code.upper()
+            elif code is not None:
+                sql, value = "SELECT * FROM professionals WHERE code = ?", code
+            else:
+                return {'status': 'professional_not_found'}
+            async with conn.execute(sql, (value,)) as cursor:
+                professional = await cursor.fetchone()
+            if professional is None:
+                return {'status': 'professional_not_found'}
+            professional = dict(professional)
+
+            status = await self._list_status(conn, list_id)
+            if status:
+                return {'status': status}
+
+            async with conn.execute(
+                "SELECT 1 FROM attendance_records WHERE list_id = ? AND professional_id = ?",
+                (list_id, professional['id']),
+            ) as cursor:
+                if await cursor.fetchone():
+                    return {'status': 'duplicate'}
+
+            record = await self._insert_record(conn, list_id, professional['id'], None)
+            return {
+                'status': 'created',
+                'professional': professional,
+                'record': _record_response(record, professional),
+            }
+        return await self._transaction(register)
+
+    async def register_attendance_batch(self, list_id: str, items: List[dict]) -> dict:
+        async def register(conn):
+            status = await self._list_status(conn, list_id)
+            if status:
+                return {'status': status}
+
+            # Resolução de todos os itens: por registration_code ou, na falta dele, pela digital
+            resolved = []
+            for idx, item in enumerate(items):
+                registration_code = (item.get('registration_code') or '').upper() or None
+                if registration_code:
+                    sql, value = "SELECT * FROM professionals WHERE registration_code = ?", registration_code
+                else:
+                    sql, value = "SELECT * FROM professionals WHERE code = ?", item.get('code')
+                async with conn.execute(sql, (value,)) as cursor:
+                    professional = await cursor.fetchone()
+                resolved.append((idx, _timestamp(item.get('entry_time')), dict(professional) if professional else None))
+
+            async with conn.execute(
+                "SELECT professional_id FROM attendance_records WHERE list_id = ?", (list_id,)
+            ) as cursor:
+                registered = {row[0] for row in await cursor.fetchall()}
+
+            # row_number segue a ordem de entry_time; só a primeira leitura de cada profissional conta
+            results = [None] * len(items)
+            for idx, entry_time, professional in sorted(resolved, key=lambda r: (r[1], r[0])):
+                if professional is None:
+                    results[idx] = {'index': idx, 'status': 'not_found', 'record': None}
+                elif professional['id'] in registered:
+                    results[idx] = {'index': idx, 'status': 'duplicate', 'record': None}
+                else:
+                    registered.add(professional['id'])
+                    record = await self._insert_record(conn, list_id, professional['id'], entry_time)
+                    results[idx] = {'index': idx, 'status': 'created', 'record': _record_response(record, professional)}
+            return {'status': 'processed', 'results': results}
+        return await self._transaction(register)
+
+    async def _list_status(self, conn, list_id: str) -> Optional[str]:
+        """Status de erro do check-in (list_not_found / list_not_active) ou None"""
+        async with conn.execute("SELECT status FROM attendance_lists WHERE id = ?", (list_id,)) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return 'list_not_found'
+        if row['status'] != 'active':
+            return 'list_not_active'
+        return None
+
+    async def _insert_record(self, conn, list_id: str, professional_id: str, entry_time: Optional[str]) -> dict:
+        async with conn.execute(
+            "SELECT location, meeting_date, "
+            "(SELECT COALESCE(MAX(row_number), 0) + 1 FROM attendance_records WHERE list_id = ?) "
+            "FROM attendance_lists WHERE id = ?",
+            (list_id, list_id),
+        ) as cursor:
+            location, meeting_date, row_number = await cursor.fetchone()
+        now = _now()
+        record = {
+            'id': str(uuid.uuid4()),
+            'list_id': list_id,
+            'professional_id': professional_id,
+            'meeting_date': meeting_date,
+            'entry_time': entry_time or now,
+            'local': location,
+            'row_number': row_number,
+            'created_at': now,
+        }
+        await conn.execute(
+            "INSERT INTO attendance_records "
+            "(id, list_id, professional_id, meeting_date, entry_time, local, row_number, created_at) "
+            "VALUES (:id, :list_id, :professional_id, :meeting_date, :entry_time, :local, :row_number, :created_at)",
+            record,
+        )
+        return record
+
+    async def get_list_records(self, list_id: str, after_row: Optional[int] = None) -> List[dict]:
+        rows = await self._fetchall(
+            f"{_RECORDS_SELECT} WHERE a.list_id = ? AND a.row_number > ? ORDER BY a.row_number",
+            (list_id, after_row if after_row is not None else 0),
+        )
+        return [_nest_professional(row) for row in rows]
+
+    async def get_records_for_lists(self, list_ids: List[str]) -> Dict[str, List[dict]]:
+        records_by_list = {list_id: [] for list_id in list_ids}
+        if not list_ids:
+            return records_by_list
+        placeholders = ', '.join('?' * len(list_ids))
+        rows = await self._fetchall(
+            f"{_RECORDS_SELECT} WHERE a.list_id IN ({placeholders}) ORDER BY a.list_id, a.row_number",
+            list_ids,
+        )
+        for row in rows:
+            records_by_list[row['list_id']].append(_nest_professional(row))
+        return records_by_list
+
+    async def get_professional_history(self, professional_id, date_from, date_to, limit, after=None):
+        where, args = "professional_id = ? AND meeting_date BETWEEN ? AND ?", [professional_id, date_from, date_to]
+        if after:
+            where += " AND (meeting_date, entry_time, id) > (?, ?, ?)"
+            args += list(after)
+        return await self._fetchall(
+            f"SELECT * FROM attendance_history WHERE {where} ORDER BY meeting_date, entry_time, id LIMIT ?",
+            args + [limit],
+        )
+
+    # Manutenção do histórico
+
+    async def ensure_attendance_partitions(self, months_ahead: int) -> int:
+        # Sem partições no SQLite
+        return 0
+
+    async def archive_attendance_history(self, before: str) -> dict:
+        list_columns = ', '.join(TABLE_COLUMNS['attendance_lists'])
+        record_columns = ', '.join(TABLE_COLUMNS['attendance_records'])
+
+        async def archive(conn):
+            async with conn.execute(
+                "SELECT substr(meeting_date, 1, 7) AS month, SUM(status = 'active') AS active "
+                "FROM attendance_lists WHERE meeting_date < ? GROUP BY 1 ORDER BY 1",
+                (before,),
+            ) as cursor:
+                months = [dict(row) for row in await cursor.fetchall()]
+
+            result = {'status': 'archived', 'months': [], 'lists': 0, 'records': 0, 'skipped': []}
+            for month in months:
+                year, number = map(int, month['month'].split('-'))
+                month_from = f"{month['month']}-01"
+                month_to = f"{year + number // 12:04d}-{number % 12 + 1:02d}-01"
+                # Só meses inteiros antes de `before`
+                if month_to > before:
+                    break
+                if month['active']:
+                    result['skipped'].append(month['month'])
+                    continue
+                bounds = (month_from, month_to)
+                cursor = await conn.execute(
+                    f"INSERT INTO attendance_lists_archive ({list_columns}, archived_at) "
+                    f"SELECT {list_columns}, ? FROM attendance_lists WHERE meeting_date >= ? AND meeting_date < ?",
+                    (_now(), *bounds),
+                )
+                result['lists'] += cursor.rowcount
+                cursor = await conn.execute(
+                    f"INSERT INTO attendance_records_archive ({record_columns}) "
+                    f"SELECT {record_columns} FROM attendance_records WHERE meeting_date >= ? AND meeting_date < ?",
+                    bounds,
+                )
+                result['records'] += cursor.rowcount
+                # Os registros saem junto (ON DELETE CASCADE); os agregados não mudam
+                await conn.execute(
+                    "DELETE FROM attendance_lists WHERE meeting_date >= ? AND meeting_date < ?", bounds
+                )
+                result['months'].append(month['month'])
+            return result
+        return await self._transaction(archive)
+
+    # Agregados de relatório
+
+    async def get_professional_stats(self, professional_id: str) -> Optional[dict]:
+        row = await self._fetchone(f"{_PROFESSIONAL_STATS_SELECT} WHERE s.professional_id = ?", (professional_id,))
+        return _nest_professional(row, STATS_PROFESSIONAL_FIELDS) if row else None
+
+    async def list_professional_stats(self, limit: int, after: Optional[Tuple[int, str]] = None) -> List[dict]:
+        where, args = '', []
+        if after:
+            where = "WHERE s.training_seconds < ? OR (s.training_seconds = ? AND s.professional_id < ?)"
+            args = [int(after[0]), int(after[0]), after[1]]
+        rows = await self._fetchall(
+            f"{_PROFESSIONAL_STATS_SELECT} {where} ORDER BY s.training_seconds DESC, s.professional_id DESC LIMIT ?",
+            args + [limit],
+        )
+        return [_nest_professional(row, STATS_PROFESSIONAL_FIELDS) for row in rows]
+
+    async def list_company_stats(self) -> List[dict]:
+        return await self._fetchall("SELECT * FROM company_stats ORDER BY training_seconds DESC, company")
+
+    async def list_installation_stats(self) -> List[dict]:
+        return await self._fetchall(
+            "SELECT * FROM installation_stats ORDER BY training_seconds DESC, installation_name"
+        )
+
+    async def rollup_attendance_stats(self) -> int:
+        async def rollup(conn):
+            async with conn.execute("SELECT COUNT(*) FROM attendance_stats_pending") as cursor:
+                pending = (await cursor.fetchone())[0]
+            if not pending:
+                return 0
+            await conn.execute(
+                "INSERT INTO company_stats (company, attendances) "
+                "SELECT company, SUM(attendances) FROM attendance_stats_pending GROUP BY company "
+                "ON CONFLICT (company) DO UPDATE SET attendances = attendances + excluded.attendances"
+            )
+            await conn.execute(
+                "INSERT INTO installation_stats (installation_name, attendances) "
+                "SELECT installation_name, SUM(attendances) FROM attendance_stats_pending GROUP BY installation_name "
+                "ON CONFLICT (installation_name) DO UPDATE SET attendances = attendances + excluded.attendances"
+            )
+            await conn.execute("DELETE FROM attendance_stats_pending")
+            return pending
+        return await self._transaction(rollup)
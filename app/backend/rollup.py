@@ -0,0 +1,67 @@
+"""Consolidação periódica dos agregados de empresa e instalação.
+
+O gatilho de check-in só soma professional_stats na transação da presença; as
+presenças por empresa e instalação ficam em attendance_stats_pending e esta
+tarefa as soma a company_stats e installation_stats a cada `interval`
+segundos (rollup_attendance_stats). Com várias réplicas todas podem chamar:
+cada linha pendente é consolidada uma única vez.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class StatsRollup:
+    """Chama rollup_attendance_stats em um laço"""
+
+    def __init__(self, repository, interval: float = 30.0):
+        self.repository = repository
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.rows_applied = 0
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    async def run_once(self) -> int:
+        applied = await self.repository.rollup_attendance_stats() or 0
+        self.rows_applied += applied
+        self.runs += 1
+        self.last_run_at = time.monotonic()
+        self.last_error = None
+        return applied
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Erro na consolidação dos agregados: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            'runs': self.runs,
+            'rows_applied': self.rows_applied,
+            'interval': self.interval,
+            'last_error': self.last_error,
+            'age_seconds': round(time.monotonic() - self.last_run_at, 1) if self.last_run_at else None,
+        }
@@ -0,0 +1,268 @@
+"""Índice de busca em memória dos profissionais (n-gramas de 3 caracteres).
+
+Cada campo pesquisável (name, email, company, registration_code) é
+normalizado (minúsculas, sem acentos) e quebrado em palavras. O índice guarda
+o vocabulário (palavra -> profissionais) e os trigramas de cada palavra do
+vocabulário, com preenchimento à esquerda como o pg_trgm ("  jo", " jo", "joa").
+
+Para cada palavra da consulta, as palavras do vocabulário que dividem
+trigramas com ela recebem uma nota:
+
+- 1.0 quando começam com a palavra digitada (busca por prefixo, enquanto a
+  pessoa digita)
+- senão, a maior entre a similaridade de trigramas (Dice) e a de distância de
+  edição (até 1 erro em palavras de 4+ letras e 2 em 7+), o que tolera
+  letras trocadas, faltando ou sobrando
+
+A nota do profissional é a média, entre as palavras da consulta, da melhor
+nota entre as palavras dele; saem os `limit` melhores com nota >= `min_score`.
+
+O índice é montado no início do processo a partir do banco, atualizado pelas
+rotas de cadastro e reconstruído periodicamente (cadastros feitos por outras
+réplicas).
+"""
+import asyncio
+import heapq
+import logging
+import re
+import time
+import unicodedata
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+SEARCH_FIELDS = ('name', 'email', 'company', 'registration_code')
+
+# Nota mínima para uma palavra do vocabulário contar como correspondência
+WORD_MIN_SCORE = 0.3
+
+# Palavras (as de mais trigramas em comum) que passam pela distância de edição
+MAX_TYPO_CANDIDATES = 200
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def trigrams(word: str, prefix: bool = False) -> Set[str]:
+    """Trigramas de uma palavra; `prefix` omite o fim de palavra (palavra incompleta)"""
+    padded = f"  {word}" if prefix else f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Distância de Damerau-Levenshtein restrita (inserção, remoção, troca e transposição)"""
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (a[i - 1] != b[j - 1]),
+            )
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def allowed_typos(word: str) -> int:
+    return 0 if len(word) < 4 else 1 if len(word) < 7 else 2
+
+
+class ProfessionalIndex:
+    def __init__(self):
+        # palavra -> ids dos profissionais que a contêm
+        self._word_ids: Dict[str, Set[str]] = {}
+        # trigrama -> palavras do vocabulário
+        self._gram_words: Dict[str, Set[str]] = {}
+        # id -> (profissional, nome normalizado para desempate, palavras)
+        self._documents: Dict[str, Tuple[dict, str, Set[str]]] = {}
+        self.built_at: Optional[float] = None
+        self.searches = 0
+
+    def __len__(self):
+        return len(self._documents)
+
+    def add(self, professional: dict):
+        """Indexa (ou reindexa) um profissional"""
+        self.remove(professional['id'])
+        doc_words = set()
+        for field in SEARCH_FIELDS:
+            doc_words.update(words(professional.get(field) or ''))
+        self._documents[professional['id']] = (professional, normalize(professional.get('name')), doc_words)
+        for word in doc_words:
+            ids = self._word_ids.get(word)
+            if ids is None:
+                ids = self._word_ids[word] = set()
+                for gram in trigrams(word):
+                    self._gram_words.setdefault(gram, set()).add(word)
+            ids.add(professional['id'])
+
+    def remove(self, professional_id: str):
+        document = self._documents.pop(professional_id, None)
+        if document is None:
+            return
+        for word in document[2]:
+            ids = self._word_ids[word]
+            ids.discard(professional_id)
+            if not ids:
+                del self._word_ids[word]
+                for gram in trigrams(word):
+                    vocabulary = self._gram_words[gram]
+                    vocabulary.discard(word)
+                    if not vocabulary:
+                        del self._gram_words[gram]
+
+    def replace(self, other: 'ProfessionalIndex'):
+        """Troca o conteúdo pelo de um índice reconstruído"""
+        self._word_ids = other._word_ids
+        self._gram_words = other._gram_words
+        self._documents = other._documents
+        self.built_at = other.built_at
+
+    def match_word(self, query_word: str) -> Dict[str, float]:
+        """Palavras do vocabulário parecidas com `query_word` e suas notas"""
+        grams = trigrams(query_word, prefix=True)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._gram_words.get(gram, ()))
+
+        typos = allowed_typos(query_word)
+        length = len(query_word)
+        typo_budget = MAX_TYPO_CANDIDATES
+        matches = {}
+        for word, count in shared.most_common():
+            if word.startswith(query_word):
+                matches[word] = 1.0
+                continue
+            # Trigramas de `word` completa: len(word) + 1
+            score = 2 * count / (len(grams) + len(word) + 1)
+            # Cada erro de digitação desfaz no máximo 3 trigramas em comum
+            if typos and typo_budget and count >= len(grams) - 3 * typos:
+                typo_budget -= 1
+                # A palavra digitada pode ser só o começo da palavra do cadastro
+                distance = min(edit_distance(query_word, word[:size])
+                               for size in range(max(1, length - typos), length + typos + 1))
+                if distance <= typos:
+                    score = max(score, 1 - distance / (length + 1))
+            if score >= WORD_MIN_SCORE:
+                matches[word] = score
+        return matches
+
+    def search(self, query: str, limit: int = 10, min_score: float = 0.3) -> List[Tuple[float, dict]]:
+        self.searches += 1
+        query_words = list(dict.fromkeys(words(query)))
+        if not query_words:
+            return []
+
+        totals: Dict[str, float] = {}
+        for query_word in query_words:
+            best: Dict[str, float] = {}
+            for word, score in self.match_word(query_word).items():
+                for professional_id in self._word_ids[word]:
+                    if score > best.get(professional_id, 0.0):
+                        best[professional_id] = score
+            for professional_id, score in best.items():
+                totals[professional_id] = totals.get(professional_id, 0.0) + score
+
+        threshold = min_score * len(query_words)
+        scored = [
+            (total / len(query_words), professional_id)
+            for professional_id, total in totals.items() if total >= threshold
+        ]
+        # Maior nota primeiro; empate em ordem alfabética
+        top = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], self._documents[item[1]][1]))
+        return [(score, self._documents[professional_id][0]) for score, professional_id in top]
+
+    def stats(self) -> dict:
+        return {
+            'documents': len(self._documents),
+            'words': len(self._word_ids),
+            'trigrams': len(self._gram_words),
+            'searches': self.searches,
+            'age_seconds': round(time.monotonic() - self.built_at, 1) if self.built_at else None,
+        }
+
+
+class SearchIndexer:
+    """Carrega o índice do banco e o reconstrói a cada `refresh_interval` segundos"""
+
+    def __init__(self, index: ProfessionalIndex,
+                 load_page: Callable[[int, Optional[tuple]], Awaitable[List[dict]]],
+                 refresh_interval: float = 300.0, page_size: int = 1000):
+        self.index = index
+        self.load_page = load_page
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        # Cadastros feitos durante uma reconstrução (a página deles pode já ter passado)
+        self._added: Optional[List[dict]] = None
+
+    def add(self, professional: dict):
+        """Indexa um profissional recém-cadastrado"""
+        self.index.add(professional)
+        if self._added is not None:
+            self._added.append(professional)
+
+    async def rebuild(self):
+        self._added = []
+        try:
+            fresh = await self._load()
+            for professional in self._added:
+                fresh.add(professional)
+        finally:
+            self._added = None
+        self.index.replace(fresh)
+        self._ready.set()
+        logger.info(f"Índice de busca montado ({len(fresh)} profissionais)")
+
+    async def _load(self) -> ProfessionalIndex:
+        fresh = ProfessionalIndex()
+        after = None
+        while True:
+            rows = await self.load_page(self.page_size, after)
+            for row in rows:
+                fresh.add(row)
+            if len(rows) < self.page_size:
+                break
+            after = (rows[-1]['name'], rows[-1]['id'])
+            # Devolve o event loop entre as páginas
+            await asyncio.sleep(0)
+        fresh.built_at = time.monotonic()
+        return fresh
+
+    async def ready(self):
+        await self._ready.wait()
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logger.error(f"Erro ao montar o índice de busca: {str(e)}")
+            await asyncio.sleep(self.refresh_interval)
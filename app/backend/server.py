@@ -1,32 +1,167 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Response
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Response, Query, Request
+from fastapi.responses import StreamingResponse, JSONResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
-from datetime import datetime, timezone, time
-from supabase import create_client, Client
+from pydantic import BaseModel, Field, EmailStr, ValidationError
+from typing import List, Optional, Literal
+from datetime import datetime, timezone, time, date
 import io
-import random
-import string
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_LEFT
+import csv
+import json
+import base64
+import hashlib
+import asyncio
+import zipfile
+import tempfile
+from email.utils import format_datetime, parsedate_to_datetime
+from contextlib import asynccontextmanager
+
+try:
+    import orjson
+except ImportError:  # opcional: sem orjson as respostas usam o json da biblioteca padrão
+    orjson = None
+
+from repository import repository_from_env, ConflictError
+from cache import ProfessionalCache, AttendanceListCache, PdfCache
+from jobs import JobQueue
+from events import Broadcaster
+from health import ReadinessProbe
+from idempotency import IdempotencyStore, IdempotencyMiddleware
+from coalesce import SingleFlight, CoalescingProxy
+from admission import AdmissionControl, AdmissionRejected
+from search import ProfessionalIndex, SearchIndexer
+from history import HistoryMaintenance
+from rollup import StatsRollup
+from metrics import Registry, TimedProxy, MetricsMiddleware
+from registration import registration_code as format_registration_code, CAPACITY as REGISTRATION_CAPACITY
+from pdf import (
+    RenderPool, RenderPoolSaturated, build_attendance_pdf, build_combined_pdf,
+    TEMPLATE_VERSION as PDF_TEMPLATE_VERSION, ROWS_PER_PAGE as PDF_ROWS_PER_PAGE,
+)
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Supabase connection
-supabase_url = os.environ['SUPABASE_URL']
-supabase_key = os.environ['SUPABASE_KEY']
-supabase: Client = create_client(supabase_url, supabase_key)
+# Métricas no formato do Prometheus (/api/metrics)
+metrics = Registry(prefix='lista_')
+request_seconds = metrics.histogram(
+    'http_request_duration_seconds', "Duração das requisições HTTP", ('method', 'route', 'status'),
+)
+db_calls_per_request = metrics.histogram(
+    'db_calls_per_request', "Idas ao banco por requisição", ('route',),
+    buckets=(0, 1, 2, 3, 4, 5, 8, 13, 21),
+)
+db_query_seconds = metrics.histogram(
+    'db_query_duration_seconds', "Duração das operações no banco", ('operation',),
+)
+pdf_render_seconds = metrics.histogram(
+    'pdf_render_duration_seconds', "Tempo de renderização de PDFs no worker", ('function',),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+# Persistência: Supabase (PostgREST), Postgres direto ou SQLite, conforme DB_BACKEND.
+# Cada operação do repositório é medida e contada como uma ida ao banco
+repository = repository_from_env()
+
+# Leituras idênticas simultâneas compartilham uma única consulta. get_list_records
+# fica de fora: a recuperação do feed SSE precisa ver tudo o que já foi publicado.
+read_coalescing = SingleFlight()
+db = CoalescingProxy(
+    TimedProxy(repository, db_query_seconds, exclude=('connect', 'close')),
+    methods=(
+        'get_professional', 'get_attendance_list', 'list_professionals', 'list_attendance_lists',
+        'find_attendance_lists', 'get_professional_history', 'get_professional_stats',
+        'list_professional_stats', 'list_company_stats', 'list_installation_stats',
+    ),
+    group=read_coalescing,
+)
+
+# Cache de profissionais indexado por code e registration_code
+professional_cache = ProfessionalCache(
+    maxsize=int(os.environ.get('PROFESSIONAL_CACHE_SIZE', 5000)),
+    ttl=float(os.environ.get('PROFESSIONAL_CACHE_TTL', 600)),
+)
+
+# Cache de metadados das listas (status, location, start_time)
+list_cache = AttendanceListCache(
+    maxsize=int(os.environ.get('LIST_CACHE_SIZE', 1000)),
+    ttl=float(os.environ.get('LIST_CACHE_TTL', 300)),
+)
+
+# PDFs das listas finalizadas (memória + disco)
+pdf_cache = PdfCache(
+    directory=Path(os.environ.get('PDF_CACHE_DIR', ROOT_DIR / 'pdf_cache')),
+    version=PDF_TEMPLATE_VERSION,
+    max_memory_bytes=int(os.environ.get('PDF_CACHE_MEMORY_MB', 64)) * 1024 * 1024,
+)
+
+# Pool de processos para renderizar PDFs fora do event loop
+render_pool = RenderPool(
+    workers=int(os.environ.get('PDF_WORKERS', 2)),
+    max_queue=int(os.environ.get('PDF_MAX_QUEUE', 8)),
+    on_render=lambda function, seconds: pdf_render_seconds.observe(seconds, function=function),
+)
+
+# Tarefas em segundo plano (ex.: pré-renderizar o PDF ao finalizar uma lista)
+job_queue = JobQueue(workers=int(os.environ.get('JOB_WORKERS', 1)))
+
+# Feed ao vivo dos check-ins: um publicador (os endpoints de registro), muitos ouvintes SSE
+attendance_feed = Broadcaster(max_queue=int(os.environ.get('FEED_MAX_QUEUE', 1000)))
+
+# Busca de profissionais: índice de trigramas em memória, atualizado pelos
+# cadastros e reconstruído a cada SEARCH_INDEX_REFRESH_SECONDS
+professional_index = ProfessionalIndex()
+
+
+async def load_professionals_page(limit: int, after: Optional[tuple]) -> List[dict]:
+    rows, _ = await db.list_professionals(None, limit, after)
+    return rows
+
+
+search_indexer = SearchIndexer(
+    professional_index,
+    load_professionals_page,
+    refresh_interval=float(os.environ.get('SEARCH_INDEX_REFRESH_SECONDS', 300)),
+)
+SEARCH_READY_TIMEOUT = 5.0
+
+# Histórico: partições mensais criadas com HISTORY_PARTITION_MONTHS_AHEAD meses de
+# antecedência e, com HISTORY_ARCHIVE_AFTER_MONTHS > 0, meses finalizados mais
+# antigos que o mês atual e os N anteriores vão para o arquivo (0 = não arquivar)
+history_maintenance = HistoryMaintenance(
+    db,
+    months_ahead=int(os.environ.get('HISTORY_PARTITION_MONTHS_AHEAD', 3)),
+    archive_after_months=int(os.environ.get('HISTORY_ARCHIVE_AFTER_MONTHS', 0)),
+    interval=float(os.environ.get('HISTORY_MAINTENANCE_SECONDS', 21600)),
+)
+
+# Agregados de empresa e instalação: presenças pendentes somadas a cada
+# STATS_ROLLUP_SECONDS (os relatórios ficam atrasados no máximo esse intervalo)
+stats_rollup = StatsRollup(db, interval=float(os.environ.get('STATS_ROLLUP_SECONDS', 30)))
+
+# Check-ins por lista: execução limitada, fila curta e 429 + Retry-After no excedente
+checkin_admission = AdmissionControl(
+    concurrency=int(os.environ.get('CHECKIN_CONCURRENCY_PER_LIST', 2)),
+    max_queue=int(os.environ.get('CHECKIN_MAX_QUEUE_PER_LIST', 100)),
+    max_wait=float(os.environ.get('CHECKIN_MAX_WAIT_SECONDS', 10)),
+)
+
+# Respostas das escritas repetidas com o mesmo cabeçalho Idempotency-Key
+idempotency_store = IdempotencyStore(
+    maxsize=int(os.environ.get('IDEMPOTENCY_MAX_KEYS', 10000)),
+    ttl=float(os.environ.get('IDEMPOTENCY_TTL_SECONDS', 86400)),
+)
+
+# Sonda de prontidão: no máximo uma ida ao banco a cada READINESS_CACHE_SECONDS
+readiness = ReadinessProbe(
+    db.ping,
+    ttl=float(os.environ.get('READINESS_CACHE_SECONDS', 5)),
+    timeout=float(os.environ.get('READINESS_TIMEOUT_SECONDS', 2)),
+)
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -39,12 +174,98 @@ api_router = APIRouter(prefix="/api")
 # UTILITY FUNCTIONS
 # ===========================
 
-def generate_registration_code():
-    """Gera um código único de registro no formato PRF-YYYY-XXXX"""
+async def allocate_registration_codes(count: int = 1) -> List[str]:
+    """Reserva `count` códigos PRF-YYYY-XXXX únicos em uma única chamada ao banco"""
     year = datetime.now().year
-    # Gera 4 caracteres alfanuméricos aleatórios
-    random_part = ''.join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"PRF-{year}-{random_part}"
+    first = await db.allocate_registration_numbers(year, count)
+    return [format_registration_code(year, first + i) for i in range(count)]
+
+
+def professional_conflict_field(error: ConflictError) -> Optional[str]:
+    """Coluna de professionals cuja unicidade foi violada: registration_code, code ou email.
+
+    A mensagem traz o nome da restrição (professionals_code_key, Postgres e
+    PostgREST) ou a coluna (professionals.code, SQLite).
+    """
+    message = error.message
+    if 'registration_code' in message:
+        return 'registration_code'
+    if 'professionals_code_key' in message or 'professionals.code' in message:
+        return 'code'
+    if 'email' in message:
+        return 'email'
+    return None
+
+
+# Paginação por cursor (keyset) das listagens
+PAGE_SIZE_DEFAULT = 100
+PAGE_SIZE_MAX = 1000
+
+
+def encode_cursor(values: list) -> str:
+    """Codifica os valores da chave de ordenação da última linha da página"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodifica um cursor gerado por encode_cursor"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return values
+
+
+def select_columns(fields: Optional[str], model, required: tuple) -> Optional[List[str]]:
+    """Monta a projeção a partir de fields=a,b,c (sempre inclui as colunas do cursor)"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(unknown)}")
+    return list(required) + [f for f in requested if f not in required]
+
+
+def json_bytes(content) -> bytes:
+    """Serializa para JSON compacto (orjson quando instalado)"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class FastJSONResponse(JSONResponse):
+    """Resposta para linhas vindas do banco, já reduzidas com project_row.
+    
+    Devolver a Response pronta faz o FastAPI pular a revalidação pelo modelo e o
+    jsonable_encoder; o response_model continua valendo para a documentação.
+    """
+    
+    def render(self, content) -> bytes:
+        return json_bytes(content)
+
+
+def project_row(row: dict, model) -> dict:
+    """Mantém só os campos do response_model, na ordem do modelo.
+    
+    Sem a validação do FastAPI, colunas a mais da consulta (chave de partição,
+    colunas internas) iriam para o cliente. Campos omitidos por fields= continuam omitidos.
+    """
+    return {name: row[name] for name in model.model_fields if name in row}
+
+
+def paginated_response(rows: list, limit: int, cursor_fields: tuple, total: Optional[int], model) -> Response:
+    """Corta a página, calcula o próximo cursor e devolve os cabeçalhos de paginação"""
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_cursor([rows[-1][f] for f in cursor_fields])
+    if total is not None:
+        headers['X-Total-Count'] = str(total)
+    # O cursor pode usar colunas fora do modelo: projetar só depois de calculá-lo
+    return FastJSONResponse(content=[project_row(row, model) for row in rows], headers=headers)
 
 
 # ===========================
@@ -68,6 +289,25 @@ class ProfessionalResponse(BaseModel):
     company: str
     created_at: str
 
+class ProfessionalSearchResult(ProfessionalResponse):
+    score: float  # 1.0 = todas as palavras casam por prefixo
+
+class ProfessionalImportItemResult(BaseModel):
+    index: int
+    status: str  # created | exists | duplicate | invalid | failed
+    id: Optional[str] = None
+    registration_code: Optional[str] = None
+    error: Optional[str] = None
+
+class ProfessionalImportResponse(BaseModel):
+    total: int
+    created: int
+    exists: int
+    duplicate: int
+    invalid: int
+    failed: int
+    results: List[ProfessionalImportItemResult]
+
 class AttendanceListCreate(BaseModel):
     installation_name: str
     meeting_date: str  # YYYY-MM-DD
@@ -114,6 +354,73 @@ class AttendanceRecordResponse(BaseModel):
     row_number: int
     created_at: str
 
+class AttendanceBatchItem(BaseModel):
+    code: Optional[str] = None  # credential_id (biometria)
+    registration_code: Optional[str] = None  # código de registro (manual)
+    entry_time: Optional[datetime] = None  # horário da leitura no quiosque
+
+class AttendanceBatchCreate(BaseModel):
+    list_id: str
+    items: List[AttendanceBatchItem] = Field(..., min_length=1, max_length=1000)
+
+class AttendanceBatchItemResult(BaseModel):
+    index: int
+    status: str  # created | duplicate | not_found | invalid
+    record: Optional[AttendanceRecordResponse] = None
+
+class AttendanceBatchResponse(BaseModel):
+    list_id: str
+    created: int
+    duplicate: int
+    not_found: int
+    invalid: int
+    results: List[AttendanceBatchItemResult]
+
+class ProfessionalStatsResponse(BaseModel):
+    professional_id: str
+    name: str
+    company: str
+    registration_code: Optional[str] = None
+    attendances: int
+    training_seconds: int
+    training_hours: float  # soma das durações das listas finalizadas
+    last_attendance_at: Optional[str] = None
+
+class CompanyStatsResponse(BaseModel):
+    company: str
+    attendances: int
+    training_seconds: int
+    training_hours: float
+
+class InstallationStatsResponse(BaseModel):
+    installation_name: str
+    lists: int
+    completed_lists: int
+    attendances: int
+    session_seconds: int
+    training_seconds: int  # horas-homem: duração da lista x participantes
+    training_hours: float
+
+class HistoryListResponse(AttendanceListResponse):
+    archived_at: Optional[str] = None  # preenchido nas listas que já estão no arquivo
+
+class ProfessionalHistoryRecord(BaseModel):
+    id: str
+    list_id: str
+    professional_id: str
+    meeting_date: str
+    entry_time: str
+    local: str
+    row_number: int
+    created_at: str
+    installation_name: str
+    meeting_time: str
+    course_title: str
+    instructor_name: str
+    location: str
+    status: str
+    archived_at: Optional[str] = None
+
 
 # ===========================
 # PROFESSIONALS ENDPOINTS
@@ -124,39 +431,41 @@ async def create_professional(professional: ProfessionalCreate):
     """Cadastrar um novo profissional com biometria e código de registro único"""
     try:
         # Verificar se já existe profissional com esse code (credential_id)
-        existing = supabase.table('professionals').select('*').eq('code', professional.code).execute()
+        if professional_cache.get_by_code(professional.code):
+            raise HTTPException(status_code=400, detail="Profissional já cadastrado com esta digital")
         
-        if existing.data and len(existing.data) > 0:
+        if await db.get_professional('code', professional.code):
             raise HTTPException(status_code=400, detail="Profissional já cadastrado com esta digital")
         
         # Verificar se já existe email
-        existing_email = supabase.table('professionals').select('*').eq('email', professional.email).execute()
-        if existing_email.data and len(existing_email.data) > 0:
+        if await db.get_professional('email', professional.email):
             raise HTTPException(status_code=400, detail="Email já cadastrado")
         
-        # Gerar código de registro único
-        max_attempts = 10
-        registration_code = None
-        
-        for _ in range(max_attempts):
-            registration_code = generate_registration_code()
-            # Verificar se o código já existe
-            existing_code = supabase.table('professionals').select('*').eq('registration_code', registration_code).execute()
-            if not existing_code.data or len(existing_code.data) == 0:
-                break
-        
-        if not registration_code:
-            raise HTTPException(status_code=500, detail="Não foi possível gerar código único")
-        
-        # Inserir novo profissional com código de registro
+        # Inserir novo profissional com código de registro reservado no contador do ano.
+        # Os códigos do contador nunca se repetem; só um código aleatório legado
+        # pode colidir, e nesse caso o próximo número é reservado
         data = professional.model_dump()
-        data['registration_code'] = registration_code
-        result = supabase.table('professionals').insert(data).execute()
-        
-        if not result.data or len(result.data) == 0:
+        for attempt in range(3):
+            data['registration_code'] = (await allocate_registration_codes())[0]
+            try:
+                inserted = await db.insert_professionals([data])
+                break
+            except ConflictError as e:
+                # Cadastro simultâneo com a mesma digital ou email: mesma resposta das verificações acima
+                field = professional_conflict_field(e)
+                if field == 'code':
+                    raise HTTPException(status_code=400, detail="Profissional já cadastrado com esta digital")
+                if field == 'email':
+                    raise HTTPException(status_code=400, detail="Email já cadastrado")
+                if field != 'registration_code' or attempt == 2:
+                    raise
+        
+        if not inserted:
             raise HTTPException(status_code=500, detail="Erro ao cadastrar profissional")
         
-        return result.data[0]
+        professional_cache.put(inserted[0])
+        search_indexer.add(inserted[0])
+        return inserted[0]
     
     except HTTPException:
         raise
@@ -165,16 +474,145 @@ async def create_professional(professional: ProfessionalCreate):
         raise HTTPException(status_code=500, detail=f"Erro ao criar profissional: {str(e)}")
 
 
+IMPORT_MAX_ROWS = 5000
+IMPORT_INSERT_BATCH = 500
+
+
+@api_router.post("/professionals/import", response_model=ProfessionalImportResponse)
+async def import_professionals(request: Request):
+    """Cadastrar profissionais em lote a partir de CSV (text/csv) ou de um array JSON"""
+    try:
+        body = await request.body()
+        if 'text/csv' in request.headers.get('content-type', ''):
+            rows = list(csv.DictReader(io.StringIO(body.decode('utf-8-sig'))))
+        else:
+            rows = json.loads(body or b'[]')
+            if not isinstance(rows, list):
+                raise HTTPException(status_code=400, detail="Envie um array JSON de profissionais ou um CSV")
+        
+        if not rows:
+            raise HTTPException(status_code=400, detail="Nenhum profissional para importar")
+        if len(rows) > IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=400, detail=f"Máximo de {IMPORT_MAX_ROWS} profissionais por importação")
+        
+        # 1. Validar tudo em memória, incluindo repetições dentro do próprio arquivo
+        results = [{'index': i, 'status': None} for i in range(len(rows))]
+        candidates = []  # (índice, dados validados)
+        seen_codes, seen_emails = set(), set()
+        
+        for i, row in enumerate(rows):
+            try:
+                professional = ProfessionalCreate.model_validate(row).model_dump()
+            except ValidationError as e:
+                error = e.errors()[0]
+                results[i].update(status='invalid', error=f"{'.'.join(map(str, error['loc']))}: {error['msg']}")
+                continue
+            if professional['code'] in seen_codes or professional['email'] in seen_emails:
+                results[i].update(status='duplicate', error="Repetido no arquivo")
+                continue
+            seen_codes.add(professional['code'])
+            seen_emails.add(professional['email'])
+            candidates.append((i, professional))
+        
+        # 2. Digitais e emails já cadastrados, em consultas por conjunto
+        existing_codes = await db.find_professional_values('code', [p['code'] for _, p in candidates])
+        existing_emails = await db.find_professional_values('email', [p['email'] for _, p in candidates])
+        
+        to_insert = []
+        for i, professional in candidates:
+            if professional['code'] in existing_codes:
+                results[i].update(status='exists', error="Profissional já cadastrado com esta digital")
+            elif professional['email'] in existing_emails:
+                results[i].update(status='exists', error="Email já cadastrado")
+            else:
+                to_insert.append((i, professional))
+        
+        # 3. Códigos de registro reservados de uma vez e inserção em lotes
+        if to_insert:
+            codes = await allocate_registration_codes(len(to_insert))
+            for (_, professional), code in zip(to_insert, codes):
+                professional['registration_code'] = code
+        
+        for start in range(0, len(to_insert), IMPORT_INSERT_BATCH):
+            batch = to_insert[start:start + IMPORT_INSERT_BATCH]
+            try:
+                inserted_rows = await db.insert_professionals([p for _, p in batch])
+            except ConflictError as e:
+                # Um cadastro concorrente pode ter ocupado um email/digital: o lote inteiro é recusado
+                for i, _ in batch:
+                    results[i].update(status='failed', error=e.message)
+                continue
+            
+            inserted = {row['code']: row for row in inserted_rows}
+            for i, professional in batch:
+                row = inserted.get(professional['code'])
+                if row:
+                    professional_cache.put(row)
+                    search_indexer.add(row)
+                    results[i].update(status='created', id=row['id'], registration_code=row['registration_code'])
+                else:
+                    results[i].update(status='failed', error="Erro ao cadastrar profissional")
+        
+        summary = {'created': 0, 'exists': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+        for item_result in results:
+            summary[item_result['status']] += 1
+        
+        return {'total': len(rows), **summary, 'results': results}
+    
+    except HTTPException:
+        raise
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Arquivo inválido: {str(e)}")
+    except Exception as e:
+        logger.error(f"Erro ao importar profissionais: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao importar profissionais: {str(e)}")
+
+
+@api_router.get("/professionals/search", response_model=List[ProfessionalSearchResult])
+async def search_professionals(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+):
+    """Buscar profissionais por nome, email, empresa ou código de registro
+    (prefixo e tolerância a erros de digitação), em ordem de relevância"""
+    try:
+        try:
+            await asyncio.wait_for(search_indexer.ready(), SEARCH_READY_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status_code=503,
+                detail="Índice de busca em construção. Tente novamente em instantes.",
+                headers={"Retry-After": "5"},
+            )
+        
+        results = professional_index.search(q, limit)
+        return FastJSONResponse(content=[
+            project_row({**professional, 'score': round(score, 3)}, ProfessionalSearchResult)
+            for score, professional in results
+        ])
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao buscar profissionais: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao buscar profissionais: {str(e)}")
+
+
 @api_router.get("/professionals/by-code/{code}", response_model=ProfessionalResponse)
 async def get_professional_by_code(code: str):
     """Buscar profissional pelo código da digital (credential_id)"""
     try:
-        result = supabase.table('professionals').select('*').eq('code', code).execute()
+        cached = professional_cache.get_by_code(code)
+        if cached:
+            return cached
+        
+        professional = await db.get_professional('code', code)
         
-        if not result.data or len(result.data) == 0:
+        if not professional:
             raise HTTPException(status_code=404, detail="Profissional não encontrado")
         
-        return result.data[0]
+        professional_cache.put(professional)
+        return professional
     
     except HTTPException:
         raise
@@ -187,12 +625,17 @@ async def get_professional_by_code(code: str):
 async def get_professional_by_registration(registration_code: str):
     """Buscar profissional pelo código de registro único"""
     try:
-        result = supabase.table('professionals').select('*').eq('registration_code', registration_code.upper()).execute()
+        cached = professional_cache.get_by_registration(registration_code)
+        if cached:
+            return cached
+        
+        professional = await db.get_professional('registration_code', registration_code.upper())
         
-        if not result.data or len(result.data) == 0:
+        if not professional:
             raise HTTPException(status_code=404, detail="Código de registro não encontrado")
         
-        return result.data[0]
+        professional_cache.put(professional)
+        return professional
     
     except HTTPException:
         raise
@@ -201,13 +644,42 @@ async def get_professional_by_registration(registration_code: str):
         raise HTTPException(status_code=500, detail=f"Erro ao buscar profissional: {str(e)}")
 
 
+@api_router.get("/registration-codes/capacity")
+async def get_registration_capacity(year: Optional[int] = None):
+    """Quantos códigos de registro ainda podem ser emitidos no ano"""
+    try:
+        year = year or datetime.now().year
+        allocated = await db.get_registration_counter(year)
+        return {
+            "year": year,
+            "allocated": allocated,
+            "capacity": REGISTRATION_CAPACITY,
+            "remaining": REGISTRATION_CAPACITY - allocated,
+        }
+    
+    except Exception as e:
+        logger.error(f"Erro ao consultar capacidade de códigos: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar capacidade de códigos: {str(e)}")
+
+
 @api_router.get("/professionals", response_model=List[ProfessionalResponse])
-async def list_professionals():
-    """Listar todos os profissionais"""
+async def list_professionals(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    count: Optional[Literal['exact', 'planned', 'estimated']] = None,
+):
+    """Listar profissionais em ordem de nome, paginados por cursor (cabeçalho X-Next-Cursor)"""
     try:
-        result = supabase.table('professionals').select('*').order('name').execute()
-        return result.data
+        columns = select_columns(fields, ProfessionalResponse, ('id', 'name'))
+        after = tuple(decode_cursor(cursor, 2)) if cursor else None
+        
+        # Uma linha a mais para saber se existe próxima página
+        rows, total = await db.list_professionals(columns, limit + 1, after, count)
+        return paginated_response(rows, limit, ('name', 'id'), total, ProfessionalResponse)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar profissionais: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao listar profissionais: {str(e)}")
@@ -224,12 +696,13 @@ async def create_attendance_list(attendance_list: AttendanceListCreate):
         data = attendance_list.model_dump()
         data['status'] = 'active'
         
-        result = supabase.table('attendance_lists').insert(data).execute()
+        created = await db.insert_attendance_list(data)
         
-        if not result.data or len(result.data) == 0:
+        if not created:
             raise HTTPException(status_code=500, detail="Erro ao criar lista de presença")
         
-        return result.data[0]
+        list_cache.put(created)
+        return created
     
     except Exception as e:
         logger.error(f"Erro ao criar lista de presença: {str(e)}")
@@ -240,12 +713,13 @@ async def create_attendance_list(attendance_list: AttendanceListCreate):
 async def get_attendance_list(list_id: str):
     """Buscar uma lista de presença específica"""
     try:
-        result = supabase.table('attendance_lists').select('*').eq('id', list_id).execute()
+        attendance_list = await db.get_attendance_list(list_id)
         
-        if not result.data or len(result.data) == 0:
+        if not attendance_list:
             raise HTTPException(status_code=404, detail="Lista de presença não encontrada")
         
-        return result.data[0]
+        list_cache.put(attendance_list)
+        return attendance_list
     
     except HTTPException:
         raise
@@ -255,12 +729,24 @@ async def get_attendance_list(list_id: str):
 
 
 @api_router.get("/attendance-lists", response_model=List[AttendanceListResponse])
-async def list_attendance_lists():
-    """Listar todas as listas de presença"""
+async def list_attendance_lists(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    count: Optional[Literal['exact', 'planned', 'estimated']] = None,
+    status: Optional[Literal['active', 'completed']] = None,
+):
+    """Listar listas de presença (mais recentes primeiro), paginadas por cursor.
+    status=active devolve só as listas abertas para check-in"""
     try:
-        result = supabase.table('attendance_lists').select('*').order('created_at', desc=True).execute()
-        return result.data
+        columns = select_columns(fields, AttendanceListResponse, ('id', 'created_at'))
+        after = tuple(decode_cursor(cursor, 2)) if cursor else None
+        
+        rows, total = await db.list_attendance_lists(columns, limit + 1, after, count, status)
+        return paginated_response(rows, limit, ('created_at', 'id'), total, AttendanceListResponse)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao listar listas de presença: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao listar listas: {str(e)}")
@@ -270,14 +756,12 @@ async def list_attendance_lists():
 async def complete_attendance_list(list_id: str):
     """Finalizar uma lista de presença e calcular duração"""
     try:
-        # Buscar a lista
-        list_result = supabase.table('attendance_lists').select('*').eq('id', list_id).execute()
+        # Buscar a lista (só o start_time é necessário)
+        attendance_list = list_cache.get(list_id) or await db.get_attendance_list(list_id)
         
-        if not list_result.data or len(list_result.data) == 0:
+        if not attendance_list:
             raise HTTPException(status_code=404, detail="Lista não encontrada")
         
-        attendance_list = list_result.data[0]
-        
         # Calcular duração
         start_time = datetime.fromisoformat(attendance_list['start_time'].replace('Z', '+00:00'))
         end_time = datetime.now(timezone.utc)
@@ -298,12 +782,28 @@ async def complete_attendance_list(list_id: str):
             'duration': duration_str
         }
         
-        result = supabase.table('attendance_lists').update(update_data).eq('id', list_id).execute()
+        completed = await db.update_attendance_list(list_id, update_data)
         
-        if not result.data or len(result.data) == 0:
+        if not completed:
+            # A atualização só alcança a tabela ativa (a entrada do cache pode ser
+            # de antes do arquivamento da lista)
+            archived = await db.get_attendance_list(list_id)
+            if archived and archived.get('archived_at'):
+                raise HTTPException(status_code=409, detail="Lista arquivada não pode ser alterada")
             raise HTTPException(status_code=500, detail="Erro ao finalizar lista")
         
-        return {"message": "Lista finalizada com sucesso", "duration": duration_str}
+        # 'completed' é um estado final: a entrada atualizada pode ficar no cache
+        # e recusar novos check-ins sem ida ao banco
+        list_cache.put(completed)
+        
+        # O documento não muda mais: renderizar agora, fora da requisição, para que o
+        # primeiro download já seja uma leitura do cache
+        job = job_queue.submit('prerender_pdf', prerender_list_pdf, list_id, key=f"pdf:{list_id}")
+        
+        # Encerrar os feeds ao vivo desta lista
+        attendance_feed.publish(list_id, 'completed', {'list_id': list_id, 'duration': duration_str})
+        
+        return {"message": "Lista finalizada com sucesso", "duration": duration_str, "pdf_job_id": job.id}
     
     except HTTPException:
         raise
@@ -316,6 +816,29 @@ async def complete_attendance_list(list_id: str):
 # ATTENDANCE RECORDS ENDPOINTS
 # ===========================
 
+# Status devolvidos pela função register_attendance (database.sql) -> erro HTTP
+CHECK_IN_ERRORS = {
+    'professional_not_found': (404, "Profissional não encontrado. Verifique o código e tente novamente."),
+    'list_not_found': (404, "Lista de presença não encontrada"),
+    'list_not_active': (400, "Esta lista de presença já foi finalizada"),
+    'duplicate': (400, "Presença já registrada nesta lista"),
+}
+
+
+@asynccontextmanager
+async def checkin_slot(list_id: str):
+    """Vaga de escrita na lista; 429 com Retry-After quando a fila dela está cheia"""
+    try:
+        async with checkin_admission.slot(list_id):
+            yield
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Muitos check-ins nesta lista no momento. Tente novamente em instantes.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+
 @api_router.post("/attendance-records", response_model=AttendanceRecordResponse)
 async def create_attendance_record(record: AttendanceRecordCreate):
     """Registrar presença usando biometria OU código de registro"""
@@ -324,326 +847,630 @@ async def create_attendance_record(record: AttendanceRecordCreate):
         if not record.code and not record.registration_code:
             raise HTTPException(status_code=400, detail="Forneça o código biométrico ou o código de registro")
         
-        # Buscar profissional pelo método fornecido
-        professional = None
+        # Lista já finalizada segundo o cache: recusar sem ir ao banco
+        cached_list = list_cache.get(record.list_id)
+        if cached_list and cached_list['status'] != 'active':
+            raise HTTPException(status_code=400, detail=CHECK_IN_ERRORS['list_not_active'][1])
         
-        if record.registration_code:
-            # Buscar por código de registro
-            prof_result = supabase.table('professionals').select('*').eq('registration_code', record.registration_code.upper()).execute()
-            if prof_result.data and len(prof_result.data) > 0:
-                professional = prof_result.data[0]
-        elif record.code:
-            # Buscar por código biométrico
-            prof_result = supabase.table('professionals').select('*').eq('code', record.code).execute()
-            if prof_result.data and len(prof_result.data) > 0:
-                professional = prof_result.data[0]
+        # Toda a operação (busca do profissional, validação da lista, verificação
+        # de duplicidade e row_number) roda em uma única transação no banco
+        async with checkin_slot(record.list_id):
+            outcome = await db.register_attendance(
+                record.list_id, record.code or None, record.registration_code or None
+            )
+        status = outcome.get('status')
         
-        if not professional:
-            raise HTTPException(status_code=404, detail="Profissional não encontrado. Verifique o código e tente novamente.")
+        if status in CHECK_IN_ERRORS:
+            status_code, detail = CHECK_IN_ERRORS[status]
+            raise HTTPException(status_code=status_code, detail=detail)
         
-        # Buscar lista de presença
-        list_result = supabase.table('attendance_lists').select('*').eq('id', record.list_id).execute()
-        
-        if not list_result.data or len(list_result.data) == 0:
-            raise HTTPException(status_code=404, detail="Lista de presença não encontrada")
+        if status != 'created':
+            raise HTTPException(status_code=500, detail="Erro ao registrar presença")
         
-        attendance_list = list_result.data[0]
+        # A função devolve a linha completa do profissional: aproveitar para aquecer o cache
+        if outcome.get('professional'):
+            professional_cache.put(outcome['professional'])
         
-        if attendance_list['status'] != 'active':
-            raise HTTPException(status_code=400, detail="Esta lista de presença já foi finalizada")
+        created = project_row(outcome['record'], AttendanceRecordResponse)
+        attendance_feed.publish(record.list_id, 'record', created)
         
-        # Verificar se já registrou presença nesta lista
-        existing = supabase.table('attendance_records').select('*').eq('list_id', record.list_id).eq('professional_id', professional['id']).execute()
+        return FastJSONResponse(content=created)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao registrar presença: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao registrar presença: {str(e)}")
+
+
+@api_router.post("/attendance-records/batch", response_model=AttendanceBatchResponse)
+async def create_attendance_records_batch(batch: AttendanceBatchCreate):
+    """Registrar em lote as leituras enfileiradas por um quiosque offline"""
+    try:
+        cached_list = list_cache.get(batch.list_id)
+        if cached_list and cached_list['status'] != 'active':
+            raise HTTPException(status_code=400, detail=CHECK_IN_ERRORS['list_not_active'][1])
+        
+        items = [
+            {
+                'code': item.code or None,
+                'registration_code': item.registration_code or None,
+                'entry_time': item.entry_time.isoformat() if item.entry_time else None,
+            }
+            for item in batch.items
+        ]
         
-        if existing.data and len(existing.data) > 0:
-            raise HTTPException(status_code=400, detail="Presença já registrada nesta lista")
+        # Resolução dos profissionais e INSERT em lote em uma única transação
+        async with checkin_slot(batch.list_id):
+            outcome = await db.register_attendance_batch(batch.list_id, items)
+        status = outcome.get('status')
         
-        # Contar registros existentes para definir row_number
-        count_result = supabase.table('attendance_records').select('*', count='exact').eq('list_id', record.list_id).execute()
-        row_number = count_result.count + 1
+        if status in CHECK_IN_ERRORS:
+            status_code, detail = CHECK_IN_ERRORS[status]
+            raise HTTPException(status_code=status_code, detail=detail)
         
-        # Criar registro de presença
-        record_data = {
-            'list_id': record.list_id,
-            'professional_id': professional['id'],
-            'local': attendance_list['location'],
-            'row_number': row_number
-        }
+        if status != 'processed':
+            raise HTTPException(status_code=500, detail="Erro ao registrar presenças")
         
-        insert_result = supabase.table('attendance_records').insert(record_data).execute()
+        results = outcome['results']
+        for item, item_result in zip(items, results):
+            if not item['code'] and not item['registration_code']:
+                item_result['status'] = 'invalid'
         
-        if not insert_result.data or len(insert_result.data) == 0:
-            raise HTTPException(status_code=500, detail="Erro ao registrar presença")
+        summary = {'created': 0, 'duplicate': 0, 'not_found': 0, 'invalid': 0}
+        for item_result in results:
+            summary[item_result['status']] += 1
+            if item_result.get('record') is not None:
+                item_result['record'] = project_row(item_result['record'], AttendanceRecordResponse)
         
-        # Retornar com dados do profissional
-        response_data = insert_result.data[0]
-        response_data['professional_name'] = professional['name']
-        response_data['professional_email'] = professional['email']
-        response_data['professional_profession'] = professional['profession']
-        response_data['professional_company'] = professional['company']
+        created = [item_result['record'] for item_result in results if item_result['status'] == 'created']
+        for created_record in sorted(created, key=lambda r: r['row_number']):
+            attendance_feed.publish(batch.list_id, 'record', created_record)
         
-        return response_data
+        return FastJSONResponse(content={'list_id': batch.list_id, **summary, 'results': results})
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao registrar presença: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao registrar presença: {str(e)}")
+        logger.error(f"Erro ao registrar presenças em lote: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao registrar presenças em lote: {str(e)}")
+
 
+def flatten_record(record: dict) -> dict:
+    """Achatar, no próprio dict, uma linha de attendance_records com o JOIN de professionals"""
+    prof = record.pop('professionals', None) or {}
+    record['professional_name'] = prof.get('name', '')
+    record['professional_email'] = prof.get('email', '')
+    record['professional_profession'] = prof.get('profession', '')
+    record['professional_company'] = prof.get('company', '')
+    return record
 
-@api_router.get("/attendance-records/list/{list_id}")
+
+@api_router.get("/attendance-records/list/{list_id}", response_model=List[AttendanceRecordResponse])
 async def get_attendance_records_by_list(list_id: str):
     """Buscar todos os registros de presença de uma lista"""
     try:
-        # Buscar registros com JOIN (usando Supabase's foreign key)
-        result = supabase.table('attendance_records').select(
-            '*, professionals(name, email, profession, company)'
-        ).eq('list_id', list_id).order('row_number').execute()
+        # Buscar registros com os dados do profissional (JOIN)
+        rows = await db.get_list_records(list_id)
         
         # Formatar resposta
-        records = []
-        for record in result.data:
-            prof = record.get('professionals', {})
-            records.append({
-                'id': record['id'],
-                'list_id': record['list_id'],
-                'professional_id': record['professional_id'],
-                'professional_name': prof.get('name', ''),
-                'professional_email': prof.get('email', ''),
-                'professional_profession': prof.get('profession', ''),
-                'professional_company': prof.get('company', ''),
-                'entry_time': record['entry_time'],
-                'local': record['local'],
-                'row_number': record['row_number'],
-                'created_at': record['created_at']
-            })
-        
-        return records
+        return FastJSONResponse(content=[
+            project_row(flatten_record(record), AttendanceRecordResponse) for record in rows
+        ])
     
     except Exception as e:
         logger.error(f"Erro ao buscar registros: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro ao buscar registros: {str(e)}")
 
 
+# ===========================
+# LIVE FEED (SSE)
+# ===========================
+
+FEED_KEEPALIVE_SECONDS = float(os.environ.get('FEED_KEEPALIVE_SECONDS', 15))
+FEED_RETRY_MS = 3000
+
+
+def sse_message(event: str, data, event_id: Optional[int] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json_bytes(data).decode()}")
+    return "\n".join(lines) + "\n\n"
+
+
+@api_router.get("/attendance-records/list/{list_id}/stream")
+async def stream_attendance_records(list_id: str, request: Request, after: Optional[int] = Query(None, ge=0)):
+    """Feed ao vivo (Server-Sent Events) dos novos registros de uma lista.
+    
+    Cada evento `record` leva o row_number como id. Ao reconectar, o navegador
+    reenvia o último id em Last-Event-ID (ou o cliente passa ?after=N) e os
+    registros perdidos são enviados em uma única consulta antes do feed ao vivo.
+    Sem id/after, somente os registros criados a partir da conexão são enviados.
+    """
+    last_event_id = request.headers.get('last-event-id')
+    if last_event_id and last_event_id.isdigit():
+        after = int(last_event_id)
+    
+    # Inscrever antes da consulta de recuperação para não perder registros entre as duas
+    subscription = attendance_feed.subscribe(list_id)
+    
+    async def events():
+        try:
+            yield f"retry: {FEED_RETRY_MS}\n\n"
+            last_row = after or 0
+            
+            if after is not None:
+                for row in await db.get_list_records(list_id, after_row=after):
+                    record = project_row(flatten_record(row), AttendanceRecordResponse)
+                    last_row = record['row_number']
+                    yield sse_message('record', record, last_row)
+            
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(subscription.queue.get(), FEED_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                # Ouvinte lento perdeu eventos: encerrar para o cliente reconectar com Last-Event-ID
+                if subscription.overflowed:
+                    return
+                
+                if event == 'record':
+                    # Já enviado pela consulta de recuperação
+                    if data['row_number'] <= last_row:
+                        continue
+                    last_row = data['row_number']
+                    yield sse_message('record', data, last_row)
+                else:
+                    yield sse_message(event, data)
+                    if event == 'completed':
+                        return
+        
+        except Exception as e:
+            logger.error(f"Erro no feed ao vivo da lista {list_id}: {str(e)}")
+        finally:
+            attendance_feed.unsubscribe(list_id, subscription)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ===========================
 # PDF GENERATION
 # ===========================
 
+def pdf_content_hash(attendance_list: dict, records: list) -> str:
+    """Hash do conteúdo que entra no PDF (usado como ETag e chave do cache)"""
+    payload = json.dumps(
+        [PDF_TEMPLATE_VERSION, PDF_ROWS_PER_PAGE, attendance_list, records], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def pdf_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Avalia If-None-Match / If-Modified-Since da requisição"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or f'"{etag}"' in tags
+    
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since and last_modified:
+        try:
+            return parsedate_to_datetime(if_modified_since) >= last_modified.replace(microsecond=0)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def list_last_modified(attendance_list: dict) -> Optional[datetime]:
+    """Data de finalização da lista (None enquanto ainda está ativa)"""
+    if attendance_list['status'] != 'completed':
+        return None
+    if not attendance_list.get('end_time'):
+        return datetime.now(timezone.utc)
+    return datetime.fromisoformat(attendance_list['end_time'].replace('Z', '+00:00'))
+
+
+def pdf_response(list_id: str, etag: str, last_modified: Optional[datetime], content: Optional[bytes]) -> Response:
+    """Resposta do PDF com cabeçalhos de cache (304 quando content é None)"""
+    headers = {'ETag': f'"{etag}"'}
+    if last_modified:
+        # Lista finalizada: o documento não muda mais
+        headers['Last-Modified'] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        headers['Cache-Control'] = 'private, max-age=86400'
+    else:
+        headers['Cache-Control'] = 'no-cache'
+    
+    if content is None:
+        return Response(status_code=304, headers=headers)
+    
+    headers['Content-Disposition'] = f"attachment; filename=lista_presenca_{list_id}.pdf"
+    return Response(content=content, media_type="application/pdf", headers=headers)
+
+
 @api_router.get("/attendance-lists/{list_id}/pdf")
-async def generate_pdf(list_id: str):
+async def generate_pdf(list_id: str, request: Request):
     """Gerar PDF da lista de presença no formato do modelo"""
     try:
         # Buscar lista de presença
-        list_result = supabase.table('attendance_lists').select('*').eq('id', list_id).execute()
+        attendance_list = await db.get_attendance_list(list_id)
         
-        if not list_result.data or len(list_result.data) == 0:
+        if not attendance_list:
             raise HTTPException(status_code=404, detail="Lista não encontrada")
         
-        attendance_list = list_result.data[0]
+        # O PDF precisa da linha completa (course_content etc.); aproveitar a leitura para
+        # manter os metadados do check-in atualizados
+        list_cache.put(attendance_list)
         
         # Buscar registros de presença
-        records_result = supabase.table('attendance_records').select(
-            '*, professionals(name, email, profession, company)'
-        ).eq('list_id', list_id).order('row_number').execute()
-        
-        # Criar PDF
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, 
-                              rightMargin=0.5*inch, leftMargin=0.5*inch,
-                              topMargin=0.5*inch, bottomMargin=0.5*inch)
-        
-        elements = []
-        styles = getSampleStyleSheet()
-        
-        # Estilo para título
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=12,
-            textColor=colors.black,
-            alignment=TA_CENTER,
-            spaceAfter=20
-        )
+        records = await db.get_list_records(list_id)
+        
+        etag = pdf_content_hash(attendance_list, records)
+        last_modified = list_last_modified(attendance_list)
+        
+        # Conteúdo igual ao que o cliente já tem: não renderizar
+        if pdf_not_modified(request, etag, last_modified):
+            return pdf_response(list_id, etag, last_modified, None)
+        
+        # Lista finalizada já renderizada com este mesmo conteúdo: servir do cache
+        if last_modified:
+            cached = await asyncio.to_thread(pdf_cache.get, list_id, etag)
+            if cached:
+                return pdf_response(list_id, cached.etag, last_modified, cached.content)
+        
+        try:
+            content = await render_pool.render(attendance_list, records)
+        except RenderPoolSaturated:
+            raise HTTPException(
+                status_code=429,
+                detail="Muitos PDFs sendo gerados no momento. Tente novamente em instantes.",
+                headers={"Retry-After": "5"},
+            )
+        
+        if last_modified:
+            await asyncio.to_thread(pdf_cache.put, list_id, etag, content, last_modified)
+        
+        return pdf_response(list_id, etag, last_modified, content)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao gerar PDF: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {str(e)}")
+
+
+# ===========================
+# BULK ROSTER EXPORT
+# ===========================
+
+EXPORT_MAX_LISTS = int(os.environ.get('EXPORT_MAX_LISTS', 500))
+EXPORT_CHUNK_SIZE = 50  # listas por consulta de registros
+
+
+async def render_roster(attendance_list: dict, records: list) -> bytes:
+    """PDF de uma lista para exportação: usa o cache das finalizadas e espera vaga no pool"""
+    list_id = attendance_list['id']
+    last_modified = list_last_modified(attendance_list)
+    if last_modified:
+        etag = pdf_content_hash(attendance_list, records)
+        cached = await asyncio.to_thread(pdf_cache.get, list_id, etag)
+        if cached:
+            return cached.content
+    
+    content = await render_pool.run_when_available(build_attendance_pdf, attendance_list, records)
+    if last_modified:
+        await asyncio.to_thread(pdf_cache.put, list_id, etag, content, last_modified)
+    return content
+
+
+class _ZipSink:
+    """Destino não-posicionável para o zipfile: acumula os bytes até serem enviados"""
+    
+    def __init__(self):
+        self._chunks = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_rosters_zip(attendance_lists: list):
+    """Gera o ZIP aos pedaços: cada PDF é enviado assim que fica pronto"""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for start in range(0, len(attendance_lists), EXPORT_CHUNK_SIZE):
+            chunk = attendance_lists[start:start + EXPORT_CHUNK_SIZE]
+            records_by_list = await db.get_records_for_lists([l['id'] for l in chunk])
+            
+            async def render(attendance_list):
+                return attendance_list, await render_roster(attendance_list, records_by_list[attendance_list['id']])
+            
+            # Renderização em paralelo; o pool limita quantos rodam ao mesmo tempo
+            for finished in asyncio.as_completed([render(l) for l in chunk]):
+                attendance_list, content = await finished
+                archive.writestr(
+                    f"lista_presenca_{attendance_list['meeting_date']}_{attendance_list['id']}.pdf",
+                    content,
+                )
+                yield sink.drain()
+    yield sink.drain()
+
+
+async def stream_file_and_delete(path: str, chunk_size: int = 64 * 1024):
+    try:
+        with open(path, 'rb') as f:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+@api_router.get("/exports/rosters")
+async def export_rosters(
+    date_from: Optional[str] = None,  # YYYY-MM-DD
+    date_to: Optional[str] = None,  # YYYY-MM-DD
+    installation_name: Optional[str] = None,
+    format: Literal['zip', 'pdf'] = 'zip',
+):
+    """Exportar várias listas de presença em um ZIP de PDFs ou em um único PDF"""
+    try:
+        if not (date_from or date_to or installation_name):
+            raise HTTPException(status_code=400, detail="Informe o período (date_from/date_to) ou a instalação")
         
-        # Título
-        title = Paragraph(
-            "FORMULÁRIO DE TREINAMENTO / LISTA DE PRESENÇA<br/>"
-            "TRAINING ROSTER FORM / ATTENDANCE LIST",
-            title_style
+        attendance_lists = await db.find_attendance_lists(
+            date_from, date_to, installation_name, limit=EXPORT_MAX_LISTS + 1
         )
-        elements.append(title)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Informações da instalação, data, duração e hora
-        info_data = [
-            ['INSTALAÇÃO / FACILITY:', attendance_list['installation_name'], '', '',
-             'DATA / DATE:', attendance_list['meeting_date'], 
-             'DURAÇÃO / DURATION:', attendance_list.get('duration', ''),
-             'HORA / TIME:', attendance_list['meeting_time']]
-        ]
         
-        info_table = Table(info_data, colWidths=[1.1*inch, 1.9*inch, 0.2*inch, 0.2*inch, 
-                                                   0.7*inch, 0.8*inch, 1.1*inch, 0.6*inch,
-                                                   0.7*inch, 0.6*inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 7),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.15*inch))
-        
-        # Título do curso
-        course_data = [
-            ['TÍTULO DO CURSO / COURSE TITLE:', attendance_list['course_title']]
-        ]
-        course_table = Table(course_data, colWidths=[2*inch, 5.5*inch])
-        course_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(course_table)
-        elements.append(Spacer(1, 0.1*inch))
-        
-        # Conteúdo do curso
-        content_style = ParagraphStyle('ContentStyle', parent=styles['Normal'], fontSize=7)
-        content_para = Paragraph(attendance_list['course_content'], content_style)
-        
-        content_data = [
-            ['CONTEÚDO / CONTENT:', content_para]
-        ]
-        content_table = Table(content_data, colWidths=[2*inch, 5.5*inch])
-        content_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (0, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (0, 0), 8),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
-        elements.append(content_table)
-        elements.append(Spacer(1, 0.15*inch))
-        
-        # Dados do instrutor
-        instructor_data = [
-            ['NOME DO INSTRUTOR / INSTRUCTOR NAME:', attendance_list['instructor_name'], 
-             'FUNÇÃO / ROLE:', attendance_list['instructor_role'], 
-             'ASSINATURA / SIGNATURE:', ''],
-            ['QUALIFICAÇÃO / QUALIFICATION:', attendance_list['instructor_qualification'], '', '', '', '']
-        ]
+        if not attendance_lists:
+            raise HTTPException(status_code=404, detail="Nenhuma lista encontrada para os filtros informados")
+        if len(attendance_lists) > EXPORT_MAX_LISTS:
+            raise HTTPException(status_code=400, detail=f"Mais de {EXPORT_MAX_LISTS} listas: refine os filtros")
+        
+        filename = f"listas_presenca_{date_from or 'inicio'}_{date_to or 'fim'}"
+        
+        if format == 'zip':
+            return StreamingResponse(
+                stream_rosters_zip(attendance_lists),
+                media_type="application/zip",
+                headers={"Content-Disposition": f"attachment; filename={filename}.zip"}
+            )
+        
+        # PDF único: um documento com todas as listas, gravado em arquivo temporário
+        records_by_list = {}
+        for start in range(0, len(attendance_lists), EXPORT_CHUNK_SIZE):
+            chunk_ids = [l['id'] for l in attendance_lists[start:start + EXPORT_CHUNK_SIZE]]
+            records_by_list.update(await db.get_records_for_lists(chunk_ids))
+        
+        rosters = [(l, records_by_list[l['id']]) for l in attendance_lists]
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        try:
+            await render_pool.run(build_combined_pdf, path, rosters)
+        except RenderPoolSaturated:
+            os.unlink(path)
+            raise HTTPException(
+                status_code=429,
+                detail="Muitos PDFs sendo gerados no momento. Tente novamente em instantes.",
+                headers={"Retry-After": "5"},
+            )
+        except Exception:
+            os.unlink(path)
+            raise
         
-        instructor_table = Table(instructor_data, colWidths=[1.8*inch, 1.8*inch, 0.8*inch, 1*inch, 1.2*inch, 0.9*inch])
-        instructor_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 8),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('SPAN', (1, 1), (5, 1)),
-        ]))
-        elements.append(instructor_table)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Cabeçalho da tabela de participantes (seguindo modelo Excel)
-        header_data = [
-            ['Nº', 'NOME COMPLETO\nFULL NAME', 'MODEC E-MAIL\nE-MAIL MODEC', 
-             'FUNÇÃO\nROLE', '*LOCATION\nLOCALIZAÇÃO', 'EMPRESA\nCOMPANY', 'ASSINATURA\nSIGNATURE']
-        ]
+        return StreamingResponse(
+            stream_file_and_delete(path),
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename={filename}.pdf"}
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar listas: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao exportar listas: {str(e)}")
+
+
+# ===========================
+# REPORTS
+# ===========================
+# Os agregados são mantidos pelos gatilhos do banco a cada check-in e
+# finalização de lista: os relatórios leem uma linha por entidade em vez de
+# varrer attendance_records.
+
+def stats_response(row: dict) -> dict:
+    """Acrescenta training_hours e achata o profissional embutido"""
+    professional = row.pop('professionals', None)
+    if professional is not None:
+        row.update(professional)
+    row['training_hours'] = round(row['training_seconds'] / 3600, 2)
+    return row
+
+
+@api_router.get("/reports/professionals", response_model=List[ProfessionalStatsResponse])
+async def report_professionals(
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Ranking de profissionais por horas de treinamento, paginado por cursor"""
+    try:
+        after = tuple(decode_cursor(cursor, 2)) if cursor else None
+        rows = await db.list_professional_stats(limit + 1, after)
+        return paginated_response(
+            [stats_response(row) for row in rows], limit, ('training_seconds', 'professional_id'), None,
+            ProfessionalStatsResponse,
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório de profissionais: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório de profissionais: {str(e)}")
+
+
+@api_router.get("/reports/professionals/{professional_id}", response_model=ProfessionalStatsResponse)
+async def report_professional(professional_id: str):
+    """Presenças e horas de treinamento de um profissional"""
+    try:
+        row = await db.get_professional_stats(professional_id)
         
-        # Adicionar registros de presença
-        attendance_data = header_data.copy()
+        if not row:
+            raise HTTPException(status_code=404, detail="Nenhuma presença registrada para o profissional")
         
-        for record in records_result.data:
-            prof = record.get('professionals', {})
-            entry_time_str = datetime.fromisoformat(record['entry_time'].replace('Z', '+00:00')).strftime('%d/%m/%Y %H:%M')
-            
-            # Formato: "assinado digitalmente\n22/11/2025 14:30"
-            signature_text = f"assinado digitalmente\n{entry_time_str}"
-            
-            attendance_data.append([
-                str(record['row_number']),
-                prof.get('name', ''),
-                prof.get('email', 'N/A'),
-                prof.get('profession', ''),
-                record['local'],
-                prof.get('company', ''),
-                signature_text  # ASSINATURA: "assinado digitalmente" + data/hora
-            ])
-        
-        # Adicionar linhas vazias até completar 30
-        for i in range(len(records_result.data) + 1, 31):
-            attendance_data.append([str(i), '', 'N/A', '', attendance_list['location'], '', ''])
-        
-        # Criar tabela de participantes (com 7 colunas incluindo ASSINATURA)
-        participants_table = Table(attendance_data, 
-                                  colWidths=[0.3*inch, 1.7*inch, 1.2*inch, 1.1*inch, 1.1*inch, 0.9*inch, 1.1*inch])
-        
-        participants_table.setStyle(TableStyle([
-            # Header style
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 7),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-            # Data style
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('ALIGN', (0, 1), (0, -1), 'CENTER'),  # Nº centralizado
-            ('ALIGN', (1, 1), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            # Grid
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.Color(0.95, 0.95, 0.95)]),
-        ]))
-        
-        elements.append(participants_table)
-        elements.append(Spacer(1, 0.2*inch))
-        
-        # Nota
-        note_style = ParagraphStyle('NoteStyle', parent=styles['Normal'], fontSize=6, textColor=colors.grey)
-        note = Paragraph(
-            "Note: When the training is carried out on board, it will not be necessary to fill in the location and email for employees that are fixed of the unit.<br/>"
-            "Nota: Quando o treinamento for realizado a bordo não será preciso preencher a localização e e-mail para os empregados que são fixo da unidade.",
-            note_style
+        return FastJSONResponse(content=project_row(stats_response(row), ProfessionalStatsResponse))
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório do profissional: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório do profissional: {str(e)}")
+
+
+@api_router.get("/reports/companies", response_model=List[CompanyStatsResponse])
+async def report_companies():
+    """Presenças e horas-homem de treinamento por empresa (presenças até a última consolidação)"""
+    try:
+        rows = await db.list_company_stats()
+        return FastJSONResponse(content=[project_row(stats_response(row), CompanyStatsResponse) for row in rows])
+    
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório de empresas: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório de empresas: {str(e)}")
+
+
+@api_router.get("/reports/installations", response_model=List[InstallationStatsResponse])
+async def report_installations():
+    """Listas, presenças e horas de treinamento por instalação (presenças até a última consolidação)"""
+    try:
+        rows = await db.list_installation_stats()
+        return FastJSONResponse(content=[project_row(stats_response(row), InstallationStatsResponse) for row in rows])
+    
+    except Exception as e:
+        logger.error(f"Erro ao gerar relatório de instalações: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório de instalações: {str(e)}")
+
+
+# ===========================
+# HISTORY
+# ===========================
+# Consultas por período sobre as listas ativas e arquivadas. O período é
+# obrigatório e limitado a HISTORY_MAX_DAYS: cada consulta lê só as partições
+# mensais de registros (e as linhas do índice de listas) do intervalo.
+
+HISTORY_MAX_DAYS = int(os.environ.get('HISTORY_MAX_DAYS', 366))
+
+
+def check_history_window(date_from: date, date_to: date):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to anterior a date_from")
+    if (date_to - date_from).days + 1 > HISTORY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Período maior que {HISTORY_MAX_DAYS} dias: divida a consulta")
+
+
+@api_router.get("/history/lists", response_model=List[HistoryListResponse])
+async def history_lists(
+    date_from: date,
+    date_to: date,
+    installation_name: Optional[str] = None,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Listas de presença do período (ativas e arquivadas) em ordem de data e horário,
+    opcionalmente de uma instalação, paginadas por cursor"""
+    try:
+        check_history_window(date_from, date_to)
+        after = tuple(decode_cursor(cursor, 3)) if cursor else None
+        
+        rows = await db.find_attendance_lists(
+            date_from.isoformat(), date_to.isoformat(), installation_name, limit + 1, after
         )
-        elements.append(note)
-        elements.append(Spacer(1, 0.15*inch))
+        return paginated_response(rows, limit, ('meeting_date', 'meeting_time', 'id'), None, HistoryListResponse)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao consultar histórico de listas: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar histórico de listas: {str(e)}")
+
+
+@api_router.get("/history/professionals/{professional_id}", response_model=List[ProfessionalHistoryRecord])
+async def history_professional(
+    professional_id: str,
+    date_from: date,
+    date_to: date,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Presenças de um profissional no período, com os dados de cada lista, em ordem
+    de data e horário de entrada, paginadas por cursor"""
+    try:
+        check_history_window(date_from, date_to)
+        after = tuple(decode_cursor(cursor, 3)) if cursor else None
         
-        # Rodapé com código do documento e revisão
-        footer_data = [
-            ['Guia de Treinamento e Desenvolvimento / Training and Development Guide\n3500-MSB60-HRSTD-0006-04', 
-             'Rev.4, 16 Fev/Feb 2024']
-        ]
-        footer_table = Table(footer_data, colWidths=[5.5*inch, 2*inch])
-        footer_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 6),
-            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.grey),
-        ]))
-        elements.append(footer_table)
-        
-        # Construir PDF
-        doc.build(elements)
-        buffer.seek(0)
-        
-        # Retornar PDF
-        return StreamingResponse(
-            buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=lista_presenca_{list_id}.pdf"
-            }
+        rows = await db.get_professional_history(
+            professional_id, date_from.isoformat(), date_to.isoformat(), limit + 1, after
         )
+        return paginated_response(rows, limit, ('meeting_date', 'entry_time', 'id'), None, ProfessionalHistoryRecord)
     
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Erro ao gerar PDF: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Erro ao gerar PDF: {str(e)}")
+        logger.error(f"Erro ao consultar histórico do profissional: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar histórico do profissional: {str(e)}")
+
+
+# ===========================
+# BACKGROUND JOBS
+# ===========================
+
+async def prerender_list_pdf(list_id: str):
+    """Job: renderiza e guarda no cache o PDF de uma lista finalizada"""
+    attendance_list = await db.get_attendance_list(list_id)
+    if not attendance_list:
+        raise ValueError(f"Lista {list_id} não encontrada")
+    
+    records_by_list = await db.get_records_for_lists([list_id])
+    await render_roster(attendance_list, records_by_list[list_id])
+
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Consultar o status de uma tarefa em segundo plano"""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    return job.to_dict()
+
+
+@api_router.get("/attendance-lists/{list_id}/pdf/status")
+async def get_pdf_status(list_id: str):
+    """Informar se o PDF de uma lista já está pronto para download imediato"""
+    job = job_queue.get_by_key(f"pdf:{list_id}")
+    ready = False
+    if await asyncio.to_thread(pdf_cache.has, list_id):
+        # Só está pronto se o PDF guardado corresponde ao conteúdo atual da lista
+        attendance_list = await db.get_attendance_list(list_id)
+        if attendance_list and list_last_modified(attendance_list):
+            records = await db.get_list_records(list_id)
+            etag = pdf_content_hash(attendance_list, records)
+            ready = await asyncio.to_thread(pdf_cache.get, list_id, etag) is not None
+    return {"list_id": list_id, "ready": ready, "job": job.to_dict() if job else None}
 
 
 # ===========================
@@ -657,23 +1484,146 @@ async def root():
 
 @api_router.get("/health")
 async def health_check():
-    try:
-        # Testar conexão com Supabase
-        result = supabase.table('professionals').select('id').limit(1).execute()
-        return {"status": "healthy", "supabase": "connected"}
-    except Exception as e:
-        return {"status": "unhealthy", "error": str(e)}
+    # Mesmo resultado em cache da sonda de prontidão
+    result = await readiness.status()
+    if result['ready']:
+        return {"status": "healthy", "database": "connected", "backend": type(repository).__name__}
+    return {"status": "unhealthy", "error": result['error']}
+
+
+@api_router.get("/health/live")
+async def liveness_check():
+    """Liveness: o processo responde (sem tocar no banco)"""
+    return {"status": "alive"}
+
+
+@api_router.get("/health/ready")
+async def readiness_check():
+    """Readiness: banco acessível (resultado em cache por READINESS_CACHE_SECONDS); 503 se não"""
+    result = await readiness.status()
+    content = {
+        "status": "ready" if result['ready'] else "unavailable",
+        "database": "connected" if result['ready'] else "unreachable",
+        "backend": type(repository).__name__,
+        "checked_at": result['checked_at'],
+        "cached": result['cached'],
+    }
+    if not result['ready']:
+        content["error"] = result['error']
+    return JSONResponse(status_code=200 if result['ready'] else 503, content=content)
+
+
+@api_router.get("/cache/stats")
+async def cache_stats():
+    """Contadores de acerto/erro dos caches em memória"""
+    return {
+        "professionals": professional_cache.stats(),
+        "attendance_lists": list_cache.stats(),
+        "pdfs": pdf_cache.stats(),
+        "pdf_render_pool": render_pool.stats(),
+        "jobs": job_queue.stats(),
+        "feed_subscribers": attendance_feed.subscriber_count(),
+        "idempotency": idempotency_store.stats(),
+        "read_coalescing": read_coalescing.stats(),
+        "checkin_admission": checkin_admission.stats(),
+        "search_index": professional_index.stats(),
+        "history": history_maintenance.stats(),
+        "stats_rollup": stats_rollup.stats(),
+    }
+
+
+# ===========================
+# METRICS
+# ===========================
+
+def cache_samples(field: str):
+    for name, cache in (('professionals', professional_cache), ('attendance_lists', list_cache), ('pdfs', pdf_cache)):
+        yield '', {'cache': name}, cache.stats()[field]
+
+
+metrics.collector('cache_hits_total', "Acertos dos caches em memória", 'counter', lambda: cache_samples('hits'))
+metrics.collector('cache_misses_total', "Erros dos caches em memória", 'counter', lambda: cache_samples('misses'))
+metrics.collector('cache_hit_ratio', "Taxa de acerto dos caches em memória", 'gauge', lambda: cache_samples('hit_ratio'))
+metrics.collector('pdf_render_pending', "PDFs em renderização ou na fila", 'gauge',
+                  lambda: [('', {}, render_pool.pending)])
+metrics.collector('pdf_render_rejected_total', "PDFs recusados com 429 (pool cheio)", 'counter',
+                  lambda: [('', {}, render_pool.rejected)])
+metrics.collector('jobs_queued', "Tarefas em segundo plano aguardando", 'gauge',
+                  lambda: [('', {}, job_queue.stats()['queued'])])
+metrics.collector('db_reads_coalesced_total', "Leituras atendidas por uma consulta já em andamento", 'counter',
+                  lambda: [('', {}, read_coalescing.shared)])
+metrics.collector('checkin_waiting', "Check-ins aguardando vaga na fila da lista", 'gauge',
+                  lambda: [('', {}, checkin_admission.stats()['waiting'])])
+metrics.collector('checkin_rejected_total', "Check-ins recusados com 429 (fila da lista cheia)", 'counter',
+                  lambda: [('', {}, checkin_admission.rejected)])
+metrics.collector('search_index_documents', "Profissionais no índice de busca", 'gauge',
+                  lambda: [('', {}, len(professional_index))])
+metrics.collector('history_partitions_created_total', "Partições mensais de registros criadas pela manutenção",
+                  'counter', lambda: [('', {}, history_maintenance.partitions_created)])
+metrics.collector('stats_rollup_rows_total', "Presenças pendentes somadas aos agregados de empresa e instalação",
+                  'counter', lambda: [('', {}, stats_rollup.rows_applied)])
+metrics.collector('idempotency_replays_total', "Escritas respondidas pela chave de idempotência", 'counter',
+                  lambda: [('', {}, idempotency_store.replays)])
+metrics.collector('feed_subscribers', "Ouvintes conectados ao feed ao vivo", 'gauge',
+                  lambda: [('', {}, attendance_feed.subscriber_count())])
+
+
+@api_router.get("/metrics")
+async def get_metrics():
+    """Métricas no formato texto do Prometheus"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 # Include the router in the main app
 app.include_router(api_router)
 
+
+@app.on_event("startup")
+async def startup_db_client():
+    await db.connect()
+    stale_pdfs = await asyncio.to_thread(pdf_cache.purge_stale)
+    if stale_pdfs:
+        logger.info(f"PDFs de versões anteriores do layout removidos do cache: {stale_pdfs}")
+    await job_queue.start()
+    await search_indexer.start()
+    await history_maintenance.start()
+    await stats_rollup.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_db_client():
+    await stats_rollup.stop()
+    await history_maintenance.stop()
+    await search_indexer.stop()
+    await job_queue.stop()
+    await db.close()
+    render_pool.shutdown()
+
+# Antes do MetricsMiddleware (mais interno): repetições também entram nas métricas
+app.add_middleware(
+    IdempotencyMiddleware,
+    store=idempotency_store,
+    paths=[
+        "/api/professionals",
+        "/api/professionals/import",
+        "/api/attendance-records",
+        "/api/attendance-records/batch",
+    ],
+)
+
+app.add_middleware(
+    MetricsMiddleware,
+    request_seconds=request_seconds,
+    db_calls_per_request=db_calls_per_request,
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Idempotent-Replayed"],
 )
 
 # Configure logging
@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+# Os módulos do backend se importam pelo nome (from cache import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import itertools
+import os
+
+import pytest
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """Módulo server configurado para o SQLite em memória (importado uma vez)"""
+    os.environ['DB_BACKEND'] = 'sqlite'
+    os.environ['SQLITE_PATH'] = ':memory:'
+    os.environ['PDF_CACHE_DIR'] = str(tmp_path_factory.mktemp('pdf_cache'))
+    import server
+    return server
+
+
+@pytest.fixture(scope='session')
+def client(server):
+    """Cliente HTTP da sessão inteira. Locks e filas do servidor ficam presos ao
+    event loop do primeiro cliente, então o banco é compartilhado entre os testes:
+    cada teste cria os próprios profissionais e listas"""
+    from fastapi.testclient import TestClient
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+_sequence = itertools.count(1)
+
+
+@pytest.fixture
+def make_professional(client):
+    def make(**fields):
+        n = next(_sequence)
+        data = {
+            'code': f'cred-{n}', 'name': f'Profissional {n}', 'email': f'p{n}@example.com',
+            'profession': 'Técnico', 'company': 'ACME',
+        }
+        data.update(fields)
+        response = client.post('/api/professionals', json=data)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
+
+
+@pytest.fixture
+def make_list(client):
+    def make(**fields):
+        data = {
+            'installation_name': 'P-74', 'meeting_date': '2026-10-18', 'meeting_time': '07:00',
+            'course_title': 'NR-10', 'course_content': 'Segurança', 'instructor_name': 'Instrutor',
+            'instructor_role': 'Engenheiro', 'instructor_qualification': 'CREA', 'location': 'Sala 1',
+        }
+        data.update(fields)
+        response = client.post('/api/attendance-lists', json=data)
+        assert response.status_code == 200, response.text
+        return response.json()
+    return make
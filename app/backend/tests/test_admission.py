@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionControl, AdmissionRejected
+
+
+async def hold(control, key, order, release, label):
+    async with control.slot(key):
+        order.append(label)
+        await release.wait()
+
+
+def test_waiters_are_admitted_in_arrival_order():
+    control = AdmissionControl(concurrency=1, max_queue=10)
+    order = []
+
+    async def scenario():
+        release = asyncio.Event()
+        tasks = []
+        for label in range(5):
+            tasks.append(asyncio.ensure_future(hold(control, 'l1', order, release, label)))
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        assert order == [0]
+        assert control.stats()['waiting'] == 4
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(scenario())
+    assert order == [0, 1, 2, 3, 4]
+    assert control.stats()['active'] == 0
+    assert control.admitted == 5
+
+
+def test_concurrency_is_per_key():
+    control = AdmissionControl(concurrency=2, max_queue=10)
+    order = []
+
+    async def scenario():
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(hold(control, key, order, release, f"{key}-{i}"))
+                 for key in ('l1', 'l2') for i in range(3)]
+        await asyncio.sleep(0.01)
+        running = sorted(order)
+        release.set()
+        await asyncio.gather(*tasks)
+        return running
+
+    # Duas por lista executam ao mesmo tempo; a terceira de cada uma espera
+    assert asyncio.run(scenario()) == ['l1-0', 'l1-1', 'l2-0', 'l2-1']
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    control = AdmissionControl(concurrency=1, max_queue=2, initial_service_time=1.5)
+
+    async def scenario():
+        release = asyncio.Event()
+        tasks = [asyncio.ensure_future(hold(control, 'l1', [], release, i)) for i in range(3)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with control.slot('l1'):
+                pass
+        release.set()
+        await asyncio.gather(*tasks)
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    # 1 executando + 2 na fila, 1,5 s cada, 1 por vez
+    assert rejected.retry_after == 5
+    assert control.rejected == 1
+
+
+def test_waiting_longer_than_max_wait_is_rejected():
+    control = AdmissionControl(concurrency=1, max_queue=10, max_wait=0.02)
+
+    async def scenario():
+        release = asyncio.Event()
+        holder = asyncio.ensure_future(hold(control, 'l1', [], release, 0))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with control.slot('l1'):
+                pass
+        assert control.stats()['waiting'] == 0
+        release.set()
+        await holder
+        return rejected.value
+
+    assert asyncio.run(scenario()).retry_after >= 1
+    assert control.stats()['active'] == 0
+
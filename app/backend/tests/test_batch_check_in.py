@@ -0,0 +1,37 @@
+def post_batch(client, list_id, items):
+    return client.post('/api/attendance-records/batch', json={'list_id': list_id, 'items': items})
+
+
+def test_batch_result_codes(client, make_professional, make_list):
+    early, late, registered = make_professional(), make_professional(), make_professional()
+    attendance_list = make_list()
+    client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': registered['code']})
+    
+    body = post_batch(client, attendance_list['id'], [
+        {'code': late['code'], 'entry_time': '2026-10-18T07:20:00+00:00'},
+        {'registration_code': early['registration_code'].lower(), 'entry_time': '2026-10-18T07:05:00+00:00'},
+        {'code': early['code'], 'entry_time': '2026-10-18T07:30:00+00:00'},  # segunda leitura
+        {'code': registered['code']},
+        {'code': 'desconhecido'},
+        {},
+    ]).json()
+    
+    assert [r['status'] for r in body['results']] == ['created', 'created', 'duplicate', 'duplicate', 'not_found', 'invalid']
+    assert [r['index'] for r in body['results']] == list(range(6))
+    assert (body['created'], body['duplicate'], body['not_found'], body['invalid']) == (2, 2, 1, 1)
+    
+    # row_number segue o horário da leitura no quiosque, não a ordem do lote
+    assert body['results'][1]['record']['professional_id'] == early['id']
+    assert body['results'][1]['record']['row_number'] == 2
+    assert body['results'][0]['record']['row_number'] == 3
+    assert body['results'][3]['record'] is None
+
+
+def test_batch_list_errors(client, make_professional, make_list):
+    professional = make_professional()
+    assert post_batch(client, 'lista-inexistente', [{'code': professional['code']}]).status_code == 404
+    assert post_batch(client, make_list()['id'], []).status_code == 422
+    
+    attendance_list = make_list()
+    client.put(f"/api/attendance-lists/{attendance_list['id']}/complete")
+    assert post_batch(client, attendance_list['id'], [{'code': professional['code']}]).status_code == 400
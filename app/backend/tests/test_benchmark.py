@@ -0,0 +1,48 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import benchmark
+
+
+def test_percentile_interpolates():
+    values = [10.0, 20.0, 30.0, 40.0]
+    assert benchmark.percentile(values, 50) == 25.0
+    assert benchmark.percentile(values, 100) == 40.0
+    assert benchmark.percentile([7.0], 99) == 7.0
+    assert benchmark.percentile([], 95) == 0.0
+
+
+def test_recorder_summary():
+    recorder = benchmark.Recorder()
+    for value in (1.0, 2.0, 3.0):
+        recorder.latencies['GET /x'].append(value)
+    recorder.statuses['GET /x'][200] += 2
+    recorder.statuses['GET /x'][429] += 1
+    recorder.finished = recorder.started + 1.5
+    
+    stats = recorder.summary()['endpoints']['GET /x']
+    assert stats['requests'] == 3
+    assert stats['statuses'] == {'200': 2, '429': 1}
+    assert stats['throughput_rps'] == 2.0
+    assert (stats['p50_ms'], stats['max_ms']) == (2.0, 3.0)
+
+
+def test_compare_flags_p95_regressions():
+    baseline = {'results': {'checkin': {'endpoints': {
+        'POST /a': {'p95_ms': 10.0}, 'POST /b': {'p95_ms': 10.0},
+    }}}}
+    results = {'checkin': {'endpoints': {
+        'POST /a': {'p95_ms': 11.9},  # dentro da tolerância
+        'POST /b': {'p95_ms': 12.5},
+        'POST /novo': {'p95_ms': 99.0},  # sem referência
+    }}}
+    assert benchmark.compare(results, baseline, 0.2) == ['[checkin] POST /b: p95 10.0ms -> 12.5ms']
+
+
+def test_serialization_paths_agree(server):
+    args = SimpleNamespace(records=50, repeat=2)
+    summary = asyncio.run(benchmark.scenario_serialization(None, server, args))
+    assert len(summary['endpoints']) == 3
+    assert all(stats['requests'] == 2 for stats in summary['endpoints'].values())
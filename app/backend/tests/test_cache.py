@@ -0,0 +1,94 @@
+from cache import AttendanceListCache, ProfessionalCache, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_expiry():
+    clock = Clock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set('a', 1)
+    
+    clock.now = 4.9
+    assert cache.get('a') == 1
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert len(cache) == 0
+    assert cache.stats() == {'size': 0, 'maxsize': 10, 'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')  # 'b' passa a ser o menos usado
+    cache.set('c', 3)
+    
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (1, 3)
+
+
+def test_professional_cache_indexes():
+    cache = ProfessionalCache(maxsize=10)
+    professional = {'id': 'p1', 'code': 'cred', 'registration_code': 'ABC123'}
+    cache.put(professional)
+    
+    assert cache.get_by_code('cred') is professional
+    assert cache.get_by_registration('abc123') is professional
+    
+    cache.invalidate(professional)
+    assert cache.get_by_code('cred') is None
+    assert cache.get_by_registration('ABC123') is None
+
+
+def test_lookup_routes_use_cache(server, client, make_professional):
+    professional = make_professional()
+    server.professional_cache.clear()
+    before = server.professional_cache.stats()
+    
+    for _ in range(2):
+        assert client.get(f"/api/professionals/by-code/{professional['code']}").json()['id'] == professional['id']
+        response = client.get(f"/api/professionals/by-registration/{professional['registration_code'].lower()}")
+        assert response.json()['id'] == professional['id']
+    
+    # Só a primeira busca vai ao banco: ela aquece os dois índices
+    after = server.professional_cache.stats()
+    assert (after['misses'] - before['misses'], after['hits'] - before['hits']) == (1, 3)
+    assert client.get('/api/professionals/by-code/desconhecido').status_code == 404
+
+
+def test_list_cache_keeps_check_in_fields():
+    cache = AttendanceListCache(maxsize=10)
+    cache.put({'id': 'l1', 'status': 'active', 'location': 'Sala 1', 'start_time': 't0', 'course_content': 'longo'})
+    
+    assert cache.get('l1') == {'status': 'active', 'location': 'Sala 1', 'start_time': 't0'}
+    cache.invalidate('l1')
+    assert cache.get('l1') is None
+
+
+def test_list_cache_follows_list_lifecycle(server, client, make_professional, make_list):
+    attendance_list = make_list()
+    assert server.list_cache.get(attendance_list['id'])['status'] == 'active'
+    
+    client.put(f"/api/attendance-lists/{attendance_list['id']}/complete")
+    assert server.list_cache.get(attendance_list['id'])['status'] == 'completed'
+
+
+def test_check_in_refused_from_cache(server, client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    
+    # O cache diz finalizada: a recusa sai sem consultar o banco (onde a lista segue ativa)
+    server.list_cache.put({**attendance_list, 'status': 'completed'})
+    response = client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    assert response.status_code == 400
+    assert client.get(f"/api/attendance-records/list/{attendance_list['id']}").json() == []
+    
+    server.list_cache.invalidate(attendance_list['id'])
+    response = client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    assert response.status_code == 200
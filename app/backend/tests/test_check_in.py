@@ -0,0 +1,41 @@
+def check_in(client, list_id, **codes):
+    return client.post('/api/attendance-records', json={'list_id': list_id, **codes})
+
+
+def test_check_in_by_code_or_registration_code(client, make_professional, make_list):
+    first, second = make_professional(), make_professional()
+    attendance_list = make_list(location='Sala 7')
+    
+    record = check_in(client, attendance_list['id'], code=first['code']).json()
+    assert (record['professional_id'], record['row_number'], record['local']) == (first['id'], 1, 'Sala 7')
+    assert record['professional_name'] == first['name']
+    
+    # Código de registro sem diferenciar maiúsculas
+    record = check_in(client, attendance_list['id'], registration_code=second['registration_code'].lower()).json()
+    assert (record['professional_id'], record['row_number']) == (second['id'], 2)
+
+
+def test_check_in_errors(client, server, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    assert check_in(client, attendance_list['id'], code=professional['code']).status_code == 200
+    
+    response = check_in(client, attendance_list['id'], code=professional['code'])
+    assert (response.status_code, response.json()['detail']) == server.CHECK_IN_ERRORS['duplicate']
+    response = check_in(client, attendance_list['id'], code='desconhecido')
+    assert (response.status_code, response.json()['detail']) == server.CHECK_IN_ERRORS['professional_not_found']
+    response = check_in(client, 'lista-inexistente', code=professional['code'])
+    assert (response.status_code, response.json()['detail']) == server.CHECK_IN_ERRORS['list_not_found']
+    assert check_in(client, attendance_list['id']).status_code == 400
+
+
+def test_check_in_on_completed_list(client, server, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    client.put(f"/api/attendance-lists/{attendance_list['id']}/complete")
+    
+    # Sem o cache, a recusa vem da própria transação do check-in
+    server.list_cache.invalidate(attendance_list['id'])
+    response = check_in(client, attendance_list['id'], code=professional['code'])
+    assert (response.status_code, response.json()['detail']) == server.CHECK_IN_ERRORS['list_not_active']
+    assert client.get(f"/api/attendance-records/list/{attendance_list['id']}").json() == []
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from coalesce import CoalescingProxy, SingleFlight
+
+
+class SlowRepository:
+    def __init__(self):
+        self.calls = 0
+
+    async def get_list(self, list_id):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return {'id': list_id, 'records': [{'row_number': 1}]}
+
+    async def fail(self, list_id):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        raise RuntimeError(f"falha em {list_id}")
+
+    async def write(self, list_id):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return list_id
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    repository = SlowRepository()
+    group = SingleFlight()
+    proxy = CoalescingProxy(repository, methods=['get_list'], group=group)
+
+    async def scenario():
+        return await asyncio.gather(*(proxy.get_list('l1') for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert repository.calls == 1
+    assert group.stats() == {'in_flight': 0, 'executed': 1, 'shared': 4}
+    assert all(result == results[0] for result in results)
+    # Cada chamador recebe o seu objeto: alterar um não afeta os outros
+    assert len({id(result) for result in results}) == 5
+    assert len({id(result['records']) for result in results}) == 5
+
+
+def test_different_arguments_are_not_shared():
+    repository = SlowRepository()
+    proxy = CoalescingProxy(repository, methods=['get_list'], group=SingleFlight())
+
+    async def scenario():
+        return await asyncio.gather(proxy.get_list('l1'), proxy.get_list('l2'))
+
+    first, second = asyncio.run(scenario())
+    assert repository.calls == 2
+    assert (first['id'], second['id']) == ('l1', 'l2')
+
+
+def test_sequential_calls_are_not_cached():
+    repository = SlowRepository()
+    proxy = CoalescingProxy(repository, methods=['get_list'], group=SingleFlight())
+
+    async def scenario():
+        await proxy.get_list('l1')
+        await proxy.get_list('l1')
+
+    asyncio.run(scenario())
+    assert repository.calls == 2
+
+
+def test_error_propagates_to_every_caller():
+    repository = SlowRepository()
+    group = SingleFlight()
+    proxy = CoalescingProxy(repository, methods=['fail'], group=group)
+
+    async def scenario():
+        return await asyncio.gather(*(proxy.fail('l1') for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert repository.calls == 1
+    assert all(isinstance(result, RuntimeError) and str(result) == 'falha em l1' for result in results)
+    assert group.stats()['in_flight'] == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    repository = SlowRepository()
+    proxy = CoalescingProxy(repository, methods=['get_list'], group=SingleFlight())
+
+    async def scenario():
+        first = asyncio.ensure_future(proxy.get_list('l1'))
+        second = asyncio.ensure_future(proxy.get_list('l1'))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario())['id'] == 'l1'
+    assert repository.calls == 1
+
+
+def test_methods_outside_the_list_are_not_coalesced():
+    repository = SlowRepository()
+    proxy = CoalescingProxy(repository, methods=['get_list'], group=SingleFlight())
+
+    async def scenario():
+        await asyncio.gather(proxy.write('l1'), proxy.write('l1'))
+
+    asyncio.run(scenario())
+    assert repository.calls == 2
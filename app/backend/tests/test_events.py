@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from starlette.requests import Request
+
+from events import Broadcaster
+
+
+def test_fan_out_by_key():
+    broadcaster = Broadcaster()
+    
+    async def scenario():
+        first, second = broadcaster.subscribe('l1'), broadcaster.subscribe('l1')
+        other = broadcaster.subscribe('l2')
+        broadcaster.publish('l1', 'record', {'row_number': 1})
+        return first.queue.get_nowait(), second.queue.get_nowait(), other.queue.qsize()
+    
+    first, second, other = asyncio.run(scenario())
+    assert first == second == ('record', {'row_number': 1})
+    assert other == 0
+    assert broadcaster.subscriber_count() == 3 and broadcaster.subscriber_count('l1') == 2
+
+
+def test_slow_listener_overflows_without_blocking_others():
+    broadcaster = Broadcaster(max_queue=2)
+    slow, fast = broadcaster.subscribe('l1'), broadcaster.subscribe('l1')
+    
+    for n in range(3):
+        broadcaster.publish('l1', 'record', n)
+        if n < 2:
+            fast.queue.get_nowait()
+    
+    assert slow.overflowed and slow.queue.qsize() == 2
+    assert not fast.overflowed and fast.queue.get_nowait() == ('record', 2)
+
+
+def test_unsubscribe_drops_empty_keys():
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe('l1')
+    broadcaster.unsubscribe('l1', subscription)
+    broadcaster.unsubscribe('l1', subscription)
+    assert broadcaster.subscriber_count() == 0
+    broadcaster.publish('l1', 'record', {})
+
+
+def parse(chunks):
+    events = []
+    for chunk in chunks:
+        fields = dict(line.split(': ', 1) for line in chunk.strip().splitlines() if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields.get('id'), fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def test_stream_recovers_then_follows_live(server, client, make_professional, make_list):
+    professionals = [make_professional() for _ in range(3)]
+    attendance_list = make_list()
+    list_id = attendance_list['id']
+    for professional in professionals[:2]:
+        client.post('/api/attendance-records', json={'list_id': list_id, 'code': professional['code']})
+    
+    async def listen():
+        request = Request({'type': 'http', 'method': 'GET', 'headers': [(b'last-event-id', b'1')]})
+        response = await server.stream_attendance_records(list_id, request, after=None)
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            if len(chunks) == 2:
+                # Recuperação enviada: os próximos eventos vêm do feed ao vivo
+                server.attendance_feed.publish(list_id, 'record', {'row_number': 2})  # repetido
+                server.attendance_feed.publish(list_id, 'record', {'row_number': 3})
+                server.attendance_feed.publish(list_id, 'completed', {'list_id': list_id})
+        return chunks
+    
+    chunks = client.portal.call(listen)
+    assert chunks[0].startswith('retry:')
+    events = parse(chunks)
+    assert [(event_id, event) for event_id, event, _ in events] == [('2', 'record'), ('3', 'record'), (None, 'completed')]
+    
+    recovered = events[0][2]
+    assert recovered['professional_id'] == professionals[1]['id']
+    assert set(recovered) == set(server.AttendanceRecordResponse.model_fields)
+    assert server.attendance_feed.subscriber_count(list_id) == 0
@@ -0,0 +1,34 @@
+import io
+import re
+import zipfile
+
+
+def page_count(content: bytes) -> int:
+    return len(re.findall(rb'/Type\s*/Page[^s]', content))
+
+
+def test_export_zip_and_merged_pdf(client, make_professional, make_list):
+    professional = make_professional()
+    lists = [make_list(installation_name='FPSO Exportação', meeting_date=f'2026-08-0{day}') for day in (1, 2, 3)]
+    client.post('/api/attendance-records', json={'list_id': lists[0]['id'], 'code': professional['code']})
+    client.put(f"/api/attendance-lists/{lists[0]['id']}/complete")
+    params = {'installation_name': 'FPSO Exportação'}
+    
+    response = client.get('/api/exports/rosters', params={**params, 'format': 'zip'})
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = sorted(archive.namelist())
+        assert names == sorted(f"lista_presenca_{l['meeting_date']}_{l['id']}.pdf" for l in lists)
+        assert all(archive.read(name).startswith(b'%PDF') for name in names)
+    
+    response = client.get('/api/exports/rosters', params={**params, 'format': 'pdf'})
+    assert response.status_code == 200
+    assert response.content.startswith(b'%PDF')
+    assert page_count(response.content) == len(lists)
+
+
+def test_export_filters(client):
+    assert client.get('/api/exports/rosters').status_code == 400
+    response = client.get('/api/exports/rosters', params={'installation_name': 'Nenhuma'})
+    assert response.status_code == 404
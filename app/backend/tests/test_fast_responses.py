@@ -0,0 +1,68 @@
+"""As rotas que devolvem FastJSONResponse pulam a validação do response_model:
+as chaves enviadas precisam ser exatamente os campos do modelo"""
+
+
+def fields(server, name):
+    return set(getattr(server, name).model_fields)
+
+
+def test_check_in_and_list_records(server, client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    
+    response = client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    assert response.status_code == 200
+    assert set(response.json()) == fields(server, 'AttendanceRecordResponse')
+    
+    rows = client.get(f"/api/attendance-records/list/{attendance_list['id']}").json()
+    assert len(rows) == 1
+    assert set(rows[0]) == fields(server, 'AttendanceRecordResponse')  # sem meeting_date
+
+
+def test_batch_records(server, client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    
+    body = client.post('/api/attendance-records/batch', json={
+        'list_id': attendance_list['id'], 'items': [{'code': professional['code']}, {'code': 'desconhecido'}],
+    }).json()
+    assert set(body) == fields(server, 'AttendanceBatchResponse')
+    assert set(body['results'][0]['record']) == fields(server, 'AttendanceRecordResponse')
+
+
+def test_paginated_lists(server, client, make_professional, make_list):
+    make_professional()
+    make_professional()
+    make_list()
+    
+    response = client.get('/api/professionals?limit=1')
+    assert response.headers['X-Next-Cursor']
+    assert set(response.json()[0]) == fields(server, 'ProfessionalResponse')
+    
+    rows = client.get('/api/attendance-lists').json()
+    assert set(rows[0]) == fields(server, 'AttendanceListResponse')
+    
+    # fields= continua restringindo a projeção
+    rows = client.get('/api/professionals?fields=email').json()
+    assert set(rows[0]) == {'id', 'name', 'email'}
+
+
+def test_reports_and_history(server, client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    client.put(f"/api/attendance-lists/{attendance_list['id']}/complete")
+    
+    rows = client.get('/api/reports/professionals').json()
+    assert set(rows[0]) == fields(server, 'ProfessionalStatsResponse')
+    row = client.get(f"/api/reports/professionals/{professional['id']}").json()
+    assert set(row) == fields(server, 'ProfessionalStatsResponse')
+    assert set(client.get('/api/reports/companies').json()[0]) == fields(server, 'CompanyStatsResponse')
+    assert set(client.get('/api/reports/installations').json()[0]) == fields(server, 'InstallationStatsResponse')
+    
+    window = 'date_from=2026-10-01&date_to=2026-10-31'
+    rows = client.get(f'/api/history/lists?{window}').json()
+    assert set(rows[0]) <= fields(server, 'HistoryListResponse')
+    assert set(rows[0]) >= fields(server, 'AttendanceListResponse')
+    rows = client.get(f"/api/history/professionals/{professional['id']}?{window}").json()
+    assert set(rows[0]) == fields(server, 'ProfessionalHistoryRecord')
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from health import ReadinessProbe
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_result_is_cached_for_ttl():
+    clock = Clock()
+    calls = []
+    
+    async def check():
+        calls.append(1)
+    
+    probe = ReadinessProbe(check, ttl=5, clock=clock)
+    
+    async def scenario():
+        first = await probe.status()
+        clock.now = 4.9
+        second = await probe.status()
+        clock.now = 5.0
+        third = await probe.status()
+        return first, second, third
+    
+    first, second, third = asyncio.run(scenario())
+    assert (first['ready'], first['cached']) == (True, False)
+    assert (second['cached'], second['checked_at']) == (True, first['checked_at'])
+    assert third['cached'] is False
+    assert len(calls) == 2
+
+
+def test_concurrent_probes_share_one_check():
+    async def check():
+        await asyncio.sleep(0.05)
+    
+    probe = ReadinessProbe(check)
+    
+    async def scenario():
+        return await asyncio.gather(*(probe.status() for _ in range(10)))
+    
+    results = asyncio.run(scenario())
+    assert probe.checks == 1
+    assert sum(not result['cached'] for result in results) == 1
+
+
+def test_failures_and_timeouts():
+    async def broken():
+        raise ConnectionError('recusada')
+    
+    async def hanging():
+        await asyncio.sleep(10)
+    
+    result = asyncio.run(ReadinessProbe(broken).status())
+    assert (result['ready'], result['error']) == (False, 'recusada')
+    result = asyncio.run(ReadinessProbe(hanging, timeout=0.05).status())
+    assert result['ready'] is False and '0.05' in result['error']
+
+
+def test_probe_routes(server, client, monkeypatch):
+    assert client.get('/api/health/live').json() == {'status': 'alive'}
+    response = client.get('/api/health/ready')
+    assert response.status_code == 200
+    assert response.json()['backend'] == 'SqliteRepository'
+    
+    async def down():
+        raise ConnectionError('sem banco')
+    
+    monkeypatch.setattr(server, 'readiness', ReadinessProbe(down))
+    response = client.get('/api/health/ready')
+    assert (response.status_code, response.json()['error']) == (503, 'sem banco')
+    assert client.get('/api/health/live').status_code == 200
+
+
+def test_api_starts_without_pdf_stack(tmp_path):
+    env = {**os.environ, 'DB_BACKEND': 'sqlite', 'SQLITE_PATH': ':memory:', 'PDF_CACHE_DIR': str(tmp_path)}
+    code = "import sys, server; print('reportlab' in sys.modules, 'pdf_layout' in sys.modules)"
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=Path(__file__).resolve().parent.parent, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    assert output.split() == ['False', 'False']
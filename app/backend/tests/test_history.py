@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from history import HistoryMaintenance, months_before
+
+
+def check_in_and_complete(client, attendance_list, professional):
+    response = client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    assert response.status_code == 200
+    assert client.put(f"/api/attendance-lists/{attendance_list['id']}/complete").status_code == 200
+
+
+def test_late_records_of_archived_month(server, client, make_professional, make_list):
+    professional = make_professional()
+    check_in_and_complete(client, make_list(meeting_date='2026-09-10'), professional)
+    
+    result = client.portal.call(server.repository.archive_attendance_history, '2026-10-01')
+    assert result['months'] == ['2026-09']
+    
+    # Lista criada depois com data do mês já arquivado: o próximo arquivamento a leva junto
+    late = make_list(meeting_date='2026-09-20')
+    check_in_and_complete(client, late, professional)
+    result = client.portal.call(server.repository.archive_attendance_history, '2026-10-01')
+    assert result['months'] == ['2026-09']
+    assert (result['lists'], result['records']) == (1, 1)
+    
+    rows = client.get(f"/api/history/professionals/{professional['id']}?date_from=2026-09-01&date_to=2026-09-30").json()
+    assert [row['meeting_date'] for row in rows] == ['2026-09-10', '2026-09-20']
+    lists = client.get('/api/history/lists?date_from=2026-09-01&date_to=2026-09-30').json()
+    assert all(row['archived_at'] for row in lists)
+
+
+def test_history_lists_window_filter_and_cursor(client, make_list):
+    lists = [make_list(installation_name='FPSO Histórico', meeting_date='2026-07-15', meeting_time=f'0{h}:00')
+             for h in (9, 7, 8)]
+    make_list(installation_name='Outra', meeting_date='2026-07-15')
+    params = {'date_from': '2026-07-01', 'date_to': '2026-07-31', 'installation_name': 'FPSO Histórico', 'limit': 2}
+    
+    response = client.get('/api/history/lists', params=params)
+    page = response.json()
+    page += client.get('/api/history/lists', params={**params, 'cursor': response.headers['X-Next-Cursor']}).json()
+    assert [row['meeting_time'] for row in page] == ['07:00', '08:00', '09:00']
+    assert {row['id'] for row in page} == {l['id'] for l in lists}
+    assert all(row['archived_at'] is None for row in page)
+
+
+@pytest.mark.parametrize('date_from, date_to', [('2026-07-31', '2026-07-01'), ('2025-01-01', '2026-07-01')])
+def test_history_window_is_bounded(client, date_from, date_to):
+    response = client.get('/api/history/lists', params={'date_from': date_from, 'date_to': date_to})
+    assert response.status_code == 400
+
+
+def test_months_before():
+    assert months_before(date(2026, 3, 18), 0) == date(2026, 3, 1)
+    assert months_before(date(2026, 3, 18), 3) == date(2025, 12, 1)
+    assert months_before(date(2026, 1, 31), 13) == date(2024, 12, 1)
+
+
+class FakeRepository:
+    def __init__(self):
+        self.calls = []
+    
+    async def ensure_attendance_partitions(self, months_ahead):
+        self.calls.append(('ensure', months_ahead))
+        return 2
+    
+    async def archive_attendance_history(self, before):
+        self.calls.append(('archive', before))
+        return {'status': 'archived', 'months': [], 'lists': 0, 'records': 0, 'skipped': []}
+
+
+def test_maintenance_run_once():
+    repository = FakeRepository()
+    asyncio.run(HistoryMaintenance(repository, months_ahead=3).run_once())
+    assert repository.calls == [('ensure', 3)]
+    
+    repository = FakeRepository()
+    maintenance = HistoryMaintenance(repository, months_ahead=1, archive_after_months=6)
+    asyncio.run(maintenance.run_once())
+    before = months_before(date.today(), 6).isoformat()
+    assert repository.calls == [('ensure', 1), ('archive', before)]
+    stats = maintenance.stats()
+    assert (stats['runs'], stats['partitions_created'], stats['last_archive']['before']) == (1, 2, before)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from idempotency import IdempotencyMiddleware, IdempotencyStore
+
+
+class CountingApp:
+    """Rota ASGI mínima: devolve o corpo recebido e conta as execuções"""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self, scope, receive, send):
+        self.calls += 1
+        message = await receive()
+        await asyncio.sleep(self.delay)
+        body = json.dumps({'call': self.calls, 'echo': message['body'].decode()}).encode()
+        await send({'type': 'http.response.start', 'status': self.status,
+                    'headers': [(b'content-type', b'application/json')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+async def post(app, body: bytes, key=None, path='/api/attendance-records'):
+    headers = [(b'content-type', b'application/json')]
+    if key is not None:
+        headers.append((b'idempotency-key', key.encode()))
+    scope = {'type': 'http', 'method': 'POST', 'path': path, 'headers': headers}
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    return start['status'], dict(start['headers']), b''.join(m.get('body', b'') for m in messages[1:])
+
+
+def middleware(app, store=None):
+    return IdempotencyMiddleware(app, store=store or IdempotencyStore(), paths=['/api/attendance-records'])
+
+
+def test_replay_returns_stored_response_without_running_route():
+    app = CountingApp()
+    wrapped = middleware(app)
+
+    async def scenario():
+        first = await post(wrapped, b'{"code": "c1"}', key='k1')
+        second = await post(wrapped, b'{"code": "c1"}', key='k1')
+        return first, second
+
+    (status1, headers1, body1), (status2, headers2, body2) = asyncio.run(scenario())
+    assert app.calls == 1
+    assert (status1, body1) == (status2, body2)
+    assert b'idempotent-replayed' not in headers1
+    assert headers2[b'idempotent-replayed'] == b'true'
+
+
+def test_key_reused_with_other_body_is_422():
+    app = CountingApp()
+    wrapped = middleware(app)
+
+    async def scenario():
+        await post(wrapped, b'{"code": "c1"}', key='k1')
+        return await post(wrapped, b'{"code": "c2"}', key='k1')
+
+    status, _, body = asyncio.run(scenario())
+    assert status == 422
+    assert 'outro corpo' in json.loads(body)['detail']
+    assert app.calls == 1
+
+
+def test_concurrent_repeats_wait_for_the_first_execution():
+    app = CountingApp(delay=0.05)
+    wrapped = middleware(app)
+
+    async def scenario():
+        return await asyncio.gather(*(post(wrapped, b'{}', key='k1') for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert app.calls == 1
+    assert len({body for _, _, body in results}) == 1
+
+
+def test_requests_without_key_or_outside_paths_always_run():
+    app = CountingApp()
+    wrapped = middleware(app)
+
+    async def scenario():
+        await post(wrapped, b'{}')
+        await post(wrapped, b'{}')
+        await post(wrapped, b'{}', key='k1', path='/api/attendance-lists')
+        await post(wrapped, b'{}', key='k1', path='/api/attendance-lists')
+
+    asyncio.run(scenario())
+    assert app.calls == 4
+
+
+def test_invalid_key_is_400():
+    app = CountingApp()
+
+    status, _, _ = asyncio.run(post(middleware(app), b'{}', key='x' * 256))
+    assert status == 400
+    assert app.calls == 0
+
+
+def test_server_errors_and_429_are_not_stored():
+    for status in (500, 429):
+        app = CountingApp(status=status)
+        store = IdempotencyStore()
+        wrapped = middleware(app, store)
+
+        async def scenario():
+            await post(wrapped, b'{}', key='k1')
+            return await post(wrapped, b'{}', key='k1')
+
+        replay_status, headers, _ = asyncio.run(scenario())
+        assert replay_status == status
+        assert b'idempotent-replayed' not in headers
+        assert app.calls == 2
+        assert store.replays == 0
@@ -0,0 +1,39 @@
+CSV = (
+    '﻿code,name,email,profession,company\n'
+    'imp-1,Ana Import,ana.import@example.com,Técnica,ACME\n'
+    'imp-1,Ana Repetida,outra.import@example.com,Técnica,ACME\n'
+    'imp-2,Sem Email,nao-e-email,Técnico,ACME\n'
+    'imp-3,Bruno Import,bruno.import@example.com,Soldador,Naval\n'
+)
+
+
+def test_csv_import(client, make_professional):
+    existing = make_professional(email='ja.cadastrado@example.com')
+    body = CSV + f"imp-4,Outro,{existing['email']},Técnico,ACME\n"
+    
+    response = client.post('/api/professionals/import', content=body.encode(), headers={'content-type': 'text/csv'})
+    assert response.status_code == 200
+    result = response.json()
+    
+    assert [r['status'] for r in result['results']] == ['created', 'duplicate', 'invalid', 'created', 'exists']
+    assert (result['total'], result['created'], result['duplicate'], result['invalid'], result['exists'],
+            result['failed']) == (5, 2, 1, 1, 1, 0)
+    assert result['results'][2]['error'].startswith('email')
+    
+    # Os criados já têm código de registro e podem fazer check-in por ele
+    created = result['results'][3]
+    found = client.get(f"/api/professionals/by-registration/{created['registration_code']}").json()
+    assert (found['id'], found['name']) == (created['id'], 'Bruno Import')
+
+
+def test_json_import_and_errors(client):
+    rows = [{'code': 'imp-json', 'name': 'Carla', 'email': 'carla.import@example.com',
+             'profession': 'Técnica', 'company': 'ACME'}]
+    result = client.post('/api/professionals/import', json=rows).json()
+    assert result['results'][0]['status'] == 'created'
+    
+    # Reenvio do mesmo arquivo: nada é criado de novo
+    assert client.post('/api/professionals/import', json=rows).json()['results'][0]['status'] == 'exists'
+    
+    assert client.post('/api/professionals/import', json={'code': 'x'}).status_code == 400
+    assert client.post('/api/professionals/import', json=[]).status_code == 400
@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+from jobs import JobQueue
+
+
+def test_submit_before_start_runs_after_start():
+    async def scenario():
+        queue = JobQueue(retry_delay=0)
+        done = []
+        
+        async def work(value):
+            done.append(value)
+        
+        job = queue.submit('work', work, 1, key='recurso:1')
+        assert job.status == 'queued'
+        assert queue.stats() == {'queued': 1, 'jobs': {'queued': 1}}
+        
+        await queue.start()
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        return queue, job, done
+    
+    queue, job, done = asyncio.run(scenario())
+    assert done == [1]
+    assert job.status == 'done' and job.attempts == 1 and job.finished_at
+    assert queue.get(job.id) is job
+    assert queue.get_by_key('recurso:1') is job
+    assert queue.stats() == {'queued': 0, 'jobs': {'done': 1}}
+
+
+def test_retries_then_fails():
+    async def scenario():
+        queue = JobQueue(retry_delay=0)
+        calls = []
+        
+        async def flaky():
+            calls.append(1)
+            if len(calls) < 2:
+                raise RuntimeError('instável')
+        
+        async def broken():
+            raise RuntimeError('quebrado')
+        
+        await queue.start()
+        recovered = queue.submit('flaky', flaky)
+        failed = queue.submit('broken', broken, max_attempts=2)
+        await asyncio.wait_for(queue._queue.join(), 1)
+        await queue.stop()
+        return recovered, failed
+    
+    recovered, failed = asyncio.run(scenario())
+    assert (recovered.status, recovered.attempts, recovered.error) == ('done', 2, None)
+    assert (failed.status, failed.attempts, failed.error) == ('failed', 2, 'quebrado')
+
+
+def test_history_is_bounded():
+    queue = JobQueue(max_history=2)
+    
+    async def noop():
+        pass
+    
+    jobs = [queue.submit('noop', noop, key=f'k{i}') for i in range(3)]
+    assert queue.get(jobs[0].id) is None
+    assert queue.get_by_key('k0') is None
+    assert queue.get_by_key('k2') is jobs[2]
+
+
+def test_completion_prerenders_pdf(client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    job_id = client.put(f"/api/attendance-lists/{attendance_list['id']}/complete").json()['pdf_job_id']
+    
+    deadline = time.monotonic() + 30
+    while client.get(f'/api/jobs/{job_id}').json()['status'] in ('queued', 'running'):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    
+    status = client.get(f"/api/attendance-lists/{attendance_list['id']}/pdf/status").json()
+    assert status['ready'] is True
+    assert (status['job']['id'], status['job']['status']) == (job_id, 'done')
+    assert client.get('/api/jobs/inexistente').status_code == 404
@@ -0,0 +1,69 @@
+import asyncio
+
+from metrics import Registry, TimedProxy, _db_calls
+
+
+def test_render_counter_histogram_and_collector():
+    registry = Registry(prefix='t_')
+    counter = registry.counter('events_total', "Eventos", ('kind',))
+    histogram = registry.histogram('seconds', "Duração", ('op',), buckets=(0.1, 1.0))
+    registry.collector('queue', "Fila", 'gauge', lambda: [('', {'name': 'a"b'}, 3)])
+    
+    counter.inc(kind='x')
+    counter.inc(2, kind='x')
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, op='get')
+    
+    lines = registry.render().splitlines()
+    assert '# TYPE t_events_total counter' in lines
+    assert 't_events_total{kind="x"} 3' in lines
+    # Faixas cumulativas, +Inf igual ao total
+    assert 't_seconds_bucket{op="get",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{op="get",le="1.0"} 2' in lines
+    assert 't_seconds_bucket{op="get",le="+Inf"} 3' in lines
+    assert 't_seconds_count{op="get"} 3' in lines
+    assert 't_queue{name="a\\"b"} 3' in lines
+
+
+class Target:
+    async def read(self, value):
+        return value
+    
+    async def _private(self):
+        return 'privado'
+    
+    def sync(self):
+        return 'síncrono'
+
+
+def test_timed_proxy_measures_public_coroutines():
+    histogram = Registry().histogram('db', "Banco", ('operation',))
+    proxy = TimedProxy(Target(), histogram)
+    
+    async def scenario():
+        calls = [0]
+        token = _db_calls.set(calls)
+        try:
+            results = [await proxy.read(1), await proxy.read(2), await proxy._private(), proxy.sync()]
+        finally:
+            _db_calls.reset(token)
+        return results, calls[0]
+    
+    results, calls = asyncio.run(scenario())
+    assert results == [1, 2, 'privado', 'síncrono']
+    assert calls == 2
+    assert 'db_count{operation="read"} 2' in histogram.collect()
+
+
+def test_metrics_endpoint(client, make_list):
+    attendance_list = make_list()
+    client.get(f"/api/attendance-lists/{attendance_list['id']}")
+    
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    text = response.text
+    # Rota pelo template, não pelo caminho com o id
+    assert 'route="/api/attendance-lists/{list_id}"' in text
+    assert attendance_list['id'] not in text
+    assert 'lista_db_query_duration_seconds_count{operation="get_attendance_list"}' in text
+    assert 'lista_db_calls_per_request_bucket{route="/api/attendance-lists/{list_id}"' in text
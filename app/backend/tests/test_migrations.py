@@ -0,0 +1,34 @@
+import re
+
+import pytest
+
+from migrate import MIGRATIONS_DIR, load_migrations
+
+
+def test_repository_migrations_are_sequential():
+    migrations = load_migrations()
+    assert [m.version for m in migrations] == [f'{n:04d}' for n in range(1, len(migrations) + 1)]
+    assert all(len(m.checksum) == 64 for m in migrations)
+
+
+def test_database_sql_marks_every_migration():
+    """Um banco criado pelo database.sql já está no estado de todas as migrações"""
+    schema = (MIGRATIONS_DIR.parent / 'database.sql').read_text()
+    block = schema.split('INSERT INTO schema_migrations (version, name) VALUES', 1)[1].split(';', 1)[0]
+    marked = re.findall(r"\('(\d{4})', '(\w+)'\)", block)
+    assert marked == [(m.version, m.name) for m in load_migrations()]
+
+
+def test_invalid_and_repeated_names(tmp_path):
+    (tmp_path / '0001_primeira.sql').write_text('SELECT 1;')
+    (tmp_path / '0002_segunda.sql').write_text('SELECT 2;')
+    assert [m.name for m in load_migrations(tmp_path)] == ['primeira', 'segunda']
+    
+    (tmp_path / '0002_outra.sql').write_text('SELECT 3;')
+    with pytest.raises(ValueError, match='0002'):
+        load_migrations(tmp_path)
+    
+    (tmp_path / '0002_outra.sql').unlink()
+    (tmp_path / '3_sem_zeros.sql').write_text('SELECT 4;')
+    with pytest.raises(ValueError, match='3_sem_zeros.sql'):
+        load_migrations(tmp_path)
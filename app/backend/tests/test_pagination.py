@@ -0,0 +1,50 @@
+def walk(client, path, limit=2):
+    """Percorre todas as páginas seguindo o X-Next-Cursor"""
+    rows, cursor = [], None
+    while True:
+        params = {'limit': limit, 'count': 'exact'}
+        if cursor:
+            params['cursor'] = cursor
+        response = client.get(path, params=params)
+        assert response.status_code == 200
+        rows.extend(response.json())
+        total = int(response.headers['X-Total-Count'])
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return rows, total
+
+
+def test_professionals_keyset_walk(client, make_professional):
+    for name in ('Bruno', 'Ana', 'Ana', 'Carla', 'Ana'):
+        make_professional(name=name)
+    
+    rows, total = walk(client, '/api/professionals')
+    keys = [(row['name'], row['id']) for row in rows]
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys) == total
+
+
+def test_attendance_lists_keyset_walk(client, make_list):
+    for _ in range(5):
+        make_list()
+    
+    rows, total = walk(client, '/api/attendance-lists')
+    keys = [(row['created_at'], row['id']) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == len(keys) == total
+
+
+def test_status_filter_and_projection(client, make_list):
+    completed = make_list()
+    client.put(f"/api/attendance-lists/{completed['id']}/complete")
+    
+    rows = client.get('/api/attendance-lists', params={'status': 'active', 'fields': 'status', 'limit': 100}).json()
+    assert rows and all(set(row) == {'id', 'created_at', 'status'} for row in rows)
+    assert {row['status'] for row in rows} == {'active'}
+    assert completed['id'] not in {row['id'] for row in rows}
+
+
+def test_invalid_fields_and_cursor(client):
+    assert client.get('/api/professionals', params={'fields': 'name,senha'}).status_code == 400
+    assert client.get('/api/professionals', params={'cursor': 'não-é-cursor'}).status_code == 400
+    assert client.get('/api/attendance-lists', params={'limit': 0}).status_code == 422
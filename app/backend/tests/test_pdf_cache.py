@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+
+from cache import PdfCache
+
+
+FINISHED = datetime(2026, 10, 18, 9, 30, tzinfo=timezone.utc)
+
+
+def test_lookup_by_list_and_content_hash(tmp_path):
+    cache = PdfCache(tmp_path, version=2)
+    cache.put('lista-1', 'hash1', b'%PDF-1', FINISHED)
+    
+    # Outra instância (outro processo) lê do disco, com o Last-Modified do fim da lista
+    reloaded = PdfCache(tmp_path, version=2)
+    assert reloaded.has('lista-1')
+    entry = reloaded.get('lista-1', 'hash1')
+    assert (entry.content, entry.last_modified) == (b'%PDF-1', FINISHED)
+    assert reloaded.get('lista-1', 'outro-hash') is None
+    
+    # Um PDF novo da lista substitui o anterior também no disco
+    cache.put('lista-1', 'hash2', b'%PDF-2', FINISHED)
+    assert [path.name for path in tmp_path.iterdir()] == ['lista-1-v2-hash2.pdf']
+    assert PdfCache(tmp_path, version=2).get('lista-1', 'hash1') is None
+
+
+def test_other_versions_are_ignored_and_purged(tmp_path):
+    PdfCache(tmp_path, version=1).put('lista-1', 'hash1', b'%PDF-antigo', FINISHED)
+    
+    cache = PdfCache(tmp_path, version=2)
+    assert not cache.has('lista-1')
+    assert cache.get('lista-1', 'hash1') is None
+    assert cache.purge_stale() == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_unsafe_ids_stay_in_memory(tmp_path):
+    cache = PdfCache(tmp_path, version=2)
+    cache.put('../fora', 'hash1', b'%PDF', FINISHED)
+    
+    assert cache.get('../fora', 'hash1').content == b'%PDF'
+    assert not any(tmp_path.parent.glob('fora*'))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_memory_limit_in_bytes(tmp_path):
+    cache = PdfCache(tmp_path, version=2, max_memory_bytes=10)
+    cache.put('a', 'h', b'123456', FINISHED)
+    cache.put('b', 'h', b'123456', FINISHED)
+    
+    assert cache.stats()['memory_entries'] == 1
+    assert cache.memory_bytes == 6
+    # A entrada que saiu da memória continua no disco
+    assert cache.get('a', 'h').content == b'123456'
+
+
+def test_etag_and_not_modified(client, make_professional, make_list):
+    professional = make_professional()
+    attendance_list = make_list()
+    client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    client.put(f"/api/attendance-lists/{attendance_list['id']}/complete")
+    path = f"/api/attendance-lists/{attendance_list['id']}/pdf"
+    
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.content.startswith(b'%PDF')
+    etag = response.headers['ETag']
+    
+    assert client.get(path, headers={'If-None-Match': etag}).status_code == 304
+    assert client.get(path, headers={'If-None-Match': '"outro"'}).status_code == 200
+    assert client.get(path).headers['ETag'] == etag
+
+
+def test_content_hash_covers_layout(server, monkeypatch):
+    attendance_list = {'id': 'l1', 'status': 'completed'}
+    records = [{'id': 'r1', 'row_number': 1}]
+    
+    before = server.pdf_content_hash(attendance_list, records)
+    assert server.pdf_content_hash(attendance_list, records) == before
+    
+    # Outra paginação gera outro documento: não pode reaproveitar o PDF em cache
+    monkeypatch.setattr(server, 'PDF_ROWS_PER_PAGE', server.PDF_ROWS_PER_PAGE + 1)
+    assert server.pdf_content_hash(attendance_list, records) != before
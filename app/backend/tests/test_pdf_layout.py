@@ -0,0 +1,53 @@
+import re
+
+import pytest
+
+import pdf_layout
+from pdf import ROWS_PER_PAGE, build_attendance_pdf
+
+
+ATTENDANCE_LIST = {
+    'installation_name': 'P-74', 'meeting_date': '2026-10-18', 'meeting_time': '07:00',
+    'course_title': 'NR-10', 'course_content': 'Segurança em instalações elétricas',
+    'instructor_name': 'Instrutor', 'instructor_role': 'Engenheiro', 'instructor_qualification': 'CREA',
+    'location': 'Sala 1',
+}
+
+
+def records(count: int) -> list:
+    return [
+        {
+            'row_number': n, 'entry_time': '2026-10-18T07:00:00+00:00', 'local': 'Sala 1',
+            'professionals': {'name': f'Profissional {n}', 'email': f'p{n}@example.com',
+                              'profession': 'Técnico', 'company': 'ACME'},
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def page_count(content: bytes) -> int:
+    return len(re.findall(rb'/Type\s*/Page[^s]', content))
+
+
+@pytest.mark.parametrize('count, pages', [
+    (0, 1),
+    (ROWS_PER_PAGE, 1),
+    (ROWS_PER_PAGE + 1, 2),
+    (3 * ROWS_PER_PAGE, 3),
+])
+def test_pages_per_roster(count, pages):
+    assert page_count(build_attendance_pdf(ATTENDANCE_LIST, records(count))) == pages
+
+
+def test_last_page_padded_with_blank_rows():
+    tables = [
+        element for element in pdf_layout.roster_elements(ATTENDANCE_LIST, iter(records(ROWS_PER_PAGE + 1)))
+        if isinstance(element, pdf_layout.Table) and element._cellvalues[0] == pdf_layout.PARTICIPANTS_HEADER
+    ]
+    assert len(tables) == 2
+    # Cabeçalho + ROWS_PER_PAGE linhas em cada página, numeradas em sequência
+    assert all(len(table._cellvalues) == ROWS_PER_PAGE + 1 for table in tables)
+    assert [row[0] for row in tables[1]._cellvalues[1:]] == [
+        str(n) for n in range(ROWS_PER_PAGE + 1, 2 * ROWS_PER_PAGE + 1)
+    ]
+    assert tables[1]._cellvalues[2][1] == ''
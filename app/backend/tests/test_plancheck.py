@@ -0,0 +1,36 @@
+"""Planos de execução das consultas da API (plancheck.py) no pytest.
+
+Só rodam com PLANCHECK_DATABASE_URL apontando para um banco descartável: o
+schema é recriado e populado uma vez por sessão. PLANCHECK_SKIP_SEED=1 reusa
+os dados já carregados.
+"""
+import asyncio
+import os
+
+import pytest
+
+from plancheck import CHECKS, DEFAULT_SEED, PlanSession, describe, verify
+
+
+DSN = os.environ.get('PLANCHECK_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not DSN, reason="PLANCHECK_DATABASE_URL não definida (banco descartável)")
+
+
+@pytest.fixture(scope='module')
+def plan_session():
+    # A conexão asyncpg fica presa ao loop em que foi aberta: um loop para o módulo
+    loop = asyncio.new_event_loop()
+    seed_args = None if os.environ.get('PLANCHECK_SKIP_SEED') == '1' else DEFAULT_SEED
+    session = loop.run_until_complete(PlanSession.open(DSN, seed_args))
+    yield loop, session
+    loop.run_until_complete(session.close())
+    loop.close()
+
+
+@pytest.mark.parametrize('check, source', CHECKS, ids=[check.name for check, _ in CHECKS])
+def test_query_plan(plan_session, check, source):
+    loop, session = plan_session
+    plans = loop.run_until_complete(source(session, check))
+    problems = verify(check, plans, session.relations)
+    assert not problems, '\n'.join(problems + [line for plan in plans for line in describe(plan)])
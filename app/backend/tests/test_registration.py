@@ -0,0 +1,50 @@
+import re
+from pathlib import Path
+
+import pytest
+
+import registration
+from registration import CAPACITY, registration_code, registration_number
+
+MIGRATION = Path(__file__).resolve().parents[3] / 'migrations' / '0006_registration_counters.sql'
+
+
+def test_permutation_is_a_bijection_over_the_year():
+    codes = {registration_code(2026, n) for n in range(CAPACITY)}
+    assert len(codes) == CAPACITY == 36 ** 4
+
+
+def test_code_format():
+    code = registration_code(2026, 0)
+    assert re.fullmatch(r'PRF-2026-[0-9A-Z]{4}', code)
+    # Consecutivos não parecem sequenciais
+    assert registration_code(2026, 1)[-4:-1] != code[-4:-1]
+
+
+def test_registration_number_inverts_registration_code():
+    for year in (2024, 2026):
+        for number in (0, 1, 2, 12345, CAPACITY - 1):
+            assert registration_number(registration_code(year, number)) == (year, number)
+    assert registration_number(registration_code(2026, 7).lower()) == (2026, 7)
+
+
+def test_same_number_differs_between_years():
+    assert registration_code(2025, 0)[-4:] != registration_code(2026, 0)[-4:]
+
+
+@pytest.mark.parametrize('number', [-1, CAPACITY])
+def test_number_outside_capacity_is_rejected(number):
+    with pytest.raises(ValueError):
+        registration_code(2026, number)
+
+
+def test_invalid_code_is_rejected():
+    with pytest.raises(ValueError):
+        registration_number('ABC-2026-0000')
+
+
+def test_migration_backfill_uses_the_same_permutation():
+    sql = MIGRATION.read_text()
+    assert f"(year * 7919) % {CAPACITY}" in sql
+    assert f"* {registration._INVERSE}) % {CAPACITY}" in sql
+    assert registration._offset(2026) == (2026 * 7919) % CAPACITY
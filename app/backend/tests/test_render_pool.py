@@ -0,0 +1,76 @@
+import asyncio
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from pdf import RenderPool, RenderPoolSaturated
+
+
+# Executadas nos workers (spawn): precisam ser importáveis pelo nome do módulo
+
+def add(a, b):
+    return a + b
+
+
+def slow_add(a, b):
+    time.sleep(0.3)
+    return a + b
+
+
+def crash():
+    os._exit(1)
+
+
+@pytest.fixture
+def pool():
+    render_pool = RenderPool(workers=1, max_queue=0)
+    yield render_pool
+    render_pool.shutdown()
+
+
+def test_run_returns_worker_result_and_reports_time(pool):
+    timings = []
+    pool.on_render = lambda name, seconds: timings.append((name, seconds))
+
+    assert asyncio.run(pool.run(add, 2, 3)) == 5
+    assert [name for name, _ in timings] == ['add']
+    assert pool.stats()['pending'] == 0
+
+
+def test_saturated_pool_rejects(pool):
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(slow_add, 1, 1))
+        await asyncio.sleep(0.05)
+        with pytest.raises(RenderPoolSaturated):
+            await pool.run(add, 1, 1)
+        return await running
+
+    assert asyncio.run(scenario()) == 2
+    assert pool.rejected == 1
+
+
+def test_run_when_available_waits_for_a_free_slot(pool):
+    async def scenario():
+        running = asyncio.ensure_future(pool.run(slow_add, 1, 1))
+        await asyncio.sleep(0.05)
+        waiting = asyncio.ensure_future(pool.run_when_available(add, 2, 2))
+        await asyncio.sleep(0.05)
+        assert pool.stats()['waiting'] == 1
+        return await asyncio.gather(running, waiting)
+
+    assert asyncio.run(scenario()) == [2, 4]
+    # Esperou a vaga sem tentar (e ser recusado) de novo
+    assert pool.rejected == 0
+    assert pool.stats()['waiting'] == 0
+
+
+def test_pool_is_recreated_after_a_worker_dies(pool):
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await pool.run(crash)
+        return await pool.run(add, 20, 22)
+
+    assert asyncio.run(scenario()) == 42
+    assert pool.restarts == 1
@@ -0,0 +1,83 @@
+from search import ProfessionalIndex, edit_distance, normalize, trigrams, words
+
+
+PROFESSIONALS = [
+    {'id': '1', 'name': 'João da Silva', 'email': 'joao.silva@petro.com', 'company': 'Petro', 'registration_code': 'PRF-2026-A1B2'},
+    {'id': '2', 'name': 'Joana Souza', 'email': 'joana@offshore.com', 'company': 'Offshore', 'registration_code': 'PRF-2026-C3D4'},
+    {'id': '3', 'name': 'Maria Oliveira', 'email': 'maria@petro.com', 'company': 'Petro', 'registration_code': 'PRF-2026-E5F6'},
+    {'id': '4', 'name': 'Mário Silveira', 'email': 'mario@drill.com', 'company': 'Drill', 'registration_code': 'PRF-2026-G7H8'},
+]
+
+
+def build_index():
+    index = ProfessionalIndex()
+    for professional in PROFESSIONALS:
+        index.add(professional)
+    return index
+
+
+def ids(results):
+    return [professional['id'] for _, professional in results]
+
+
+def test_normalize_and_words():
+    assert normalize('João Érico') == 'joao erico'
+    assert words('joao.silva@petro.com') == ['joao', 'silva', 'petro', 'com']
+
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams('joa') == {'  j', ' jo', 'joa', 'oa '}
+    assert trigrams('joa', prefix=True) == {'  j', ' jo', 'joa'}
+
+
+def test_edit_distance_counts_transposition_as_one():
+    assert edit_distance('silva', 'silva') == 0
+    assert edit_distance('silva', 'slva') == 1
+    assert edit_distance('silva', 'sliva') == 1
+    assert edit_distance('silva', 'souza') == 3
+
+
+def test_exact_word_ranks_first():
+    results = build_index().search('maria')
+    assert ids(results)[0] == '3'
+    assert results[0][0] == 1.0
+
+
+def test_prefix_while_typing():
+    # "joa" é o começo de joao e de joana: nota 1.0, desempate alfabético
+    results = build_index().search('joa')
+    assert ids(results)[:2] == ['2', '1']
+    assert [score for score, _ in results[:2]] == [1.0, 1.0]
+
+
+def test_typo_is_tolerated_but_ranks_below_exact():
+    results = build_index().search('silvia')
+    assert ids(results)[0] == '1'
+    assert 0.3 <= results[0][0] < 1.0
+
+
+def test_every_query_word_counts():
+    results = build_index().search('petro maria')
+    assert ids(results)[0] == '3'
+    assert results[0][0] > dict((p['id'], s) for s, p in results).get('1', 0)
+
+
+def test_registration_code_and_limit():
+    index = build_index()
+    assert ids(index.search('PRF-2026-E5F6', limit=1)) == ['3']
+    assert len(index.search('petro', limit=1)) == 1
+
+
+def test_unrelated_query_returns_nothing():
+    assert build_index().search('xyzzy') == []
+    assert build_index().search('   ') == []
+
+
+def test_remove_and_reindex():
+    index = build_index()
+    index.remove('3')
+    assert '3' not in ids(index.search('maria'))
+    index.add({**PROFESSIONALS[0], 'name': 'João Pereira', 'email': 'joao.pereira@petro.com'})
+    assert ids(index.search('pereira')) == ['1']
+    assert '1' not in ids(index.search('silva'))
+    assert len(index) == 3
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from repository import ConflictError, Repository, SupabaseRepository, repository_from_env
+from repository_postgres import PostgresRepository
+from repository_sqlite import SqliteRepository
+
+
+PROFESSIONAL = {'code': 'c1', 'name': 'Ana', 'email': 'ana@example.com', 'profession': 'Técnica',
+                'company': 'ACME', 'registration_code': 'AAA111'}
+ATTENDANCE_LIST = {
+    'installation_name': 'P-74', 'meeting_date': '2026-10-18', 'meeting_time': '07:00', 'course_title': 'NR-10',
+    'course_content': 'Segurança', 'instructor_name': 'Instrutor', 'instructor_role': 'Engenheiro',
+    'instructor_qualification': 'CREA', 'location': 'Sala 1',
+}
+
+
+def run(repository, scenario):
+    async def main():
+        await repository.connect()
+        try:
+            return await scenario(repository)
+        finally:
+            await repository.close()
+    return asyncio.run(main())
+
+
+def test_round_trip_in_file_database(tmp_path):
+    path = str(tmp_path / 'lista.db')
+    
+    async def write(repository):
+        professional, = await repository.insert_professionals([PROFESSIONAL])
+        attendance_list = await repository.insert_attendance_list(ATTENDANCE_LIST)
+        outcome = await repository.register_attendance(attendance_list['id'], None, 'aaa111')
+        return professional, attendance_list, outcome
+    
+    professional, attendance_list, outcome = run(SqliteRepository(path), write)
+    assert outcome['status'] == 'created'
+    assert (outcome['record']['professional_name'], outcome['record']['row_number']) == ('Ana', 1)
+    
+    async def read(repository):
+        return (
+            await repository.get_professional('registration_code', 'AAA111'),
+            await repository.get_list_records(attendance_list['id']),
+            await repository.list_attendance_lists(None, 10, count='exact'),
+        )
+    
+    # Outra conexão (leitura pela conexão somente leitura do WAL) vê o que foi gravado
+    found, records, (lists, total) = run(SqliteRepository(path), read)
+    assert found['id'] == professional['id']
+    assert [record['row_number'] for record in records] == [1]
+    # Mesmo formato dos outros backends: profissional embutido em `professionals`
+    assert records[0]['professionals'] == {
+        'name': 'Ana', 'email': 'ana@example.com', 'profession': 'Técnica', 'company': 'ACME',
+    }
+    assert (len(lists), total) == (1, 1)
+
+
+def test_unique_violation_rolls_back_batch():
+    async def scenario(repository):
+        await repository.insert_professionals([PROFESSIONAL])
+        with pytest.raises(ConflictError):
+            await repository.insert_professionals([
+                {**PROFESSIONAL, 'code': 'c2', 'email': 'novo@example.com', 'registration_code': 'BBB222'},
+                {**PROFESSIONAL, 'code': 'c3', 'registration_code': 'CCC333'},  # email repetido
+            ])
+        return await repository.find_professional_values('code', ['c1', 'c2', 'c3'])
+    
+    assert run(SqliteRepository(), scenario) == {'c1'}
+
+
+def test_registration_counter_reserves_ranges():
+    async def scenario(repository):
+        firsts = await asyncio.gather(*(repository.allocate_registration_numbers(2026, 5) for _ in range(4)))
+        return sorted(firsts), await repository.get_registration_counter(2026)
+    
+    assert run(SqliteRepository(), scenario) == ([0, 5, 10, 15], 20)
+
+
+def test_lookup_column_is_validated():
+    async def scenario(repository):
+        with pytest.raises(ValueError):
+            await repository.get_professional('name; DROP TABLE professionals', 'x')
+    
+    run(SqliteRepository(), scenario)
+
+
+def test_backend_from_env(monkeypatch):
+    monkeypatch.setenv('DB_BACKEND', 'SQLite')
+    monkeypatch.setenv('SQLITE_PATH', ':memory:')
+    assert isinstance(repository_from_env(), SqliteRepository)
+    
+    monkeypatch.setenv('DB_BACKEND', 'mysql')
+    with pytest.raises(ValueError):
+        repository_from_env()
+
+
+def test_backends_implement_the_whole_interface():
+    for backend in (SupabaseRepository, PostgresRepository, SqliteRepository):
+        assert not backend.__abstractmethods__
+    
+    class PartialRepository(Repository):
+        async def ping(self):
+            pass
+    
+    with pytest.raises(TypeError):
+        PartialRepository()
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+
+def by_key(rows, key, value):
+    return next(row for row in rows if row[key] == value)
+
+
+def complete_after(client, server, attendance_list, hours: float):
+    """Finaliza a lista como se tivesse começado `hours` horas atrás"""
+    started = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    client.portal.call(server.repository.update_attendance_list, attendance_list['id'], {'start_time': started})
+    server.list_cache.invalidate(attendance_list['id'])
+    assert client.put(f"/api/attendance-lists/{attendance_list['id']}/complete").status_code == 200
+
+
+def test_stats_follow_check_ins_and_completion(server, client, make_professional, make_list):
+    first = make_professional(company='Estaleiro Stats')
+    second = make_professional(company='Estaleiro Stats')
+    completed = make_list(installation_name='FPSO Stats')
+    make_list(installation_name='FPSO Stats')  # segue ativa
+    for professional in (first, second):
+        client.post('/api/attendance-records', json={'list_id': completed['id'], 'code': professional['code']})
+    
+    # Antes da finalização só as presenças contam
+    stats = client.get(f"/api/reports/professionals/{first['id']}").json()
+    assert (stats['attendances'], stats['training_seconds'], stats['name']) == (1, 0, first['name'])
+    
+    complete_after(client, server, completed, hours=2)
+    
+    stats = client.get(f"/api/reports/professionals/{first['id']}").json()
+    assert stats['training_seconds'] == pytest.approx(7200, abs=5)
+    assert stats['training_hours'] == 2.0
+    
+    # Presenças de empresa e instalação só entram na consolidação
+    company = by_key(client.get('/api/reports/companies').json(), 'company', 'Estaleiro Stats')
+    assert company['attendances'] == 0
+    assert client.portal.call(server.stats_rollup.run_once) >= 2
+    assert client.portal.call(server.stats_rollup.run_once) == 0
+    
+    company = by_key(client.get('/api/reports/companies').json(), 'company', 'Estaleiro Stats')
+    assert company['attendances'] == 2
+    assert company['training_seconds'] == pytest.approx(2 * 7200, abs=10)
+    
+    installation = by_key(client.get('/api/reports/installations').json(), 'installation_name', 'FPSO Stats')
+    assert (installation['lists'], installation['completed_lists'], installation['attendances']) == (2, 1, 2)
+    assert installation['session_seconds'] == pytest.approx(7200, abs=5)
+    assert installation['training_seconds'] == pytest.approx(2 * 7200, abs=10)
+
+
+def test_professional_ranking_pages(client, make_professional, make_list):
+    attendance_list = make_list()
+    for professional in (make_professional(), make_professional()):
+        client.post('/api/attendance-records', json={'list_id': attendance_list['id'], 'code': professional['code']})
+    
+    response = client.get('/api/reports/professionals', params={'limit': 1})
+    assert response.status_code == 200
+    first_page = response.json()
+    second_page = client.get(
+        '/api/reports/professionals', params={'limit': 1, 'cursor': response.headers['X-Next-Cursor']}
+    ).json()
+    assert first_page[0]['training_seconds'] >= second_page[0]['training_seconds']
+    assert client.get('/api/reports/professionals/inexistente').status_code == 404
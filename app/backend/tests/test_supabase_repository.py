@@ -0,0 +1,92 @@
+import asyncio
+import json
+from functools import partial
+
+import httpx
+import pytest
+
+import db as db_module
+from db import Database
+from repository import ConflictError, SupabaseRepository
+
+
+class FakePostgrest:
+    """Responde às requisições do PostgREST e guarda o que recebeu"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, body = self.responses[request.url.path]
+        return httpx.Response(status, json=body)
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    def make(responses):
+        server = FakePostgrest(responses)
+        monkeypatch.setattr(
+            db_module.httpx, 'AsyncClient', partial(httpx.AsyncClient, transport=httpx.MockTransport(server))
+        )
+        return SupabaseRepository(Database('https://db.example.com/', 'chave', http2=False)), server
+    return make
+
+
+def run(repository, coro_fn, *args):
+    async def scenario():
+        await repository.connect()
+        try:
+            return await coro_fn(repository, *args)
+        finally:
+            await repository.close()
+    return asyncio.run(scenario())
+
+
+def test_select_uses_pooled_client_with_service_headers(supabase):
+    repository, server = supabase({'/rest/v1/professionals': (200, [{'id': 'p1', 'code': 'c1'}])})
+    
+    row = run(repository, lambda r: r.get_professional('code', 'c1'))
+    
+    assert row == {'id': 'p1', 'code': 'c1'}
+    request, = server.requests
+    assert request.method == 'GET'
+    assert request.url.params['code'] == 'eq.c1'
+    assert request.headers['apikey'] == 'chave'
+    assert request.headers['authorization'] == 'Bearer chave'
+
+
+def test_missing_row_is_none(supabase):
+    repository, _ = supabase({'/rest/v1/attendance_lists_all': (200, [])})
+    assert run(repository, lambda r: r.get_attendance_list('l1')) is None
+
+
+def test_check_in_is_one_rpc_call(supabase):
+    outcome = {'status': 'created', 'record': {'id': 'r1'}}
+    repository, server = supabase({'/rest/v1/rpc/register_attendance': (200, outcome)})
+    
+    assert run(repository, lambda r: r.register_attendance('l1', None, 'ABC123')) == outcome
+    request, = server.requests
+    assert request.method == 'POST'
+    assert json.loads(request.content) == {'p_list_id': 'l1', 'p_code': None, 'p_registration_code': 'ABC123'}
+
+
+def test_keyset_cursor_filter(supabase):
+    repository, server = supabase({'/rest/v1/professionals': (200, [])})
+    
+    run(repository, lambda r: r.list_professionals(['id', 'name'], 51, ('Ana "A"', 'p9')))
+    
+    params = server.requests[0].url.params
+    assert params['select'] == 'id,name'
+    assert params['order'] == 'name.asc,id.asc'
+    assert params['limit'] == '51'
+    assert params['or'] == '(name.gt."Ana \\"A\\"",and(name.eq."Ana \\"A\\"",id.gt."p9"))'
+
+
+def test_unique_violation_becomes_conflict(supabase):
+    error = {'code': '23505', 'message': 'duplicate key value', 'details': None, 'hint': None}
+    repository, _ = supabase({'/rest/v1/professionals': (409, error)})
+    
+    with pytest.raises(ConflictError):
+        run(repository, lambda r: r.insert_professionals([{'code': 'c1'}]))
@@ -1,9 +1,25 @@
+DROP TABLE IF EXISTS attendance_records_archive CASCADE;
+
+DROP TABLE IF EXISTS attendance_lists_archive CASCADE;
+
 DROP TABLE IF EXISTS attendance_records CASCADE;
 
 DROP TABLE IF EXISTS attendance_lists CASCADE;
 
 DROP TABLE IF EXISTS professionals CASCADE;
 
+DROP TABLE IF EXISTS registration_counters CASCADE;
+
+DROP TABLE IF EXISTS professional_stats CASCADE;
+
+DROP TABLE IF EXISTS company_stats CASCADE;
+
+DROP TABLE IF EXISTS installation_stats CASCADE;
+
+DROP TABLE IF EXISTS attendance_stats_pending CASCADE;
+
+DROP TABLE IF EXISTS schema_migrations CASCADE;
+
 CREATE TABLE professionals (
 
 id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
@@ -54,39 +70,231 @@ end_time TIMESTAMP WITH TIME ZONE,
 
 status TEXT DEFAULT 'active' CHECK (status IN ('active', 'completed')),
 
-created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+UNIQUE (id, meeting_date)
 
 );
 
+-- Registros particionados por mês de meeting_date (a data da lista, copiada
+-- no check-in): consultas por período leem só as partições do intervalo e um
+-- mês antigo vai para o arquivo sem DELETE (ensure_attendance_partitions e
+-- archive_attendance_history, no fim deste arquivo). As chaves incluem
+-- meeting_date, como o particionamento exige; cada lista tem uma só data, então
+-- continuam únicas por lista. A chave estrangeira composta leva junto os
+-- registros se a data da lista mudar.
+
 CREATE TABLE attendance_records (
 
-id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+id UUID DEFAULT gen_random_uuid() NOT NULL,
 
-list_id UUID REFERENCES attendance_lists(id) ON DELETE CASCADE,
+list_id UUID NOT NULL,
 
 professional_id UUID REFERENCES professionals(id) ON DELETE CASCADE,
 
+meeting_date DATE NOT NULL,
+
 entry_time TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
 
 local TEXT NOT NULL,
 
 row_number INTEGER NOT NULL,
 
-created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+PRIMARY KEY (id, meeting_date),
+
+CONSTRAINT attendance_records_list_id_professional_id_key UNIQUE (list_id, professional_id, meeting_date),
+
+CONSTRAINT attendance_records_list_id_row_number_key UNIQUE (list_id, row_number, meeting_date),
+
+FOREIGN KEY (list_id, meeting_date) REFERENCES attendance_lists(id, meeting_date)
+ON DELETE CASCADE ON UPDATE CASCADE
+
+) PARTITION BY RANGE (meeting_date);
+
+-- Linhas de meses sem partição (datas fora do intervalo já criado) caem aqui
+-- até a próxima ensure_attendance_partitions()
+CREATE TABLE attendance_records_default PARTITION OF attendance_records DEFAULT;
+
+-- Arquivo: listas finalizadas de meses antigos e seus registros, fora das
+-- tabelas do dia a dia (GET /api/attendance-lists, check-in). As partições
+-- mensais de attendance_records são reanexadas aqui; as consultas por período
+-- leem as duas camadas pelas visões attendance_lists_all e attendance_history.
+
+CREATE TABLE attendance_lists_archive (
+
+LIKE attendance_lists INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+
+archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+PRIMARY KEY (id),
+
+UNIQUE (id, meeting_date)
+
+);
+
+CREATE TABLE attendance_records_archive (
+
+LIKE attendance_records INCLUDING DEFAULTS,
+
+PRIMARY KEY (id, meeting_date),
+
+CONSTRAINT attendance_records_archive_list_id_professional_id_key UNIQUE (list_id, professional_id, meeting_date),
+
+CONSTRAINT attendance_records_archive_list_id_row_number_key UNIQUE (list_id, row_number, meeting_date),
+
+FOREIGN KEY (list_id, meeting_date) REFERENCES attendance_lists_archive(id, meeting_date) ON DELETE CASCADE,
+
+FOREIGN KEY (professional_id) REFERENCES professionals(id) ON DELETE CASCADE
+
+) PARTITION BY RANGE (meeting_date);
+
+-- Listas das duas camadas (archived_at nulo nas ativas) e registros com os
+-- dados da lista, para as consultas por período (GET /api/history/...). Os
+-- filtros descem para os dois lados do UNION ALL e, nos registros, para as
+-- partições do intervalo.
+
+CREATE VIEW attendance_lists_all AS
+SELECT l.*, NULL::TIMESTAMP WITH TIME ZONE AS archived_at FROM attendance_lists l
+UNION ALL
+SELECT * FROM attendance_lists_archive;
+
+CREATE VIEW attendance_records_all AS
+SELECT * FROM attendance_records
+UNION ALL
+SELECT * FROM attendance_records_archive;
+
+CREATE VIEW attendance_history AS
+SELECT a.*, l.installation_name, l.meeting_time, l.course_title, l.instructor_name, l.location, l.status,
+       NULL::TIMESTAMP WITH TIME ZONE AS archived_at
+FROM attendance_records a
+JOIN attendance_lists l ON l.id = a.list_id AND l.meeting_date = a.meeting_date
+UNION ALL
+SELECT a.*, l.installation_name, l.meeting_time, l.course_title, l.instructor_name, l.location, l.status,
+       l.archived_at
+FROM attendance_records_archive a
+JOIN attendance_lists_archive l ON l.id = a.list_id AND l.meeting_date = a.meeting_date;
+
+CREATE TABLE registration_counters (
+
+year INTEGER PRIMARY KEY,
+
+value INTEGER NOT NULL DEFAULT 0
+
+);
+
+-- Agregados para relatórios, mantidos pelos gatilhos no fim deste arquivo.
+-- training_seconds soma a duração de cada lista finalizada por participante
+-- (horas-homem); session_seconds soma a duração das listas da instalação.
+
+CREATE TABLE professional_stats (
+
+professional_id UUID PRIMARY KEY REFERENCES professionals(id) ON DELETE CASCADE,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0,
+
+last_attendance_at TIMESTAMP WITH TIME ZONE
+
+);
+
+CREATE TABLE company_stats (
+
+company TEXT PRIMARY KEY,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0
+
+);
+
+CREATE TABLE installation_stats (
+
+installation_name TEXT PRIMARY KEY,
+
+lists INTEGER NOT NULL DEFAULT 0,
+
+completed_lists INTEGER NOT NULL DEFAULT 0,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+session_seconds BIGINT NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0
+
+);
+
+-- Presenças ainda não somadas a company_stats e installation_stats: o gatilho
+-- de check-in só acrescenta linhas aqui e rollup_attendance_stats as consolida
+-- periodicamente, sem disputar as linhas de empresa e instalação.
+
+CREATE TABLE attendance_stats_pending (
+
+id BIGSERIAL PRIMARY KEY,
+
+company TEXT NOT NULL,
+
+installation_name TEXT NOT NULL,
+
+attendances INTEGER NOT NULL
 
 );
 
-CREATE INDEX idx_professionals_code ON professionals(code);
+-- Índices no estado das migrações em migrations/ (code, email,
+-- registration_code e attendance_records(list_id) já são cobertos pelas
+-- restrições UNIQUE). Mudanças de índice em bancos existentes: nova migração
+-- em migrations/ aplicada com app/backend/migrate.py, e o mesmo índice aqui.
+
+CREATE INDEX idx_professionals_name ON professionals(name, id);
+
+CREATE INDEX idx_attendance_lists_created_at ON attendance_lists(created_at, id);
+
+CREATE INDEX idx_attendance_lists_meeting_date ON attendance_lists(meeting_date, meeting_time, id);
+
+CREATE INDEX idx_attendance_lists_installation ON attendance_lists(installation_name, meeting_date, meeting_time, id);
+
+CREATE INDEX idx_attendance_lists_active ON attendance_lists(created_at DESC, id DESC)
+INCLUDE (installation_name, meeting_date, meeting_time, course_title)
+WHERE status = 'active';
 
-CREATE INDEX idx_professionals_email ON professionals(email);
+CREATE INDEX idx_attendance_records_professional_history ON attendance_records(professional_id, meeting_date, entry_time, id);
 
-CREATE INDEX idx_professionals_registration_code ON professionals(registration_code);
+CREATE INDEX idx_attendance_lists_archive_meeting_date ON attendance_lists_archive(meeting_date, meeting_time, id);
 
-CREATE INDEX idx_attendance_lists_status ON attendance_lists(status);
+CREATE INDEX idx_attendance_lists_archive_installation ON attendance_lists_archive(installation_name, meeting_date, meeting_time, id);
 
-CREATE INDEX idx_attendance_records_list_id ON attendance_records(list_id);
+CREATE INDEX idx_attendance_records_archive_professional_history ON attendance_records_archive(professional_id, meeting_date, entry_time, id);
 
-CREATE INDEX idx_attendance_records_professional_id ON attendance_records(professional_id);
+-- Migrações aplicadas (app/backend/migrate.py). Um banco criado por este
+-- arquivo já está no estado de todas as migrações listadas abaixo.
+CREATE TABLE schema_migrations (
+
+version TEXT PRIMARY KEY,
+
+name TEXT NOT NULL,
+
+checksum TEXT,
+
+applied_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+
+);
+
+INSERT INTO schema_migrations (version, name) VALUES
+('0001', 'attendance_records_unique'),
+('0002', 'keyset_indexes'),
+('0003', 'active_lists_partial_index'),
+('0004', 'drop_redundant_indexes'),
+('0005', 'register_attendance'),
+('0006', 'registration_counters'),
+('0007', 'attendance_stats'),
+('0008', 'partition_attendance_records'),
+('0009', 'attendance_archive'),
+('0010', 'late_archived_months'),
+('0011', 'attendance_stats_rollup');
+
+CREATE INDEX idx_professional_stats_ranking ON professional_stats(training_seconds DESC, professional_id DESC);
 
 ALTER TABLE professionals ENABLE ROW LEVEL SECURITY;
 
@@ -94,8 +302,677 @@ ALTER TABLE attendance_lists ENABLE ROW LEVEL SECURITY;
 
 ALTER TABLE attendance_records ENABLE ROW LEVEL SECURITY;
 
+ALTER TABLE attendance_records_default ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE attendance_lists_archive ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE attendance_records_archive ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE registration_counters ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE professional_stats ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE company_stats ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE installation_stats ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE attendance_stats_pending ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE schema_migrations ENABLE ROW LEVEL SECURITY;
+
 CREATE POLICY "Enable all for professionals" ON professionals FOR ALL USING (true) WITH CHECK (true);
 
 CREATE POLICY "Enable all for attendance_lists" ON attendance_lists FOR ALL USING (true) WITH CHECK (true);
 
 CREATE POLICY "Enable all for attendance_records" ON attendance_records FOR ALL USING (true) WITH CHECK (true);
+
+CREATE POLICY "Enable read for attendance_lists_archive" ON attendance_lists_archive FOR SELECT USING (true);
+
+CREATE POLICY "Enable read for attendance_records_archive" ON attendance_records_archive FOR SELECT USING (true);
+
+CREATE POLICY "Enable all for registration_counters" ON registration_counters FOR ALL USING (true) WITH CHECK (true);
+
+CREATE POLICY "Enable read for professional_stats" ON professional_stats FOR SELECT USING (true);
+
+CREATE POLICY "Enable read for company_stats" ON company_stats FOR SELECT USING (true);
+
+CREATE POLICY "Enable read for installation_stats" ON installation_stats FOR SELECT USING (true);
+
+-- Registro de presença em uma única ida ao banco (POST /api/attendance-records).
+-- Resolve o profissional, valida a lista, impede duplicidade e atribui o
+-- row_number sem lacunas dentro de uma única transação. O FOR UPDATE na linha
+-- da lista serializa check-ins simultâneos da mesma lista.
+
+CREATE OR REPLACE FUNCTION register_attendance(
+    p_list_id UUID,
+    p_code TEXT DEFAULT NULL,
+    p_registration_code TEXT DEFAULT NULL
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_professional professionals%ROWTYPE;
+    v_status TEXT;
+    v_location TEXT;
+    v_meeting_date DATE;
+    v_row_number INTEGER;
+    v_record attendance_records%ROWTYPE;
+BEGIN
+    IF p_registration_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE registration_code = UPPER(p_registration_code);
+    ELSIF p_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE code = p_code;
+    END IF;
+
+    IF v_professional.id IS NULL THEN
+        RETURN json_build_object('status', 'professional_not_found');
+    END IF;
+
+    SELECT status, location, meeting_date INTO v_status, v_location, v_meeting_date
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    -- meeting_date em todos os filtros: só a partição do mês da lista é lida
+    IF EXISTS (
+        SELECT 1 FROM attendance_records
+        WHERE list_id = p_list_id AND meeting_date = v_meeting_date AND professional_id = v_professional.id
+    ) THEN
+        RETURN json_build_object('status', 'duplicate');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) + 1 INTO v_row_number
+    FROM attendance_records WHERE list_id = p_list_id AND meeting_date = v_meeting_date;
+
+    INSERT INTO attendance_records (list_id, professional_id, meeting_date, local, row_number)
+    VALUES (p_list_id, v_professional.id, v_meeting_date, v_location, v_row_number)
+    RETURNING * INTO v_record;
+
+    RETURN json_build_object(
+        'status', 'created',
+        'professional', row_to_json(v_professional),
+        'record', json_build_object(
+            'id', v_record.id,
+            'list_id', v_record.list_id,
+            'professional_id', v_record.professional_id,
+            'professional_name', v_professional.name,
+            'professional_email', v_professional.email,
+            'professional_profession', v_professional.profession,
+            'professional_company', v_professional.company,
+            'entry_time', v_record.entry_time,
+            'local', v_record.local,
+            'row_number', v_record.row_number,
+            'created_at', v_record.created_at
+        )
+    );
+END;
+$$;
+
+-- Check-in em lote para quiosques offline (POST /api/attendance-records/batch).
+-- p_items é um array JSON de {code | registration_code, entry_time}. Todos os
+-- profissionais são resolvidos em uma consulta e todos os registros entram em um
+-- único INSERT, com row_number seguindo a ordem de entry_time. Devolve o
+-- resultado de cada item: created, duplicate ou not_found.
+
+CREATE OR REPLACE FUNCTION register_attendance_batch(
+    p_list_id UUID,
+    p_items JSON
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_status TEXT;
+    v_location TEXT;
+    v_meeting_date DATE;
+    v_last_row INTEGER;
+    v_results JSON;
+BEGIN
+    SELECT status, location, meeting_date INTO v_status, v_location, v_meeting_date
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) INTO v_last_row
+    FROM attendance_records WHERE list_id = p_list_id AND meeting_date = v_meeting_date;
+
+    WITH items AS (
+        SELECT
+            (t.ordinality - 1)::INTEGER AS idx,
+            t.item->>'code' AS code,
+            UPPER(t.item->>'registration_code') AS registration_code,
+            COALESCE((t.item->>'entry_time')::TIMESTAMPTZ, NOW()) AS entry_time
+        FROM json_array_elements(p_items) WITH ORDINALITY AS t(item, ordinality)
+    ),
+    resolved AS (
+        SELECT i.*, COALESCE(by_registration.id, by_code.id) AS professional_id
+        FROM items i
+        LEFT JOIN professionals by_registration
+            ON by_registration.registration_code = i.registration_code
+        LEFT JOIN professionals by_code
+            ON i.registration_code IS NULL AND by_code.code = i.code
+    ),
+    ranked AS (
+        SELECT
+            r.*,
+            ROW_NUMBER() OVER (PARTITION BY r.professional_id ORDER BY r.entry_time, r.idx) AS occurrence,
+            EXISTS (
+                SELECT 1 FROM attendance_records a
+                WHERE a.list_id = p_list_id AND a.meeting_date = v_meeting_date
+                  AND a.professional_id = r.professional_id
+            ) AS already_registered
+        FROM resolved r
+    ),
+    to_insert AS (
+        SELECT
+            professional_id,
+            entry_time,
+            v_last_row + ROW_NUMBER() OVER (ORDER BY entry_time, idx) AS row_number
+        FROM ranked
+        WHERE professional_id IS NOT NULL AND occurrence = 1 AND NOT already_registered
+    ),
+    inserted AS (
+        INSERT INTO attendance_records (list_id, professional_id, meeting_date, entry_time, local, row_number)
+        SELECT p_list_id, professional_id, v_meeting_date, entry_time, v_location, row_number FROM to_insert
+        RETURNING *
+    )
+    SELECT json_agg(json_build_object(
+        'index', r.idx,
+        'status', CASE
+            WHEN r.professional_id IS NULL THEN 'not_found'
+            WHEN ins.id IS NOT NULL THEN 'created'
+            ELSE 'duplicate'
+        END,
+        'record', CASE WHEN ins.id IS NOT NULL THEN json_build_object(
+            'id', ins.id,
+            'list_id', ins.list_id,
+            'professional_id', ins.professional_id,
+            'professional_name', p.name,
+            'professional_email', p.email,
+            'professional_profession', p.profession,
+            'professional_company', p.company,
+            'entry_time', ins.entry_time,
+            'local', ins.local,
+            'row_number', ins.row_number,
+            'created_at', ins.created_at
+        ) END
+    ) ORDER BY r.idx) INTO v_results
+    FROM ranked r
+    LEFT JOIN inserted ins
+        ON ins.professional_id = r.professional_id AND r.occurrence = 1 AND NOT r.already_registered
+    LEFT JOIN professionals p ON p.id = r.professional_id;
+
+    RETURN json_build_object('status', 'processed', 'results', COALESCE(v_results, '[]'::JSON));
+END;
+$$;
+
+-- Registros das listas p_list_ids (ativas ou arquivadas) com o profissional
+-- embutido, em ordem de lista e row_number; p_after_row pula os já
+-- recebidos. Cada lista é lida só na partição do seu meeting_date (junção
+-- LATERAL: a poda de partições acontece por lista, na execução).
+
+CREATE OR REPLACE FUNCTION list_attendance_records(
+    p_list_ids UUID[],
+    p_after_row INTEGER DEFAULT 0
+) RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(json_agg(r ORDER BY r.list_id, r.row_number), '[]')
+    FROM (
+        SELECT a.*, json_build_object(
+            'name', p.name, 'email', p.email, 'profession', p.profession, 'company', p.company
+        ) AS professionals
+        FROM attendance_lists_all l
+        CROSS JOIN LATERAL (
+            SELECT * FROM attendance_records_all ra
+            WHERE ra.list_id = l.id AND ra.meeting_date = l.meeting_date AND ra.row_number > p_after_row
+        ) a
+        LEFT JOIN professionals p ON p.id = a.professional_id
+        WHERE l.id = ANY(p_list_ids)
+    ) r
+$$;
+
+-- Reserva p_count números consecutivos do contador de registros do ano e devolve
+-- o primeiro (a partir de 0). O servidor converte cada número em um código
+-- PRF-YYYY-XXXX por uma permutação reversível (app/backend/registration.py),
+-- então não há colisão nem consultas de verificação. Capacidade: 36^4 por ano.
+
+CREATE OR REPLACE FUNCTION allocate_registration_numbers(
+    p_year INTEGER,
+    p_count INTEGER DEFAULT 1
+) RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_last INTEGER;
+BEGIN
+    INSERT INTO registration_counters AS c (year, value) VALUES (p_year, p_count)
+    ON CONFLICT (year) DO UPDATE SET value = c.value + p_count
+    RETURNING value INTO v_last;
+
+    IF v_last > 1679616 THEN
+        RAISE EXCEPTION 'Códigos de registro esgotados para o ano %', p_year;
+    END IF;
+
+    RETURN v_last - p_count;
+END;
+$$;
+
+-- Manutenção incremental dos agregados de relatório (GET /api/reports/...).
+-- Os gatilhos rodam na mesma transação da escrita, então valem para o check-in
+-- individual, o lote e qualquer outro cliente do banco. Funções SECURITY
+-- DEFINER: as tabelas de agregados só aceitam leitura pela API. O search_path
+-- fixo impede que objetos de outro schema sejam usados com os privilégios do
+-- dono, e só a service_role pode chamá-las diretamente.
+
+-- Cada INSERT em attendance_records (1 ou N linhas) soma as presenças por
+-- profissional em um upsert agregado. As de empresa e instalação vão para
+-- attendance_stats_pending: essas linhas são poucas e todo check-in as
+-- tocaria, então um upsert direto serializaria check-ins de listas diferentes.
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_records()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    INSERT INTO professional_stats AS s (professional_id, attendances, last_attendance_at)
+    SELECT professional_id, COUNT(*), MAX(entry_time)
+    FROM inserted_records
+    GROUP BY professional_id
+    ORDER BY professional_id
+    ON CONFLICT (professional_id) DO UPDATE SET
+        attendances = s.attendances + EXCLUDED.attendances,
+        last_attendance_at = GREATEST(s.last_attendance_at, EXCLUDED.last_attendance_at);
+
+    INSERT INTO attendance_stats_pending (company, installation_name, attendances)
+    SELECT p.company, l.installation_name, COUNT(*)
+    FROM inserted_records i
+    JOIN professionals p ON p.id = i.professional_id
+    JOIN attendance_lists l ON l.id = i.list_id
+    GROUP BY p.company, l.installation_name;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_records() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_records() TO service_role;
+
+CREATE TRIGGER attendance_records_stats
+AFTER INSERT ON attendance_records
+REFERENCING NEW TABLE AS inserted_records
+FOR EACH STATEMENT EXECUTE FUNCTION attendance_stats_on_records();
+
+-- Nova lista: conta na instalação. Lista finalizada: a duração calculada
+-- (end_time - start_time, a mesma de complete_attendance_list) vira horas de
+-- treinamento de cada participante, da empresa dele e da instalação.
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_list()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_seconds BIGINT;
+    v_participants INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO installation_stats AS s (installation_name, lists)
+        VALUES (NEW.installation_name, 1)
+        ON CONFLICT (installation_name) DO UPDATE SET lists = s.lists + 1;
+        RETURN NULL;
+    END IF;
+
+    v_seconds := GREATEST(EXTRACT(EPOCH FROM NEW.end_time - NEW.start_time), 0)::BIGINT;
+
+    UPDATE professional_stats s
+    SET training_seconds = s.training_seconds + v_seconds
+    FROM attendance_records a
+    WHERE a.list_id = NEW.id AND a.meeting_date = NEW.meeting_date AND s.professional_id = a.professional_id;
+
+    GET DIAGNOSTICS v_participants = ROW_COUNT;
+
+    INSERT INTO company_stats AS s (company, training_seconds)
+    SELECT p.company, COUNT(*) * v_seconds
+    FROM attendance_records a
+    JOIN professionals p ON p.id = a.professional_id
+    WHERE a.list_id = NEW.id AND a.meeting_date = NEW.meeting_date
+    GROUP BY p.company
+    ORDER BY p.company
+    ON CONFLICT (company) DO UPDATE SET training_seconds = s.training_seconds + EXCLUDED.training_seconds;
+
+    UPDATE installation_stats
+    SET completed_lists = completed_lists + 1,
+        session_seconds = session_seconds + v_seconds,
+        training_seconds = training_seconds + v_participants * v_seconds
+    WHERE installation_name = NEW.installation_name;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_list() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_list() TO service_role;
+
+CREATE TRIGGER attendance_lists_stats_insert
+AFTER INSERT ON attendance_lists
+FOR EACH ROW EXECUTE FUNCTION attendance_stats_on_list();
+
+CREATE TRIGGER attendance_lists_stats_completed
+AFTER UPDATE OF status ON attendance_lists
+FOR EACH ROW
+WHEN (OLD.status = 'active' AND NEW.status = 'completed')
+EXECUTE FUNCTION attendance_stats_on_list();
+
+-- Soma as presenças pendentes a company_stats e installation_stats e apaga as
+-- linhas consolidadas. O servidor chama periodicamente (StatsRollup, em
+-- STATS_ROLLUP_SECONDS); até lá os relatórios de empresa e instalação ficam
+-- sem os check-ins mais recentes. Chamadas simultâneas não somam duas vezes: o
+-- DELETE de uma espera o da outra e pula as linhas já apagadas. Devolve
+-- quantas linhas pendentes foram consolidadas.
+-- Uso: SELECT rollup_attendance_stats();
+
+CREATE OR REPLACE FUNCTION rollup_attendance_stats()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    WITH drained AS (
+        DELETE FROM attendance_stats_pending
+        RETURNING company, installation_name, attendances
+    ), companies AS (
+        INSERT INTO company_stats AS s (company, attendances)
+        SELECT company, SUM(attendances)::INTEGER
+        FROM drained
+        GROUP BY company
+        ORDER BY company
+        ON CONFLICT (company) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances
+    ), installations AS (
+        INSERT INTO installation_stats AS s (installation_name, attendances)
+        SELECT installation_name, SUM(attendances)::INTEGER
+        FROM drained
+        GROUP BY installation_name
+        ORDER BY installation_name
+        ON CONFLICT (installation_name) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances
+    )
+    SELECT COUNT(*) INTO v_rows FROM drained;
+
+    RETURN v_rows;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rollup_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rollup_attendance_stats() TO service_role;
+
+-- Recalcula todos os agregados a partir das tabelas de origem, incluindo o
+-- arquivo (carga inicial em um banco existente ou correção).
+-- Uso: SELECT rebuild_attendance_stats();
+
+CREATE OR REPLACE FUNCTION rebuild_attendance_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    TRUNCATE professional_stats, company_stats, installation_stats, attendance_stats_pending;
+
+    INSERT INTO professional_stats (professional_id, attendances, training_seconds, last_attendance_at)
+    SELECT
+        a.professional_id,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        MAX(a.entry_time)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    GROUP BY a.professional_id;
+
+    INSERT INTO company_stats (company, attendances, training_seconds)
+    SELECT
+        p.company,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    JOIN professionals p ON p.id = a.professional_id
+    GROUP BY p.company;
+
+    INSERT INTO installation_stats (installation_name, lists, completed_lists, attendances, session_seconds, training_seconds)
+    SELECT
+        l.installation_name,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE l.status = 'completed'),
+        COALESCE(SUM(r.participants), 0),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        COALESCE(SUM(r.participants * GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_lists_all l
+    LEFT JOIN (
+        SELECT list_id, COUNT(*) AS participants FROM attendance_records_all GROUP BY list_id
+    ) r ON r.list_id = l.id
+    GROUP BY l.installation_name;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rebuild_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rebuild_attendance_stats() TO service_role;
+
+-- Partições mensais de attendance_records: cria as do mês de p_from (ou do
+-- atual) até p_months_ahead meses à frente e as dos meses que tenham caído na
+-- partição padrão, movendo essas linhas para a partição nova. Só contam as
+-- partições da própria attendance_records: um mês já arquivado que recebe
+-- registros novos (lista criada com data antiga) ganha outra partição aqui, com
+-- sufixo no nome, e archive_attendance_history junta as linhas às do arquivo. O
+-- servidor chama periodicamente (HistoryMaintenance); sem ela nada falha, as
+-- linhas só ficam na partição padrão. As partições têm RLS sem política: a API
+-- só as alcança pela tabela-mãe. Devolve quantas partições foram criadas. Esta
+-- função e archive_attendance_history (SECURITY DEFINER, search_path fixo) só
+-- podem ser chamadas pela service_role.
+
+CREATE OR REPLACE FUNCTION ensure_attendance_partitions(
+    p_from DATE DEFAULT NULL,
+    p_months_ahead INTEGER DEFAULT 3
+) RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_month DATE;
+    v_next DATE;
+    v_name TEXT;
+    v_suffix INTEGER;
+    v_created INTEGER := 0;
+BEGIN
+    -- Uma réplica por vez; as demais saem sem esperar
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN 0;
+    END IF;
+
+    FOR v_month IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE(p_from, CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+        UNION
+        SELECT date_trunc('month', meeting_date)::DATE FROM attendance_records_default
+        ORDER BY 1
+    LOOP
+        v_next := (v_month + INTERVAL '1 month')::DATE;
+        -- Já existe na tabela ativa (a do arquivo não recebe os registros novos)
+        CONTINUE WHEN EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'attendance_records'::REGCLASS
+              AND pg_get_expr(c.relpartbound, c.oid) = format('FOR VALUES FROM (%L) TO (%L)', v_month, v_next)
+        );
+
+        -- O nome do mês fica com a partição que foi para o arquivo
+        v_name := 'attendance_records_' || to_char(v_month, 'YYYY_MM');
+        v_suffix := 1;
+        WHILE to_regclass(v_name) IS NOT NULL LOOP
+            v_name := 'attendance_records_' || to_char(v_month, 'YYYY_MM') || '_' || v_suffix;
+            v_suffix := v_suffix + 1;
+        END LOOP;
+
+        -- O ATTACH confere que a partição padrão não tem mais linhas do mês
+        EXECUTE format('CREATE TABLE %I (LIKE attendance_records INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM attendance_records_default WHERE meeting_date >= %L AND meeting_date < %L RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            v_month, v_next, v_name
+        );
+        EXECUTE format(
+            'ALTER TABLE attendance_records ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_month, v_next
+        );
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+        v_created := v_created + 1;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) TO service_role;
+
+-- Move para o arquivo os meses inteiros anteriores a p_before cujas listas
+-- estão todas finalizadas (meses com lista ativa ficam e voltam em
+-- `skipped`). A partição do mês é desanexada de attendance_records e anexada
+-- a attendance_records_archive, sem copiar nem apagar registros; as listas do
+-- mês são copiadas para attendance_lists_archive. Se o mês já estava no
+-- arquivo (registros que chegaram depois), as linhas são copiadas para a
+-- partição arquivada e a partição nova é apagada. Os agregados de relatório
+-- não mudam. O DETACH bloqueia a tabela de registros por um instante: rodar
+-- fora do horário das reuniões.
+
+CREATE OR REPLACE FUNCTION archive_attendance_history(p_before DATE)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_partition REGCLASS;
+    v_from DATE;
+    v_to DATE;
+    v_constraint TEXT;
+    v_count BIGINT;
+    v_lists BIGINT := 0;
+    v_records BIGINT := 0;
+    v_months TEXT[] := '{}';
+    v_skipped TEXT[] := '{}';
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN json_build_object('status', 'busy');
+    END IF;
+
+    -- Todo mês com lista passa a ter partição (mesmo vazia) e as linhas antigas
+    -- ainda na partição padrão vão para a do mês
+    PERFORM ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists), 0);
+
+    FOR v_partition, v_from, v_to IN
+        SELECT c.oid::REGCLASS, bounds[1]::DATE, bounds[2]::DATE
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        CROSS JOIN LATERAL regexp_match(
+            pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\) TO \(''([^'']+)''\)'
+        ) AS bounds
+        -- A partição padrão não tem limites (bounds nulo) e nunca vai para o arquivo
+        WHERE i.inhparent = 'attendance_records'::REGCLASS AND bounds IS NOT NULL
+        ORDER BY 2
+    LOOP
+        EXIT WHEN v_to > p_before;
+
+        IF EXISTS (
+            SELECT 1 FROM attendance_lists
+            WHERE meeting_date >= v_from AND meeting_date < v_to AND status = 'active'
+        ) THEN
+            v_skipped := v_skipped || to_char(v_from, 'YYYY-MM');
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('ALTER TABLE attendance_records DETACH PARTITION %s', v_partition);
+
+        -- A partição avulsa mantém a chave para attendance_lists: sai antes de
+        -- apagar as listas (a do arquivo é criada pelo ATTACH)
+        FOR v_constraint IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = v_partition AND contype = 'f' AND confrelid = 'attendance_lists'::REGCLASS
+        LOOP
+            EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_partition, v_constraint);
+        END LOOP;
+
+        INSERT INTO attendance_lists_archive
+        SELECT l.*, NOW() FROM attendance_lists l
+        WHERE l.meeting_date >= v_from AND l.meeting_date < v_to;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+        v_lists := v_lists + v_count;
+
+        IF EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'attendance_records_archive'::REGCLASS
+              AND pg_get_expr(c.relpartbound, c.oid) = format('FOR VALUES FROM (%L) TO (%L)', v_from, v_to)
+        ) THEN
+            EXECUTE format('INSERT INTO attendance_records_archive SELECT * FROM %s', v_partition);
+            GET DIAGNOSTICS v_count = ROW_COUNT;
+            EXECUTE format('DROP TABLE %s', v_partition);
+        ELSE
+            EXECUTE format(
+                'ALTER TABLE attendance_records_archive ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+                v_partition, v_from, v_to
+            );
+            EXECUTE format('SELECT COUNT(*) FROM %s', v_partition) INTO v_count;
+        END IF;
+
+        DELETE FROM attendance_lists WHERE meeting_date >= v_from AND meeting_date < v_to;
+        v_records := v_records + v_count;
+        v_months := v_months || to_char(v_from, 'YYYY-MM');
+    END LOOP;
+
+    RETURN json_build_object(
+        'status', 'archived',
+        'months', to_json(v_months),
+        'lists', v_lists,
+        'records', v_records,
+        'skipped', to_json(v_skipped)
+    );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION archive_attendance_history(DATE) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION archive_attendance_history(DATE) TO service_role;
+
+SELECT ensure_attendance_partitions();
@@ -17,13 +17,29 @@ function arrayBufferToBase64(buffer) {
 function App() {
   const [message, setMessage] = useState('');
   const [professionals, setProfessionals] = useState([]);
+  const [professionalsCount, setProfessionalsCount] = useState(0);
   const [formData, setFormData] = useState({ name: '', email: '', profession: '', company: '' });
   const [biometricCaptured, setBiometricCaptured] = useState(false);
   const [credentialId, setCredentialId] = useState(null);
   const [registrationCode, setRegistrationCode] = useState(null);
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
 
   useEffect(() => { loadProfessionals(); }, []);
 
+  // Busca no servidor (índice em memória) enquanto digita, sem baixar a lista inteira
+  useEffect(() => {
+    const q = searchQuery.trim();
+    if (!q) { setSearchResults(null); return; }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/professionals/search`, { params: { q, limit: 10 } });
+        setSearchResults(response.data);
+      } catch (error) { console.error('Erro:', error); }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
+
   const showMessage = (msg, type = 'info') => {
     setMessage({ text: msg, type });
     setTimeout(() => setMessage(''), 5000);
@@ -31,8 +47,11 @@ function App() {
 
   const loadProfessionals = async () => {
     try {
-      const response = await axios.get(`${API}/professionals`);
+      const response = await axios.get(`${API}/professionals`, {
+        params: { limit: 5, fields: 'email,profession,company,registration_code', count: 'estimated' }
+      });
       setProfessionals(response.data);
+      setProfessionalsCount(Number(response.headers['x-total-count'] ?? response.data.length));
     } catch (error) { console.error('Erro:', error); }
   };
 
@@ -113,8 +132,10 @@ function App() {
           </div>
         )}
         <div style={{ marginTop: '40px' }}>
-          <h3>Cadastrados: {professionals.length}</h3>
-          {professionals.slice(0,5).map(p => (
+          <h3>Cadastrados: {professionalsCount}</h3>
+          <input type="search" value={searchQuery} onChange={(e) => setSearchQuery(e.target.value)} placeholder="🔍 Buscar por nome, email, empresa ou código" style={{ width: '100%', padding: '12px', border: '2px solid #e0e0e0', borderRadius: '8px', fontSize: '16px', marginBottom: '10px' }} />
+          {searchResults && searchResults.length === 0 && <p style={{ color: '#666', fontSize: '14px' }}>Nenhum profissional encontrado</p>}
+          {(searchResults ?? professionals).map(p => (
             <div key={p.id} style={{ background: '#f8f9fa', padding: '15px', borderRadius: '8px', margin: '10px 0', borderLeft: '4px solid #667eea' }}>
               <h4 style={{ margin: 0 }}>{p.name}</h4>
               <p style={{ margin: '3px 0', fontSize: '13px', color: '#666' }}>{p.email} | {p.profession} | {p.company}</p>
@@ -0,0 +1,49 @@
+-- Restrições únicas compostas de attendance_records.
+--
+-- UNIQUE (list_id, professional_id) sustenta a verificação de duplicidade do
+-- check-in e UNIQUE (list_id, row_number) a leitura da lista em ordem de linha
+-- (e o MAX(row_number) do próximo registro). Bancos criados com versões
+-- antigas do database.sql não têm nenhuma das duas: antes de criá-las as
+-- presenças repetidas são removidas (fica a mais antiga) e os row_number são
+-- renumerados sem lacunas na ordem de entrada.
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'attendance_records'::REGCLASS AND contype = 'u'
+          AND conkey = ARRAY[
+              (SELECT attnum FROM pg_attribute WHERE attrelid = 'attendance_records'::REGCLASS AND attname = 'list_id'),
+              (SELECT attnum FROM pg_attribute WHERE attrelid = 'attendance_records'::REGCLASS AND attname = 'professional_id')
+          ]::INT2[]
+    ) THEN
+        DELETE FROM attendance_records a
+        USING attendance_records b
+        WHERE a.list_id = b.list_id AND a.professional_id = b.professional_id
+          AND (a.entry_time, a.id) > (b.entry_time, b.id);
+
+        ALTER TABLE attendance_records
+            ADD CONSTRAINT attendance_records_list_id_professional_id_key UNIQUE (list_id, professional_id);
+    END IF;
+
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'attendance_records'::REGCLASS AND contype = 'u'
+          AND conkey = ARRAY[
+              (SELECT attnum FROM pg_attribute WHERE attrelid = 'attendance_records'::REGCLASS AND attname = 'list_id'),
+              (SELECT attnum FROM pg_attribute WHERE attrelid = 'attendance_records'::REGCLASS AND attname = 'row_number')
+          ]::INT2[]
+    ) THEN
+        UPDATE attendance_records a
+        SET row_number = numbered.position
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY list_id ORDER BY row_number, entry_time, id) AS position
+            FROM attendance_records
+        ) numbered
+        WHERE a.id = numbered.id AND a.row_number IS DISTINCT FROM numbered.position;
+
+        ALTER TABLE attendance_records
+            ADD CONSTRAINT attendance_records_list_id_row_number_key UNIQUE (list_id, row_number);
+    END IF;
+END
+$$;
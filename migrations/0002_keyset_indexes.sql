@@ -0,0 +1,15 @@
+-- Índices compostos na ordem das paginações por cursor e das buscas por data.
+--
+-- GET /api/professionals:        ORDER BY name, id com (name, id) > cursor
+-- GET /api/attendance-lists:     ORDER BY created_at DESC, id DESC com cursor
+-- exportação e PDFs combinados:  meeting_date entre datas, ORDER BY meeting_date,
+--                                meeting_time, id (com ou sem installation_name)
+
+CREATE INDEX IF NOT EXISTS idx_professionals_name ON professionals(name, id);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_created_at ON attendance_lists(created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_meeting_date ON attendance_lists(meeting_date, meeting_time, id);
+
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_installation
+    ON attendance_lists(installation_name, meeting_date, meeting_time, id);
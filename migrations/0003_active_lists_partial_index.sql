@@ -0,0 +1,14 @@
+-- Listas abertas (GET /api/attendance-lists?status=active), consultadas pelos
+-- quiosques a cada troca de turno.
+--
+-- Índice parcial: só as poucas listas ativas entram, e ele encolhe quando a
+-- lista é finalizada. O INCLUDE traz as colunas exibidas no quiosque, o que
+-- permite Index Only Scan. Substitui idx_attendance_lists_status, que com dois
+-- valores possíveis o planner quase nunca usava.
+
+CREATE INDEX IF NOT EXISTS idx_attendance_lists_active
+    ON attendance_lists(created_at DESC, id DESC)
+    INCLUDE (installation_name, meeting_date, meeting_time, course_title)
+    WHERE status = 'active';
+
+DROP INDEX IF EXISTS idx_attendance_lists_status;
@@ -0,0 +1,13 @@
+-- Índices que repetiam os criados pelas restrições UNIQUE: cada um só custava
+-- escrita em todo INSERT.
+--
+-- professionals.code / email / registration_code: já indexados pelo UNIQUE
+-- attendance_records(list_id): prefixo de UNIQUE (list_id, professional_id)
+
+DROP INDEX IF EXISTS idx_professionals_code;
+
+DROP INDEX IF EXISTS idx_professionals_email;
+
+DROP INDEX IF EXISTS idx_professionals_registration_code;
+
+DROP INDEX IF EXISTS idx_attendance_records_list_id;
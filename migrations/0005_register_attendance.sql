@@ -0,0 +1,176 @@
+-- Check-in em uma única ida ao banco: register_attendance (individual) e
+-- register_attendance_batch (lote dos quiosques offline). Bancos criados antes
+-- dessas funções não as têm; CREATE OR REPLACE deixa a migração reaplicável.
+-- A 0008 as redefine para a tabela particionada.
+
+-- Registro de presença em uma única ida ao banco (POST /api/attendance-records).
+-- Resolve o profissional, valida a lista, impede duplicidade e atribui o
+-- row_number sem lacunas dentro de uma única transação. O FOR UPDATE na linha
+-- da lista serializa check-ins simultâneos da mesma lista.
+
+CREATE OR REPLACE FUNCTION register_attendance(
+    p_list_id UUID,
+    p_code TEXT DEFAULT NULL,
+    p_registration_code TEXT DEFAULT NULL
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_professional professionals%ROWTYPE;
+    v_status TEXT;
+    v_location TEXT;
+    v_row_number INTEGER;
+    v_record attendance_records%ROWTYPE;
+BEGIN
+    IF p_registration_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE registration_code = UPPER(p_registration_code);
+    ELSIF p_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE code = p_code;
+    END IF;
+
+    IF v_professional.id IS NULL THEN
+        RETURN json_build_object('status', 'professional_not_found');
+    END IF;
+
+    SELECT status, location INTO v_status, v_location
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM attendance_records WHERE list_id = p_list_id AND professional_id = v_professional.id) THEN
+        RETURN json_build_object('status', 'duplicate');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) + 1 INTO v_row_number
+    FROM attendance_records WHERE list_id = p_list_id;
+
+    INSERT INTO attendance_records (list_id, professional_id, local, row_number)
+    VALUES (p_list_id, v_professional.id, v_location, v_row_number)
+    RETURNING * INTO v_record;
+
+    RETURN json_build_object(
+        'status', 'created',
+        'professional', row_to_json(v_professional),
+        'record', json_build_object(
+            'id', v_record.id,
+            'list_id', v_record.list_id,
+            'professional_id', v_record.professional_id,
+            'professional_name', v_professional.name,
+            'professional_email', v_professional.email,
+            'professional_profession', v_professional.profession,
+            'professional_company', v_professional.company,
+            'entry_time', v_record.entry_time,
+            'local', v_record.local,
+            'row_number', v_record.row_number,
+            'created_at', v_record.created_at
+        )
+    );
+END;
+$$;
+
+-- Check-in em lote para quiosques offline (POST /api/attendance-records/batch).
+-- p_items é um array JSON de {code | registration_code, entry_time}. Todos os
+-- profissionais são resolvidos em uma consulta e todos os registros entram em um
+-- único INSERT, com row_number seguindo a ordem de entry_time. Devolve o
+-- resultado de cada item: created, duplicate ou not_found.
+
+CREATE OR REPLACE FUNCTION register_attendance_batch(
+    p_list_id UUID,
+    p_items JSON
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_status TEXT;
+    v_location TEXT;
+    v_last_row INTEGER;
+    v_results JSON;
+BEGIN
+    SELECT status, location INTO v_status, v_location
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) INTO v_last_row
+    FROM attendance_records WHERE list_id = p_list_id;
+
+    WITH items AS (
+        SELECT
+            (t.ordinality - 1)::INTEGER AS idx,
+            t.item->>'code' AS code,
+            UPPER(t.item->>'registration_code') AS registration_code,
+            COALESCE((t.item->>'entry_time')::TIMESTAMPTZ, NOW()) AS entry_time
+        FROM json_array_elements(p_items) WITH ORDINALITY AS t(item, ordinality)
+    ),
+    resolved AS (
+        SELECT i.*, COALESCE(by_registration.id, by_code.id) AS professional_id
+        FROM items i
+        LEFT JOIN professionals by_registration
+            ON by_registration.registration_code = i.registration_code
+        LEFT JOIN professionals by_code
+            ON i.registration_code IS NULL AND by_code.code = i.code
+    ),
+    ranked AS (
+        SELECT
+            r.*,
+            ROW_NUMBER() OVER (PARTITION BY r.professional_id ORDER BY r.entry_time, r.idx) AS occurrence,
+            EXISTS (
+                SELECT 1 FROM attendance_records a
+                WHERE a.list_id = p_list_id AND a.professional_id = r.professional_id
+            ) AS already_registered
+        FROM resolved r
+    ),
+    to_insert AS (
+        SELECT
+            professional_id,
+            entry_time,
+            v_last_row + ROW_NUMBER() OVER (ORDER BY entry_time, idx) AS row_number
+        FROM ranked
+        WHERE professional_id IS NOT NULL AND occurrence = 1 AND NOT already_registered
+    ),
+    inserted AS (
+        INSERT INTO attendance_records (list_id, professional_id, entry_time, local, row_number)
+        SELECT p_list_id, professional_id, entry_time, v_location, row_number FROM to_insert
+        RETURNING *
+    )
+    SELECT json_agg(json_build_object(
+        'index', r.idx,
+        'status', CASE
+            WHEN r.professional_id IS NULL THEN 'not_found'
+            WHEN ins.id IS NOT NULL THEN 'created'
+            ELSE 'duplicate'
+        END,
+        'record', CASE WHEN ins.id IS NOT NULL THEN json_build_object(
+            'id', ins.id,
+            'list_id', ins.list_id,
+            'professional_id', ins.professional_id,
+            'professional_name', p.name,
+            'professional_email', p.email,
+            'professional_profession', p.profession,
+            'professional_company', p.company,
+            'entry_time', ins.entry_time,
+            'local', ins.local,
+            'row_number', ins.row_number,
+            'created_at', ins.created_at
+        ) END
+    ) ORDER BY r.idx) INTO v_results
+    FROM ranked r
+    LEFT JOIN inserted ins
+        ON ins.professional_id = r.professional_id AND r.occurrence = 1 AND NOT r.already_registered
+    LEFT JOIN professionals p ON p.id = r.professional_id;
+
+    RETURN json_build_object('status', 'processed', 'results', COALESCE(v_results, '[]'::JSON));
+END;
+$$;
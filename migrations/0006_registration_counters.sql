@@ -0,0 +1,77 @@
+-- Contador de códigos de registro por ano (allocate_registration_numbers).
+--
+-- O contador de cada ano é preenchido a partir dos códigos PRF-YYYY-XXXX já
+-- gravados, invertendo a permutação de app/backend/registration.py: começa
+-- depois da sequência contínua de números já usados a partir do 0. Os códigos
+-- aleatórios anteriores ao contador se espalham pelo espaço todo; levar o
+-- contador ao maior deles desperdiçaria quase toda a capacidade do ano, então
+-- a colisão com um deles fica com o servidor, que tenta o número seguinte.
+
+CREATE TABLE IF NOT EXISTS registration_counters (
+
+year INTEGER PRIMARY KEY,
+
+value INTEGER NOT NULL DEFAULT 0
+
+);
+
+ALTER TABLE registration_counters ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Enable all for registration_counters" ON registration_counters;
+
+CREATE POLICY "Enable all for registration_counters" ON registration_counters FOR ALL USING (true) WITH CHECK (true);
+
+-- Reserva p_count números consecutivos do contador de registros do ano e devolve
+-- o primeiro (a partir de 0). O servidor converte cada número em um código
+-- PRF-YYYY-XXXX por uma permutação reversível (app/backend/registration.py),
+-- então não há colisão nem consultas de verificação. Capacidade: 36^4 por ano.
+
+CREATE OR REPLACE FUNCTION allocate_registration_numbers(
+    p_year INTEGER,
+    p_count INTEGER DEFAULT 1
+) RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_last INTEGER;
+BEGIN
+    INSERT INTO registration_counters AS c (year, value) VALUES (p_year, p_count)
+    ON CONFLICT (year) DO UPDATE SET value = c.value + p_count
+    RETURNING value INTO v_last;
+
+    IF v_last > 1679616 THEN
+        RAISE EXCEPTION 'Códigos de registro esgotados para o ano %', p_year;
+    END IF;
+
+    RETURN v_last - p_count;
+END;
+$$;
+
+-- n = (valor do sufixo em base 36 - deslocamento do ano) * inverso do
+-- multiplicador, módulo 36^4 (as constantes de registration.py)
+WITH codes AS (
+    SELECT
+        split_part(registration_code, '-', 2)::INTEGER AS year,
+        (
+            SELECT SUM((strpos('0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ', substr(suffix, i, 1)) - 1)::BIGINT
+                       * power(36, 4 - i)::BIGINT)
+            FROM generate_series(1, 4) AS i
+        ) AS value
+    FROM (
+        SELECT registration_code, split_part(registration_code, '-', 3) AS suffix
+        FROM professionals
+        WHERE registration_code ~ '^PRF-[0-9]{4}-[0-9A-Z]{4}$'
+    ) p
+),
+numbers AS (
+    SELECT DISTINCT year, (((value - (year * 7919) % 1679616) * 23659) % 1679616 + 1679616) % 1679616 AS n
+    FROM codes
+),
+runs AS (
+    -- 0 na sequência contínua que começa no número 0
+    SELECT year, n - ROW_NUMBER() OVER (PARTITION BY year ORDER BY n) + 1 AS gap
+    FROM numbers
+)
+INSERT INTO registration_counters AS c (year, value)
+SELECT year, COUNT(*) FROM runs WHERE gap = 0 GROUP BY year
+ON CONFLICT (year) DO UPDATE SET value = GREATEST(c.value, EXCLUDED.value);
@@ -0,0 +1,249 @@
+-- Agregados de relatório (GET /api/reports/...): tabelas, funções e gatilhos
+-- que as mantêm. Tudo é criado só se ainda não existir (ou recriado igual),
+-- então a migração também serve a bancos que já receberam parte do
+-- database.sql. No fim os agregados são recalculados uma vez a partir das
+-- presenças já gravadas; a 0008 e a 0009 redefinem as funções para a tabela
+-- particionada e o arquivo.
+
+-- training_seconds soma a duração de cada lista finalizada por participante
+-- (horas-homem); session_seconds soma a duração das listas da instalação.
+
+CREATE TABLE IF NOT EXISTS professional_stats (
+
+professional_id UUID PRIMARY KEY REFERENCES professionals(id) ON DELETE CASCADE,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0,
+
+last_attendance_at TIMESTAMP WITH TIME ZONE
+
+);
+
+CREATE TABLE IF NOT EXISTS company_stats (
+
+company TEXT PRIMARY KEY,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0
+
+);
+
+CREATE TABLE IF NOT EXISTS installation_stats (
+
+installation_name TEXT PRIMARY KEY,
+
+lists INTEGER NOT NULL DEFAULT 0,
+
+completed_lists INTEGER NOT NULL DEFAULT 0,
+
+attendances INTEGER NOT NULL DEFAULT 0,
+
+session_seconds BIGINT NOT NULL DEFAULT 0,
+
+training_seconds BIGINT NOT NULL DEFAULT 0
+
+);
+
+CREATE INDEX IF NOT EXISTS idx_professional_stats_ranking ON professional_stats(training_seconds DESC, professional_id DESC);
+
+ALTER TABLE professional_stats ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE company_stats ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE installation_stats ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Enable read for professional_stats" ON professional_stats;
+
+CREATE POLICY "Enable read for professional_stats" ON professional_stats FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Enable read for company_stats" ON company_stats;
+
+CREATE POLICY "Enable read for company_stats" ON company_stats FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "Enable read for installation_stats" ON installation_stats;
+
+CREATE POLICY "Enable read for installation_stats" ON installation_stats FOR SELECT USING (true);
+
+-- Manutenção incremental dos agregados de relatório (GET /api/reports/...).
+-- Os gatilhos rodam na mesma transação da escrita, então valem para o check-in
+-- individual, o lote e qualquer outro cliente do banco. Funções SECURITY
+-- DEFINER: as tabelas de agregados só aceitam leitura pela API. O search_path
+-- fixo impede que objetos de outro schema sejam usados com os privilégios do
+-- dono, e só a service_role pode chamá-las diretamente.
+
+-- Cada INSERT em attendance_records (1 ou N linhas) soma as presenças por
+-- profissional, empresa e instalação em um upsert agregado por tabela.
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_records()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    INSERT INTO professional_stats AS s (professional_id, attendances, last_attendance_at)
+    SELECT professional_id, COUNT(*), MAX(entry_time)
+    FROM inserted_records
+    GROUP BY professional_id
+    ORDER BY professional_id
+    ON CONFLICT (professional_id) DO UPDATE SET
+        attendances = s.attendances + EXCLUDED.attendances,
+        last_attendance_at = GREATEST(s.last_attendance_at, EXCLUDED.last_attendance_at);
+
+    INSERT INTO company_stats AS s (company, attendances)
+    SELECT p.company, COUNT(*)
+    FROM inserted_records i
+    JOIN professionals p ON p.id = i.professional_id
+    GROUP BY p.company
+    ORDER BY p.company
+    ON CONFLICT (company) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances;
+
+    INSERT INTO installation_stats AS s (installation_name, attendances)
+    SELECT l.installation_name, COUNT(*)
+    FROM inserted_records i
+    JOIN attendance_lists l ON l.id = i.list_id
+    GROUP BY l.installation_name
+    ORDER BY l.installation_name
+    ON CONFLICT (installation_name) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_records() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_records() TO service_role;
+
+DROP TRIGGER IF EXISTS attendance_records_stats ON attendance_records;
+
+CREATE TRIGGER attendance_records_stats
+AFTER INSERT ON attendance_records
+REFERENCING NEW TABLE AS inserted_records
+FOR EACH STATEMENT EXECUTE FUNCTION attendance_stats_on_records();
+
+-- Nova lista: conta na instalação. Lista finalizada: a duração calculada
+-- (end_time - start_time, a mesma de complete_attendance_list) vira horas de
+-- treinamento de cada participante, da empresa dele e da instalação.
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_list()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_seconds BIGINT;
+    v_participants INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO installation_stats AS s (installation_name, lists)
+        VALUES (NEW.installation_name, 1)
+        ON CONFLICT (installation_name) DO UPDATE SET lists = s.lists + 1;
+        RETURN NULL;
+    END IF;
+
+    v_seconds := GREATEST(EXTRACT(EPOCH FROM NEW.end_time - NEW.start_time), 0)::BIGINT;
+
+    UPDATE professional_stats s
+    SET training_seconds = s.training_seconds + v_seconds
+    FROM attendance_records a
+    WHERE a.list_id = NEW.id AND s.professional_id = a.professional_id;
+
+    GET DIAGNOSTICS v_participants = ROW_COUNT;
+
+    INSERT INTO company_stats AS s (company, training_seconds)
+    SELECT p.company, COUNT(*) * v_seconds
+    FROM attendance_records a
+    JOIN professionals p ON p.id = a.professional_id
+    WHERE a.list_id = NEW.id
+    GROUP BY p.company
+    ORDER BY p.company
+    ON CONFLICT (company) DO UPDATE SET training_seconds = s.training_seconds + EXCLUDED.training_seconds;
+
+    UPDATE installation_stats
+    SET completed_lists = completed_lists + 1,
+        session_seconds = session_seconds + v_seconds,
+        training_seconds = training_seconds + v_participants * v_seconds
+    WHERE installation_name = NEW.installation_name;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_list() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_list() TO service_role;
+
+DROP TRIGGER IF EXISTS attendance_lists_stats_insert ON attendance_lists;
+
+CREATE TRIGGER attendance_lists_stats_insert
+AFTER INSERT ON attendance_lists
+FOR EACH ROW EXECUTE FUNCTION attendance_stats_on_list();
+
+DROP TRIGGER IF EXISTS attendance_lists_stats_completed ON attendance_lists;
+
+CREATE TRIGGER attendance_lists_stats_completed
+AFTER UPDATE OF status ON attendance_lists
+FOR EACH ROW
+WHEN (OLD.status = 'active' AND NEW.status = 'completed')
+EXECUTE FUNCTION attendance_stats_on_list();
+
+-- Recalcula todos os agregados a partir das tabelas de origem (carga inicial
+-- em um banco existente ou correção). Uso: SELECT rebuild_attendance_stats();
+
+CREATE OR REPLACE FUNCTION rebuild_attendance_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    TRUNCATE professional_stats, company_stats, installation_stats;
+
+    INSERT INTO professional_stats (professional_id, attendances, training_seconds, last_attendance_at)
+    SELECT
+        a.professional_id,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        MAX(a.entry_time)
+    FROM attendance_records a
+    JOIN attendance_lists l ON l.id = a.list_id
+    GROUP BY a.professional_id;
+
+    INSERT INTO company_stats (company, attendances, training_seconds)
+    SELECT
+        p.company,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_records a
+    JOIN attendance_lists l ON l.id = a.list_id
+    JOIN professionals p ON p.id = a.professional_id
+    GROUP BY p.company;
+
+    INSERT INTO installation_stats (installation_name, lists, completed_lists, attendances, session_seconds, training_seconds)
+    SELECT
+        l.installation_name,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE l.status = 'completed'),
+        COALESCE(SUM(r.participants), 0),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        COALESCE(SUM(r.participants * GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_lists l
+    LEFT JOIN (
+        SELECT list_id, COUNT(*) AS participants FROM attendance_records GROUP BY list_id
+    ) r ON r.list_id = l.id
+    GROUP BY l.installation_name;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rebuild_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rebuild_attendance_stats() TO service_role;
+
+SELECT rebuild_attendance_stats();
@@ -0,0 +1,373 @@
+-- attendance_records particionada por mês de meeting_date.
+--
+-- A tabela é recriada: a atual é renomeada, as linhas são copiadas com o
+-- meeting_date da lista para as partições mensais (do mês da lista mais antiga
+-- até 3 meses à frente) e a antiga é apagada. O gatilho de agregados só é
+-- criado depois da cópia, então os relatórios não contam as linhas de novo.
+-- A cópia bloqueia os check-ins: aplicar fora do horário das reuniões.
+
+ALTER TABLE attendance_lists ADD CONSTRAINT attendance_lists_id_meeting_date_key UNIQUE (id, meeting_date);
+
+ALTER TABLE attendance_records RENAME TO attendance_records_unpartitioned;
+
+DROP TRIGGER IF EXISTS attendance_records_stats ON attendance_records_unpartitioned;
+
+DROP INDEX IF EXISTS idx_attendance_records_professional_id;
+
+-- Os nomes das restrições (e dos índices delas) ficam livres para a tabela nova
+DO $$
+DECLARE
+    v_name TEXT;
+BEGIN
+    FOR v_name IN
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = 'attendance_records_unpartitioned'::REGCLASS AND conname LIKE 'attendance\_records\_%'
+    LOOP
+        EXECUTE format(
+            'ALTER TABLE attendance_records_unpartitioned RENAME CONSTRAINT %I TO %I',
+            v_name, 'attendance_records_unpartitioned_' || substr(v_name, length('attendance_records_') + 1)
+        );
+    END LOOP;
+END
+$$;
+
+-- Registros particionados por mês de meeting_date (a data da lista, copiada
+-- no check-in): consultas por período leem só as partições do intervalo e um
+-- mês antigo vai para o arquivo sem DELETE (ensure_attendance_partitions e
+-- archive_attendance_history, no fim deste arquivo). As chaves incluem
+-- meeting_date, como o particionamento exige; cada lista tem uma só data, então
+-- continuam únicas por lista. A chave estrangeira composta leva junto os
+-- registros se a data da lista mudar.
+
+CREATE TABLE attendance_records (
+
+id UUID DEFAULT gen_random_uuid() NOT NULL,
+
+list_id UUID NOT NULL,
+
+professional_id UUID REFERENCES professionals(id) ON DELETE CASCADE,
+
+meeting_date DATE NOT NULL,
+
+entry_time TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+local TEXT NOT NULL,
+
+row_number INTEGER NOT NULL,
+
+created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+PRIMARY KEY (id, meeting_date),
+
+CONSTRAINT attendance_records_list_id_professional_id_key UNIQUE (list_id, professional_id, meeting_date),
+
+CONSTRAINT attendance_records_list_id_row_number_key UNIQUE (list_id, row_number, meeting_date),
+
+FOREIGN KEY (list_id, meeting_date) REFERENCES attendance_lists(id, meeting_date)
+ON DELETE CASCADE ON UPDATE CASCADE
+
+) PARTITION BY RANGE (meeting_date);
+
+-- Linhas de meses sem partição (datas fora do intervalo já criado) caem aqui
+-- até a próxima ensure_attendance_partitions()
+CREATE TABLE attendance_records_default PARTITION OF attendance_records DEFAULT;
+
+CREATE INDEX idx_attendance_records_professional_history ON attendance_records(professional_id, meeting_date, entry_time, id);
+
+ALTER TABLE attendance_records ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE attendance_records_default ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Enable all for attendance_records" ON attendance_records FOR ALL USING (true) WITH CHECK (true);
+
+CREATE OR REPLACE FUNCTION ensure_attendance_partitions(
+    p_from DATE DEFAULT NULL,
+    p_months_ahead INTEGER DEFAULT 3
+) RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_month DATE;
+    v_next DATE;
+    v_name TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    -- Uma réplica por vez; as demais saem sem esperar
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN 0;
+    END IF;
+
+    FOR v_month IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE(p_from, CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+        UNION
+        SELECT date_trunc('month', meeting_date)::DATE FROM attendance_records_default
+        ORDER BY 1
+    LOOP
+        v_name := 'attendance_records_' || to_char(v_month, 'YYYY_MM');
+        -- Já existe, na tabela ativa ou no arquivo
+        CONTINUE WHEN to_regclass(v_name) IS NOT NULL;
+        v_next := (v_month + INTERVAL '1 month')::DATE;
+
+        -- O ATTACH confere que a partição padrão não tem mais linhas do mês
+        EXECUTE format('CREATE TABLE %I (LIKE attendance_records INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM attendance_records_default WHERE meeting_date >= %L AND meeting_date < %L RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            v_month, v_next, v_name
+        );
+        EXECUTE format(
+            'ALTER TABLE attendance_records ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_month, v_next
+        );
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+        v_created := v_created + 1;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) TO service_role;
+
+SELECT ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists));
+
+INSERT INTO attendance_records (id, list_id, professional_id, meeting_date, entry_time, local, row_number, created_at)
+SELECT r.id, r.list_id, r.professional_id, l.meeting_date, r.entry_time, r.local, r.row_number, r.created_at
+FROM attendance_records_unpartitioned r
+JOIN attendance_lists l ON l.id = r.list_id;
+
+DROP TABLE attendance_records_unpartitioned;
+
+CREATE TRIGGER attendance_records_stats
+AFTER INSERT ON attendance_records
+REFERENCING NEW TABLE AS inserted_records
+FOR EACH STATEMENT EXECUTE FUNCTION attendance_stats_on_records();
+
+-- Funções que gravam ou leem registros de uma lista: meeting_date no INSERT e
+-- nos filtros (só a partição do mês da lista é lida)
+
+CREATE OR REPLACE FUNCTION register_attendance(
+    p_list_id UUID,
+    p_code TEXT DEFAULT NULL,
+    p_registration_code TEXT DEFAULT NULL
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_professional professionals%ROWTYPE;
+    v_status TEXT;
+    v_location TEXT;
+    v_meeting_date DATE;
+    v_row_number INTEGER;
+    v_record attendance_records%ROWTYPE;
+BEGIN
+    IF p_registration_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE registration_code = UPPER(p_registration_code);
+    ELSIF p_code IS NOT NULL THEN
+        SELECT * INTO v_professional FROM professionals WHERE code = p_code;
+    END IF;
+
+    IF v_professional.id IS NULL THEN
+        RETURN json_build_object('status', 'professional_not_found');
+    END IF;
+
+    SELECT status, location, meeting_date INTO v_status, v_location, v_meeting_date
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    -- meeting_date em todos os filtros: só a partição do mês da lista é lida
+    IF EXISTS (
+        SELECT 1 FROM attendance_records
+        WHERE list_id = p_list_id AND meeting_date = v_meeting_date AND professional_id = v_professional.id
+    ) THEN
+        RETURN json_build_object('status', 'duplicate');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) + 1 INTO v_row_number
+    FROM attendance_records WHERE list_id = p_list_id AND meeting_date = v_meeting_date;
+
+    INSERT INTO attendance_records (list_id, professional_id, meeting_date, local, row_number)
+    VALUES (p_list_id, v_professional.id, v_meeting_date, v_location, v_row_number)
+    RETURNING * INTO v_record;
+
+    RETURN json_build_object(
+        'status', 'created',
+        'professional', row_to_json(v_professional),
+        'record', json_build_object(
+            'id', v_record.id,
+            'list_id', v_record.list_id,
+            'professional_id', v_record.professional_id,
+            'professional_name', v_professional.name,
+            'professional_email', v_professional.email,
+            'professional_profession', v_professional.profession,
+            'professional_company', v_professional.company,
+            'entry_time', v_record.entry_time,
+            'local', v_record.local,
+            'row_number', v_record.row_number,
+            'created_at', v_record.created_at
+        )
+    );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION register_attendance_batch(
+    p_list_id UUID,
+    p_items JSON
+) RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_status TEXT;
+    v_location TEXT;
+    v_meeting_date DATE;
+    v_last_row INTEGER;
+    v_results JSON;
+BEGIN
+    SELECT status, location, meeting_date INTO v_status, v_location, v_meeting_date
+    FROM attendance_lists WHERE id = p_list_id FOR UPDATE;
+
+    IF NOT FOUND THEN
+        RETURN json_build_object('status', 'list_not_found');
+    END IF;
+
+    IF v_status <> 'active' THEN
+        RETURN json_build_object('status', 'list_not_active');
+    END IF;
+
+    SELECT COALESCE(MAX(row_number), 0) INTO v_last_row
+    FROM attendance_records WHERE list_id = p_list_id AND meeting_date = v_meeting_date;
+
+    WITH items AS (
+        SELECT
+            (t.ordinality - 1)::INTEGER AS idx,
+            t.item->>'code' AS code,
+            UPPER(t.item->>'registration_code') AS registration_code,
+            COALESCE((t.item->>'entry_time')::TIMESTAMPTZ, NOW()) AS entry_time
+        FROM json_array_elements(p_items) WITH ORDINALITY AS t(item, ordinality)
+    ),
+    resolved AS (
+        SELECT i.*, COALESCE(by_registration.id, by_code.id) AS professional_id
+        FROM items i
+        LEFT JOIN professionals by_registration
+            ON by_registration.registration_code = i.registration_code
+        LEFT JOIN professionals by_code
+            ON i.registration_code IS NULL AND by_code.code = i.code
+    ),
+    ranked AS (
+        SELECT
+            r.*,
+            ROW_NUMBER() OVER (PARTITION BY r.professional_id ORDER BY r.entry_time, r.idx) AS occurrence,
+            EXISTS (
+                SELECT 1 FROM attendance_records a
+                WHERE a.list_id = p_list_id AND a.meeting_date = v_meeting_date
+                  AND a.professional_id = r.professional_id
+            ) AS already_registered
+        FROM resolved r
+    ),
+    to_insert AS (
+        SELECT
+            professional_id,
+            entry_time,
+            v_last_row + ROW_NUMBER() OVER (ORDER BY entry_time, idx) AS row_number
+        FROM ranked
+        WHERE professional_id IS NOT NULL AND occurrence = 1 AND NOT already_registered
+    ),
+    inserted AS (
+        INSERT INTO attendance_records (list_id, professional_id, meeting_date, entry_time, local, row_number)
+        SELECT p_list_id, professional_id, v_meeting_date, entry_time, v_location, row_number FROM to_insert
+        RETURNING *
+    )
+    SELECT json_agg(json_build_object(
+        'index', r.idx,
+        'status', CASE
+            WHEN r.professional_id IS NULL THEN 'not_found'
+            WHEN ins.id IS NOT NULL THEN 'created'
+            ELSE 'duplicate'
+        END,
+        'record', CASE WHEN ins.id IS NOT NULL THEN json_build_object(
+            'id', ins.id,
+            'list_id', ins.list_id,
+            'professional_id', ins.professional_id,
+            'professional_name', p.name,
+            'professional_email', p.email,
+            'professional_profession', p.profession,
+            'professional_company', p.company,
+            'entry_time', ins.entry_time,
+            'local', ins.local,
+            'row_number', ins.row_number,
+            'created_at', ins.created_at
+        ) END
+    ) ORDER BY r.idx) INTO v_results
+    FROM ranked r
+    LEFT JOIN inserted ins
+        ON ins.professional_id = r.professional_id AND r.occurrence = 1 AND NOT r.already_registered
+    LEFT JOIN professionals p ON p.id = r.professional_id;
+
+    RETURN json_build_object('status', 'processed', 'results', COALESCE(v_results, '[]'::JSON));
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_list()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_seconds BIGINT;
+    v_participants INTEGER;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO installation_stats AS s (installation_name, lists)
+        VALUES (NEW.installation_name, 1)
+        ON CONFLICT (installation_name) DO UPDATE SET lists = s.lists + 1;
+        RETURN NULL;
+    END IF;
+
+    v_seconds := GREATEST(EXTRACT(EPOCH FROM NEW.end_time - NEW.start_time), 0)::BIGINT;
+
+    UPDATE professional_stats s
+    SET training_seconds = s.training_seconds + v_seconds
+    FROM attendance_records a
+    WHERE a.list_id = NEW.id AND a.meeting_date = NEW.meeting_date AND s.professional_id = a.professional_id;
+
+    GET DIAGNOSTICS v_participants = ROW_COUNT;
+
+    INSERT INTO company_stats AS s (company, training_seconds)
+    SELECT p.company, COUNT(*) * v_seconds
+    FROM attendance_records a
+    JOIN professionals p ON p.id = a.professional_id
+    WHERE a.list_id = NEW.id AND a.meeting_date = NEW.meeting_date
+    GROUP BY p.company
+    ORDER BY p.company
+    ON CONFLICT (company) DO UPDATE SET training_seconds = s.training_seconds + EXCLUDED.training_seconds;
+
+    UPDATE installation_stats
+    SET completed_lists = completed_lists + 1,
+        session_seconds = session_seconds + v_seconds,
+        training_seconds = training_seconds + v_participants * v_seconds
+    WHERE installation_name = NEW.installation_name;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_list() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_list() TO service_role;
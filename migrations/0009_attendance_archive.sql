@@ -0,0 +1,243 @@
+-- Camada de arquivo do histórico de presença e visões das duas camadas.
+--
+-- archive_attendance_history(p_before) move meses inteiros já finalizados
+-- para as tabelas *_archive (as partições mensais de registros são
+-- reanexadas, sem cópia). As consultas por período e a leitura de registros
+-- de uma lista passam a ler as duas camadas.
+
+-- Arquivo: listas finalizadas de meses antigos e seus registros, fora das
+-- tabelas do dia a dia (GET /api/attendance-lists, check-in). As partições
+-- mensais de attendance_records são reanexadas aqui; as consultas por período
+-- leem as duas camadas pelas visões attendance_lists_all e attendance_history.
+
+CREATE TABLE attendance_lists_archive (
+
+LIKE attendance_lists INCLUDING DEFAULTS INCLUDING CONSTRAINTS,
+
+archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+PRIMARY KEY (id),
+
+UNIQUE (id, meeting_date)
+
+);
+
+CREATE TABLE attendance_records_archive (
+
+LIKE attendance_records INCLUDING DEFAULTS,
+
+PRIMARY KEY (id, meeting_date),
+
+CONSTRAINT attendance_records_archive_list_id_professional_id_key UNIQUE (list_id, professional_id, meeting_date),
+
+CONSTRAINT attendance_records_archive_list_id_row_number_key UNIQUE (list_id, row_number, meeting_date),
+
+FOREIGN KEY (list_id, meeting_date) REFERENCES attendance_lists_archive(id, meeting_date) ON DELETE CASCADE,
+
+FOREIGN KEY (professional_id) REFERENCES professionals(id) ON DELETE CASCADE
+
+) PARTITION BY RANGE (meeting_date);
+
+-- Listas das duas camadas (archived_at nulo nas ativas) e registros com os
+-- dados da lista, para as consultas por período (GET /api/history/...). Os
+-- filtros descem para os dois lados do UNION ALL e, nos registros, para as
+-- partições do intervalo.
+
+CREATE VIEW attendance_lists_all AS
+SELECT l.*, NULL::TIMESTAMP WITH TIME ZONE AS archived_at FROM attendance_lists l
+UNION ALL
+SELECT * FROM attendance_lists_archive;
+
+CREATE VIEW attendance_records_all AS
+SELECT * FROM attendance_records
+UNION ALL
+SELECT * FROM attendance_records_archive;
+
+CREATE VIEW attendance_history AS
+SELECT a.*, l.installation_name, l.meeting_time, l.course_title, l.instructor_name, l.location, l.status,
+       NULL::TIMESTAMP WITH TIME ZONE AS archived_at
+FROM attendance_records a
+JOIN attendance_lists l ON l.id = a.list_id AND l.meeting_date = a.meeting_date
+UNION ALL
+SELECT a.*, l.installation_name, l.meeting_time, l.course_title, l.instructor_name, l.location, l.status,
+       l.archived_at
+FROM attendance_records_archive a
+JOIN attendance_lists_archive l ON l.id = a.list_id AND l.meeting_date = a.meeting_date;
+
+CREATE INDEX idx_attendance_lists_archive_meeting_date ON attendance_lists_archive(meeting_date, meeting_time, id);
+
+CREATE INDEX idx_attendance_lists_archive_installation ON attendance_lists_archive(installation_name, meeting_date, meeting_time, id);
+
+CREATE INDEX idx_attendance_records_archive_professional_history ON attendance_records_archive(professional_id, meeting_date, entry_time, id);
+
+ALTER TABLE attendance_lists_archive ENABLE ROW LEVEL SECURITY;
+
+ALTER TABLE attendance_records_archive ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Enable read for attendance_lists_archive" ON attendance_lists_archive FOR SELECT USING (true);
+
+CREATE POLICY "Enable read for attendance_records_archive" ON attendance_records_archive FOR SELECT USING (true);
+
+CREATE OR REPLACE FUNCTION list_attendance_records(
+    p_list_ids UUID[],
+    p_after_row INTEGER DEFAULT 0
+) RETURNS JSON
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT COALESCE(json_agg(r ORDER BY r.list_id, r.row_number), '[]')
+    FROM (
+        SELECT a.*, json_build_object(
+            'name', p.name, 'email', p.email, 'profession', p.profession, 'company', p.company
+        ) AS professionals
+        FROM attendance_lists_all l
+        CROSS JOIN LATERAL (
+            SELECT * FROM attendance_records_all ra
+            WHERE ra.list_id = l.id AND ra.meeting_date = l.meeting_date AND ra.row_number > p_after_row
+        ) a
+        LEFT JOIN professionals p ON p.id = a.professional_id
+        WHERE l.id = ANY(p_list_ids)
+    ) r
+$$;
+
+CREATE OR REPLACE FUNCTION archive_attendance_history(p_before DATE)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_partition REGCLASS;
+    v_from DATE;
+    v_to DATE;
+    v_constraint TEXT;
+    v_count BIGINT;
+    v_lists BIGINT := 0;
+    v_records BIGINT := 0;
+    v_months TEXT[] := '{}';
+    v_skipped TEXT[] := '{}';
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN json_build_object('status', 'busy');
+    END IF;
+
+    -- Todo mês com lista passa a ter partição (mesmo vazia) e as linhas antigas
+    -- ainda na partição padrão vão para a do mês
+    PERFORM ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists), 0);
+
+    FOR v_partition, v_from, v_to IN
+        SELECT c.oid::REGCLASS, bounds[1]::DATE, bounds[2]::DATE
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        CROSS JOIN LATERAL regexp_match(
+            pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\) TO \(''([^'']+)''\)'
+        ) AS bounds
+        -- A partição padrão não tem limites (bounds nulo) e nunca vai para o arquivo
+        WHERE i.inhparent = 'attendance_records'::REGCLASS AND bounds IS NOT NULL
+        ORDER BY 2
+    LOOP
+        EXIT WHEN v_to > p_before;
+
+        IF EXISTS (
+            SELECT 1 FROM attendance_lists
+            WHERE meeting_date >= v_from AND meeting_date < v_to AND status = 'active'
+        ) THEN
+            v_skipped := v_skipped || to_char(v_from, 'YYYY-MM');
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('ALTER TABLE attendance_records DETACH PARTITION %s', v_partition);
+
+        -- A partição avulsa mantém a chave para attendance_lists: sai antes de
+        -- apagar as listas (a do arquivo é criada pelo ATTACH)
+        FOR v_constraint IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = v_partition AND contype = 'f' AND confrelid = 'attendance_lists'::REGCLASS
+        LOOP
+            EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_partition, v_constraint);
+        END LOOP;
+
+        INSERT INTO attendance_lists_archive
+        SELECT l.*, NOW() FROM attendance_lists l
+        WHERE l.meeting_date >= v_from AND l.meeting_date < v_to;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+        v_lists := v_lists + v_count;
+
+        EXECUTE format(
+            'ALTER TABLE attendance_records_archive ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+            v_partition, v_from, v_to
+        );
+
+        DELETE FROM attendance_lists WHERE meeting_date >= v_from AND meeting_date < v_to;
+
+        EXECUTE format('SELECT COUNT(*) FROM %s', v_partition) INTO v_count;
+        v_records := v_records + v_count;
+        v_months := v_months || to_char(v_from, 'YYYY-MM');
+    END LOOP;
+
+    RETURN json_build_object(
+        'status', 'archived',
+        'months', to_json(v_months),
+        'lists', v_lists,
+        'records', v_records,
+        'skipped', to_json(v_skipped)
+    );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION archive_attendance_history(DATE) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION archive_attendance_history(DATE) TO service_role;
+
+CREATE OR REPLACE FUNCTION rebuild_attendance_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    TRUNCATE professional_stats, company_stats, installation_stats;
+
+    INSERT INTO professional_stats (professional_id, attendances, training_seconds, last_attendance_at)
+    SELECT
+        a.professional_id,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        MAX(a.entry_time)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    GROUP BY a.professional_id;
+
+    INSERT INTO company_stats (company, attendances, training_seconds)
+    SELECT
+        p.company,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    JOIN professionals p ON p.id = a.professional_id
+    GROUP BY p.company;
+
+    INSERT INTO installation_stats (installation_name, lists, completed_lists, attendances, session_seconds, training_seconds)
+    SELECT
+        l.installation_name,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE l.status = 'completed'),
+        COALESCE(SUM(r.participants), 0),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        COALESCE(SUM(r.participants * GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_lists_all l
+    LEFT JOIN (
+        SELECT list_id, COUNT(*) AS participants FROM attendance_records_all GROUP BY list_id
+    ) r ON r.list_id = l.id
+    GROUP BY l.installation_name;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rebuild_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rebuild_attendance_stats() TO service_role;
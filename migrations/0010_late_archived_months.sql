@@ -0,0 +1,202 @@
+-- Registros novos de meses já arquivados.
+--
+-- Uma lista criada com data de um mês que já foi para o arquivo recebia os
+-- check-ins na partição padrão para sempre: ensure_attendance_partitions via a
+-- partição do mês (agora no arquivo) e não criava outra. As duas funções
+-- passam a olhar só as partições da tabela certa; as linhas presas na partição
+-- padrão vão para uma partição do mês na próxima chamada (no fim deste
+-- arquivo), e o arquivamento seguinte as junta às do arquivo.
+
+-- Partições mensais de attendance_records: cria as do mês de p_from (ou do
+-- atual) até p_months_ahead meses à frente e as dos meses que tenham caído na
+-- partição padrão, movendo essas linhas para a partição nova. Só contam as
+-- partições da própria attendance_records: um mês já arquivado que recebe
+-- registros novos (lista criada com data antiga) ganha outra partição aqui, com
+-- sufixo no nome, e archive_attendance_history junta as linhas às do arquivo. O
+-- servidor chama periodicamente (HistoryMaintenance); sem ela nada falha, as
+-- linhas só ficam na partição padrão. As partições têm RLS sem política: a API
+-- só as alcança pela tabela-mãe. Devolve quantas partições foram criadas. Esta
+-- função e archive_attendance_history (SECURITY DEFINER, search_path fixo) só
+-- podem ser chamadas pela service_role.
+
+CREATE OR REPLACE FUNCTION ensure_attendance_partitions(
+    p_from DATE DEFAULT NULL,
+    p_months_ahead INTEGER DEFAULT 3
+) RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_month DATE;
+    v_next DATE;
+    v_name TEXT;
+    v_suffix INTEGER;
+    v_created INTEGER := 0;
+BEGIN
+    -- Uma réplica por vez; as demais saem sem esperar
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN 0;
+    END IF;
+
+    FOR v_month IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE(p_from, CURRENT_DATE)),
+            date_trunc('month', CURRENT_DATE) + make_interval(months => p_months_ahead),
+            INTERVAL '1 month'
+        )::DATE
+        UNION
+        SELECT date_trunc('month', meeting_date)::DATE FROM attendance_records_default
+        ORDER BY 1
+    LOOP
+        v_next := (v_month + INTERVAL '1 month')::DATE;
+        -- Já existe na tabela ativa (a do arquivo não recebe os registros novos)
+        CONTINUE WHEN EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'attendance_records'::REGCLASS
+              AND pg_get_expr(c.relpartbound, c.oid) = format('FOR VALUES FROM (%L) TO (%L)', v_month, v_next)
+        );
+
+        -- O nome do mês fica com a partição que foi para o arquivo
+        v_name := 'attendance_records_' || to_char(v_month, 'YYYY_MM');
+        v_suffix := 1;
+        WHILE to_regclass(v_name) IS NOT NULL LOOP
+            v_name := 'attendance_records_' || to_char(v_month, 'YYYY_MM') || '_' || v_suffix;
+            v_suffix := v_suffix + 1;
+        END LOOP;
+
+        -- O ATTACH confere que a partição padrão não tem mais linhas do mês
+        EXECUTE format('CREATE TABLE %I (LIKE attendance_records INCLUDING DEFAULTS INCLUDING CONSTRAINTS)', v_name);
+        EXECUTE format(
+            'WITH moved AS ('
+            '    DELETE FROM attendance_records_default WHERE meeting_date >= %L AND meeting_date < %L RETURNING *'
+            ') INSERT INTO %I SELECT * FROM moved',
+            v_month, v_next, v_name
+        );
+        EXECUTE format(
+            'ALTER TABLE attendance_records ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+            v_name, v_month, v_next
+        );
+        EXECUTE format('ALTER TABLE %I ENABLE ROW LEVEL SECURITY', v_name);
+        v_created := v_created + 1;
+    END LOOP;
+
+    RETURN v_created;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION ensure_attendance_partitions(DATE, INTEGER) TO service_role;
+
+-- Move para o arquivo os meses inteiros anteriores a p_before cujas listas
+-- estão todas finalizadas (meses com lista ativa ficam e voltam em
+-- `skipped`). A partição do mês é desanexada de attendance_records e anexada
+-- a attendance_records_archive, sem copiar nem apagar registros; as listas do
+-- mês são copiadas para attendance_lists_archive. Se o mês já estava no
+-- arquivo (registros que chegaram depois), as linhas são copiadas para a
+-- partição arquivada e a partição nova é apagada. Os agregados de relatório
+-- não mudam. O DETACH bloqueia a tabela de registros por um instante: rodar
+-- fora do horário das reuniões.
+
+CREATE OR REPLACE FUNCTION archive_attendance_history(p_before DATE)
+RETURNS JSON
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_partition REGCLASS;
+    v_from DATE;
+    v_to DATE;
+    v_constraint TEXT;
+    v_count BIGINT;
+    v_lists BIGINT := 0;
+    v_records BIGINT := 0;
+    v_months TEXT[] := '{}';
+    v_skipped TEXT[] := '{}';
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('attendance_partitions')) THEN
+        RETURN json_build_object('status', 'busy');
+    END IF;
+
+    -- Todo mês com lista passa a ter partição (mesmo vazia) e as linhas antigas
+    -- ainda na partição padrão vão para a do mês
+    PERFORM ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists), 0);
+
+    FOR v_partition, v_from, v_to IN
+        SELECT c.oid::REGCLASS, bounds[1]::DATE, bounds[2]::DATE
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        CROSS JOIN LATERAL regexp_match(
+            pg_get_expr(c.relpartbound, c.oid), 'FROM \(''([^'']+)''\) TO \(''([^'']+)''\)'
+        ) AS bounds
+        -- A partição padrão não tem limites (bounds nulo) e nunca vai para o arquivo
+        WHERE i.inhparent = 'attendance_records'::REGCLASS AND bounds IS NOT NULL
+        ORDER BY 2
+    LOOP
+        EXIT WHEN v_to > p_before;
+
+        IF EXISTS (
+            SELECT 1 FROM attendance_lists
+            WHERE meeting_date >= v_from AND meeting_date < v_to AND status = 'active'
+        ) THEN
+            v_skipped := v_skipped || to_char(v_from, 'YYYY-MM');
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('ALTER TABLE attendance_records DETACH PARTITION %s', v_partition);
+
+        -- A partição avulsa mantém a chave para attendance_lists: sai antes de
+        -- apagar as listas (a do arquivo é criada pelo ATTACH)
+        FOR v_constraint IN
+            SELECT conname FROM pg_constraint
+            WHERE conrelid = v_partition AND contype = 'f' AND confrelid = 'attendance_lists'::REGCLASS
+        LOOP
+            EXECUTE format('ALTER TABLE %s DROP CONSTRAINT %I', v_partition, v_constraint);
+        END LOOP;
+
+        INSERT INTO attendance_lists_archive
+        SELECT l.*, NOW() FROM attendance_lists l
+        WHERE l.meeting_date >= v_from AND l.meeting_date < v_to;
+        GET DIAGNOSTICS v_count = ROW_COUNT;
+        v_lists := v_lists + v_count;
+
+        IF EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'attendance_records_archive'::REGCLASS
+              AND pg_get_expr(c.relpartbound, c.oid) = format('FOR VALUES FROM (%L) TO (%L)', v_from, v_to)
+        ) THEN
+            EXECUTE format('INSERT INTO attendance_records_archive SELECT * FROM %s', v_partition);
+            GET DIAGNOSTICS v_count = ROW_COUNT;
+            EXECUTE format('DROP TABLE %s', v_partition);
+        ELSE
+            EXECUTE format(
+                'ALTER TABLE attendance_records_archive ATTACH PARTITION %s FOR VALUES FROM (%L) TO (%L)',
+                v_partition, v_from, v_to
+            );
+            EXECUTE format('SELECT COUNT(*) FROM %s', v_partition) INTO v_count;
+        END IF;
+
+        DELETE FROM attendance_lists WHERE meeting_date >= v_from AND meeting_date < v_to;
+        v_records := v_records + v_count;
+        v_months := v_months || to_char(v_from, 'YYYY-MM');
+    END LOOP;
+
+    RETURN json_build_object(
+        'status', 'archived',
+        'months', to_json(v_months),
+        'lists', v_lists,
+        'records', v_records,
+        'skipped', to_json(v_skipped)
+    );
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION archive_attendance_history(DATE) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION archive_attendance_history(DATE) TO service_role;
+
+SELECT ensure_attendance_partitions((SELECT MIN(meeting_date) FROM attendance_lists), 0);
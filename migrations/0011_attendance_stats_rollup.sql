@@ -0,0 +1,148 @@
+-- Consolidação periódica dos agregados de empresa e instalação.
+--
+-- O gatilho de check-in fazia upsert em company_stats e installation_stats na
+-- transação de cada presença. Essas linhas são poucas e todo check-in passa por
+-- elas, então check-ins de listas diferentes esperavam uns pelos outros no
+-- bloqueio da mesma linha. Agora o gatilho só soma professional_stats e
+-- acrescenta as presenças de empresa e instalação a attendance_stats_pending;
+-- rollup_attendance_stats as consolida (o servidor chama a cada
+-- STATS_ROLLUP_SECONDS). Os relatórios de empresa e instalação ficam atrasados
+-- até a próxima consolidação; os de profissional e as horas de treinamento
+-- (somadas ao finalizar a lista) continuam imediatos.
+
+CREATE TABLE IF NOT EXISTS attendance_stats_pending (
+
+id BIGSERIAL PRIMARY KEY,
+
+company TEXT NOT NULL,
+
+installation_name TEXT NOT NULL,
+
+attendances INTEGER NOT NULL
+
+);
+
+ALTER TABLE attendance_stats_pending ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION attendance_stats_on_records()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    INSERT INTO professional_stats AS s (professional_id, attendances, last_attendance_at)
+    SELECT professional_id, COUNT(*), MAX(entry_time)
+    FROM inserted_records
+    GROUP BY professional_id
+    ORDER BY professional_id
+    ON CONFLICT (professional_id) DO UPDATE SET
+        attendances = s.attendances + EXCLUDED.attendances,
+        last_attendance_at = GREATEST(s.last_attendance_at, EXCLUDED.last_attendance_at);
+
+    INSERT INTO attendance_stats_pending (company, installation_name, attendances)
+    SELECT p.company, l.installation_name, COUNT(*)
+    FROM inserted_records i
+    JOIN professionals p ON p.id = i.professional_id
+    JOIN attendance_lists l ON l.id = i.list_id
+    GROUP BY p.company, l.installation_name;
+
+    RETURN NULL;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION attendance_stats_on_records() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION attendance_stats_on_records() TO service_role;
+
+CREATE OR REPLACE FUNCTION rollup_attendance_stats()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+DECLARE
+    v_rows INTEGER;
+BEGIN
+    WITH drained AS (
+        DELETE FROM attendance_stats_pending
+        RETURNING company, installation_name, attendances
+    ), companies AS (
+        INSERT INTO company_stats AS s (company, attendances)
+        SELECT company, SUM(attendances)::INTEGER
+        FROM drained
+        GROUP BY company
+        ORDER BY company
+        ON CONFLICT (company) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances
+    ), installations AS (
+        INSERT INTO installation_stats AS s (installation_name, attendances)
+        SELECT installation_name, SUM(attendances)::INTEGER
+        FROM drained
+        GROUP BY installation_name
+        ORDER BY installation_name
+        ON CONFLICT (installation_name) DO UPDATE SET attendances = s.attendances + EXCLUDED.attendances
+    )
+    SELECT COUNT(*) INTO v_rows FROM drained;
+
+    RETURN v_rows;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rollup_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rollup_attendance_stats() TO service_role;
+
+-- rebuild_attendance_stats também descarta as pendências, já contadas no recálculo
+
+CREATE OR REPLACE FUNCTION rebuild_attendance_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public, pg_temp
+AS $$
+BEGIN
+    TRUNCATE professional_stats, company_stats, installation_stats, attendance_stats_pending;
+
+    INSERT INTO professional_stats (professional_id, attendances, training_seconds, last_attendance_at)
+    SELECT
+        a.professional_id,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        MAX(a.entry_time)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    GROUP BY a.professional_id;
+
+    INSERT INTO company_stats (company, attendances, training_seconds)
+    SELECT
+        p.company,
+        COUNT(*),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_records_all a
+    JOIN attendance_lists_all l ON l.id = a.list_id
+    JOIN professionals p ON p.id = a.professional_id
+    GROUP BY p.company;
+
+    INSERT INTO installation_stats (installation_name, lists, completed_lists, attendances, session_seconds, training_seconds)
+    SELECT
+        l.installation_name,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE l.status = 'completed'),
+        COALESCE(SUM(r.participants), 0),
+        COALESCE(SUM(GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0),
+        COALESCE(SUM(r.participants * GREATEST(EXTRACT(EPOCH FROM l.end_time - l.start_time), 0)::BIGINT)
+            FILTER (WHERE l.status = 'completed'), 0)
+    FROM attendance_lists_all l
+    LEFT JOIN (
+        SELECT list_id, COUNT(*) AS participants FROM attendance_records_all GROUP BY list_id
+    ) r ON r.list_id = l.id
+    GROUP BY l.installation_name;
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION rebuild_attendance_stats() FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION rebuild_attendance_stats() TO service_role;